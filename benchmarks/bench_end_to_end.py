@@ -0,0 +1,259 @@
+"""
+End-to-end throughput and latency benchmark of a running LogWatcher.
+
+Starts LogWatcher in a subprocess on synthetic log files, with its
+notifications pointed at local webhook, SMTP and syslog stand-ins, and
+reports JSON results for tracking regressions between releases.
+
+The watcher is started with `python -m logwatcher.log_prod`. In this
+tree log_prod.py is an incomplete fragment that does not compile, so
+the benchmark stops with that error before starting any stand-in; it
+runs once the full module is restored.
+
+Usage:
+    python -m benchmarks.bench_end_to_end [--files N] [--rate LINES/S] [--duration S]
+        [--line-length BYTES] [--match-ratio R] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import importlib.util
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import logwatcher
+from benchmarks.standins import Recorder, SMTPStandIn, SyslogStandIn, WebhookStandIn
+from benchmarks.synthetic import SyntheticLogWriter
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50, p99 and max of latencies in seconds, as milliseconds."""
+    if not values:
+        return {'count': 0, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {'count': len(ordered), 'p50_ms': at(0.50), 'p99_ms': at(0.99),
+            'max_ms': round(ordered[-1] * 1000, 2)}
+
+
+def process_memory(pid: int) -> Dict[str, Optional[float]]:
+    """Current and peak RSS of a process in MB, where /proc is available."""
+    memory: Dict[str, Optional[float]] = {'rss_mb': None, 'peak_rss_mb': None}
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'VmHWM'):
+                    kb = int(value.split()[0])
+                    memory['rss_mb' if key == 'VmRSS' else 'peak_rss_mb'] = round(kb / 1024, 1)
+    except OSError:
+        pass
+    return memory
+
+
+def build_config(paths: List[str], webhook: WebhookStandIn, smtp: SMTPStandIn,
+                 syslog: SyslogStandIn, args: argparse.Namespace) -> Dict[str, Any]:
+    """LogWatcher configuration that sends every match to every stand-in."""
+    return {
+        'settings': {
+            'encoding': 'utf-8',
+            'read_chunk_size': 65536,
+            # Unlimited, so every match produces an alert to time
+            'notification_rate_limit': 0,
+            'buffer_size': 20,
+            'max_retries': 3
+        },
+        'patterns': {
+            'error': r'\b(ERROR|CRITICAL)\b',
+            'security': r'(?i)\b(unauthorized|forbidden|invalid\stoken)\b',
+            'oom': r'Out of memory: Killed process \d+'
+        },
+        'file_patterns': {path: ['error', 'security', 'oom'] for path in paths},
+        'notifications': {
+            'email': {
+                'enabled': 'email' in args.sinks,
+                'smtp_server': '127.0.0.1',
+                'smtp_port': smtp.port,
+                'starttls': False,
+                'username': 'bench@localhost',
+                'password': 'bench',
+                'to_address': ['alerts@localhost'],
+                'batch_window': args.email_batch_window
+            },
+            'slack': {'enabled': 'slack' in args.sinks, 'webhook_url': webhook.url('slack')},
+            'teams': {'enabled': 'teams' in args.sinks, 'webhook_url': webhook.url('teams')},
+            'telegram': {'enabled': False},
+            'syslog': {
+                'enabled': 'syslog' in args.sinks,
+                'host': '127.0.0.1',
+                'port': syslog.port,
+                'protocol': syslog.protocol,
+                'mode': 'forwarder'
+            }
+        },
+        'notification_rules': {
+            'error': [sink for sink in args.sinks if sink != 'syslog'],
+            'security': ['slack'],
+            'oom': ['slack']
+        }
+    }
+
+
+def wait_for(recorder: Recorder, seqs: List[int], timeout: float) -> bool:
+    """Wait until a recorder has seen all of the given markers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(recorder.seen(seq) for seq in seqs):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def check_entry_point() -> None:
+    """
+    Make sure the watcher module compiles, so a broken tree fails fast.
+
+    Raises:
+        RuntimeError: If logwatcher.log_prod cannot be compiled
+    """
+    spec = importlib.util.find_spec('logwatcher.log_prod')
+    try:
+        with open(spec.origin, encoding='utf-8') as f:
+            compile(f.read(), spec.origin, 'exec')
+    except SyntaxError as e:
+        raise RuntimeError(
+            f"Cannot start LogWatcher: {spec.origin} does not compile ({e.msg}, line {e.lineno})"
+        ) from e
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    check_entry_point()
+    webhook = WebhookStandIn()
+    smtp = SMTPStandIn()
+    syslog = SyslogStandIn(args.syslog_protocol)
+    # Markers are posted to the webhook, which has the shortest delivery path
+    progress = webhook.recorder
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f'service-{i}.log') for i in range(args.files)]
+        for path in paths:
+            open(path, 'wb').close()
+        config_path = os.path.join(tmp, 'config.json')
+        with open(config_path, 'w') as f:
+            json.dump(build_config(paths, webhook, smtp, syslog, args), f)
+
+        watcher = subprocess.Popen(
+            [sys.executable, '-m', 'logwatcher.log_prod', config_path],
+            stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL
+        )
+        writer = SyntheticLogWriter(paths, args.line_length, args.match_ratio, args.seed)
+        try:
+            # Keep writing markers until the watcher is up and alerting
+            ready = False
+            deadline = time.monotonic() + args.startup_timeout
+            while not ready and time.monotonic() < deadline:
+                if watcher.poll() is not None:
+                    raise RuntimeError(f"LogWatcher exited with status {watcher.returncode}")
+                writer.write_marker(0, -1)
+                ready = wait_for(progress, [-1], 0.5)
+            if not ready:
+                raise RuntimeError("LogWatcher did not send an alert within the startup timeout")
+
+            write_time = writer.run(args.rate, args.duration, args.batch)
+            # One final marker per file; once all arrive, every line was processed
+            final = [-(2 + i) for i in range(len(paths))]
+            for index, seq in enumerate(final):
+                writer.write_marker(index, seq)
+            caught_up = wait_for(progress, final, args.drain_timeout)
+            # From the first write until the alert for the last line
+            processing_time = None
+            if caught_up:
+                processing_time = write_time + max(progress.latencies[seq] for seq in final)
+            # Let batched sinks deliver before reading their results
+            time.sleep(args.settle)
+            memory = process_memory(watcher.pid)
+        finally:
+            writer.close()
+            watcher.terminate()
+            try:
+                watcher.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                watcher.kill()
+            for server in (webhook, smtp, syslog):
+                server.close()
+
+    mb = writer.bytes_written / 1e6
+    result = {
+        'benchmark': 'end_to_end',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'logwatcher_version': logwatcher.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'files': args.files, 'rate': args.rate, 'duration': args.duration,
+            'line_length': args.line_length, 'match_ratio': args.match_ratio,
+            'sinks': args.sinks, 'syslog_protocol': args.syslog_protocol
+        },
+        'written': {
+            'lines': writer.lines_written, 'mb': round(mb, 2),
+            'matches': writer.matches_written,
+            'lines_per_sec': round(writer.lines_written / write_time),
+        },
+        'processed': {
+            'caught_up': caught_up,
+            'seconds': round(processing_time, 3) if caught_up else None,
+            'lines_per_sec': round(writer.lines_written / processing_time) if caught_up else None,
+            'mb_per_sec': round(mb / processing_time, 2) if caught_up else None,
+        },
+        'latency': {
+            'webhook': percentiles(webhook.recorder.sample()),
+            'email': percentiles(smtp.recorder.sample()),
+            'syslog': percentiles(syslog.recorder.sample()),
+        },
+        'memory': memory,
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=20_000,
+                        help="Lines per second over all files, 0 for as fast as possible")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--line-length', type=int, default=200)
+    parser.add_argument('--match-ratio', type=float, default=0.001)
+    parser.add_argument('--batch', type=int, default=100, help="Lines per write() call")
+    parser.add_argument('--sinks', nargs='+', default=['slack', 'teams', 'email', 'syslog'],
+                        choices=['slack', 'teams', 'email', 'syslog'])
+    parser.add_argument('--syslog-protocol', choices=['tcp', 'udp'], default='tcp')
+    parser.add_argument('--email-batch-window', type=float, default=2.0)
+    parser.add_argument('--startup-timeout', type=float, default=30.0)
+    parser.add_argument('--drain-timeout', type=float, default=120.0)
+    parser.add_argument('--settle', type=float, default=3.0,
+                        help="Seconds to wait for batched sinks after catching up")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the JSON results to this file")
+    parser.add_argument('--verbose', action='store_true', help="Show LogWatcher's stderr")
+    args = parser.parse_args()
+    if 'slack' not in args.sinks:
+        parser.error("the slack sink is required; progress markers are read from it")
+
+    result = run(args)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Microbenchmark of TokenBucketLimiter.can_send as the number of keys grows.
+
+Usage:
+    python -m benchmarks.bench_rate_limiter [--max-keys N] [--calls N]
+"""
+import time
+import random
+import argparse
+import tracemalloc
+
+from logwatcher.token_bucket import DEFAULT_POLICY, TokenBucketLimiter
+
+
+def time_calls(limiter: TokenBucketLimiter, keys, calls: int) -> float:
+    """Average nanoseconds per can_send over random keys."""
+    sample = [random.choice(keys) for _ in range(calls)]
+    start = time.perf_counter()
+    for key in sample:
+        limiter.can_send(key)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-keys', type=int, default=1_000_000)
+    parser.add_argument('--calls', type=int, default=200_000)
+    args = parser.parse_args()
+
+    random.seed(7)
+    keys = [f"/var/log/app/service-{i}.log:pattern-{i % 40}" for i in range(args.max_keys * 2)]
+    limiter = TokenBucketLimiter({DEFAULT_POLICY: (5.0, 1 / 60)}, max_keys=args.max_keys)
+
+    population = 1_000
+    filled = 0
+    while population <= args.max_keys:
+        for key in keys[filled:population]:
+            limiter.can_send(key)
+        filled = population
+        ns = time_calls(limiter, keys[:population], args.calls)
+        print(f"keys={len(limiter):>9,}  {ns:6.0f} ns/can_send")
+        population *= 10
+
+    # Beyond the cap a new key is refused while the least recently used
+    # bucket is still refilling
+    ns = time_calls(limiter, keys[args.max_keys:], args.calls)
+    print(f"keys={len(limiter):>9,}  {ns:6.0f} ns/can_send  (new keys, refused)")
+
+    # and evicts it once it has refilled, which is immediate at this rate
+    del limiter
+    limiter = TokenBucketLimiter({DEFAULT_POLICY: (5.0, 1e9)}, max_keys=args.max_keys)
+    for key in keys[:args.max_keys]:
+        limiter.can_send(key)
+    ns = time_calls(limiter, keys[args.max_keys:], args.calls)
+    print(f"keys={len(limiter):>9,}  {ns:6.0f} ns/can_send  (new keys, evicting)")
+
+    # Limiter state only; the key strings themselves are owned by the caller
+    del limiter
+    tracemalloc.start()
+    limiter = TokenBucketLimiter({DEFAULT_POLICY: (5.0, 1 / 60)}, max_keys=args.max_keys)
+    for key in keys[:args.max_keys]:
+        limiter.can_send(key)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"memory at {len(limiter):,} keys: {current / 1e6:.1f} MB "
+          f"({current / len(limiter):.0f} bytes/key)")
+
+
+if __name__ == '__main__':
+    main()
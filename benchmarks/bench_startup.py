@@ -0,0 +1,173 @@
+"""
+Cold start benchmark of the work LogWatcher does before watching files.
+
+Each run is a fresh interpreter, as for a short-lived container job. The
+phases are timed with an empty config cache and again with the entry the
+first start wrote, and the JSON results list which of the expensive
+optional modules each start had to import.
+
+Usage:
+    python -m benchmarks.bench_startup [--patterns N] [--files N] [--runs N]
+        [--channels slack email ...] [--output results.json]
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List
+
+import logwatcher
+
+# Runs in the child interpreter; prints the phase timings as JSON
+CHILD = r'''
+import sys, time, json
+start = time.perf_counter()
+import re
+from logwatcher.config_validator import validate_config
+from logwatcher.dispatch_table import FileDispatchTable
+from logwatcher.health_monitor import HealthMonitor
+from logwatcher.matcher import PatternMatcher
+from logwatcher.notifiers import NotificationManager
+from logwatcher.remote_syslog import RemoteSyslogManager
+from logwatcher.tail_reader import TailReader
+from logwatcher.token_bucket import TokenBucketLimiter
+phases = {}
+mark = time.perf_counter()
+phases['import'] = mark - start
+
+def phase(name):
+    global mark
+    now = time.perf_counter()
+    phases[name] = now - mark
+    mark = now
+
+with open(sys.argv[1], encoding='utf-8') as f:
+    config = json.load(f)
+validate_config(config)
+phase('load_config')
+patterns = {name: re.compile(source) for name, source in config['patterns'].items()}
+phase('compile_patterns')
+for names in {tuple(names) for names in config['file_patterns'].values()}:
+    PatternMatcher(patterns, names)
+phase('build_matchers')
+NotificationManager(config).close()
+phase('notifiers')
+phases['total'] = time.perf_counter() - start
+heavy = ('requests', 'jsonschema', 'smtplib', 'email.mime.text', 'asyncio')
+print(json.dumps({'phases': phases, 'imported': [m for m in heavy if m in sys.modules]}))
+'''
+
+
+def build_config(args: argparse.Namespace, cache_dir: str) -> Dict[str, Any]:
+    """Config with args.patterns patterns spread over args.files files."""
+    patterns = {}
+    for i in range(args.patterns):
+        # A mix of the pattern shapes seen in real configs
+        patterns[f'pattern_{i}'] = (
+            rf'(?i)\bservice-{i} (failed|timed out)' if i % 3 == 0 else
+            rf'ERROR \[worker-{i}\] .*code=\d+' if i % 3 == 1 else
+            rf'user_{i}\w* denied'
+        )
+    names = list(patterns)
+    per_file = max(1, len(names) // args.files)
+    file_patterns = {
+        f'/var/log/app/service-{n}.log': names[n * per_file:(n + 1) * per_file] or names
+        for n in range(args.files)
+    }
+    notifications = {
+        'email': {'enabled': 'email' in args.channels, 'smtp_server': '127.0.0.1', 'smtp_port': 25,
+                  'username': 'logwatcher@example.com', 'password': '',
+                  'to_address': ['ops@example.com']},
+        'slack': {'enabled': 'slack' in args.channels,
+                  'webhook_url': 'http://127.0.0.1:9/slack'},
+        'teams': {'enabled': 'teams' in args.channels,
+                  'webhook_url': 'http://127.0.0.1:9/teams'},
+        'telegram': {'enabled': False},
+    }
+    return {
+        'settings': {'encoding': 'utf-8', 'read_chunk_size': 65536,
+                     'notification_rate_limit': 60, 'config_cache_dir': cache_dir},
+        'patterns': patterns,
+        'file_patterns': file_patterns,
+        'notifications': notifications,
+        'notification_rules': {name: list(args.channels) for name in names[:10]},
+    }
+
+
+def start_once(config_path: str) -> Dict[str, Any]:
+    """Run the startup phases in a fresh interpreter."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(logwatcher.__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [root, os.environ.get('PYTHONPATH')])
+    ))
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, config_path],
+        check=True, capture_output=True, text=True, env=env
+    ).stdout
+    return json.loads(output)
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median milliseconds per phase over the runs."""
+    return {
+        'median_ms': {
+            name: round(statistics.median(s['phases'][name] for s in samples) * 1000, 1)
+            for name in samples[0]['phases']
+        },
+        'imported': samples[-1]['imported'],
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix='logwatcher-startup-') as workdir:
+        cache_dir = os.path.join(workdir, 'cache')
+        config_path = os.path.join(workdir, 'config.json')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(build_config(args, cache_dir), f)
+
+        cold = []
+        for _ in range(args.runs):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            cold.append(start_once(config_path))
+        # The last cold start left its entry behind
+        warm = [start_once(config_path) for _ in range(args.runs)]
+
+    return {
+        'benchmark': 'startup',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'logwatcher_version': logwatcher.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {'patterns': args.patterns, 'files': args.files,
+                       'runs': args.runs, 'channels': args.channels},
+        'cold_cache': summarize(cold),
+        'warm_cache': summarize(warm),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--patterns', type=int, default=500)
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--channels', nargs='*', default=[],
+                        choices=['slack', 'teams', 'email'],
+                        help="Notification channels to enable")
+    parser.add_argument('--output', help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
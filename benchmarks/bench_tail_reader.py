@@ -0,0 +1,93 @@
+"""
+Throughput comparison of the text-mode reader and TailReader.
+
+Usage:
+    python -m benchmarks.bench_tail_reader [--lines N] [--chunk-sizes BYTES ...]
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from logwatcher.tail_reader import TailReader
+
+
+def generate_log(path: str, lines: int) -> None:
+    """Write a log file with mixed ASCII and multibyte lines."""
+    random.seed(42)
+    words = ['GET', '/api/v1/users', '200', 'served', 'in', 'ms', 'user', 'naïve', 'größe', '日志']
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            f.write(f"2024-01-01T00:00:{i % 60:02d} worker-{i % 8} ")
+            f.write(' '.join(random.choice(words) for _ in range(12)))
+            f.write('\n')
+
+
+def read_text_mode(path: str, chunk_size: int) -> int:
+    """Previous handle_file_change read path."""
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            for line in chunk.splitlines():
+                count += 1
+    return count
+
+
+def read_tail_reader(path: str, chunk_size: int) -> int:
+    """TailReader path, decoding every complete line."""
+    count = 0
+    reader = TailReader('utf-8', chunk_size)
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        for line in reader.read_text(fd, 0):
+            count += 1
+    finally:
+        os.close(fd)
+    return count
+
+
+def read_tail_reader_raw(path: str, chunk_size: int) -> int:
+    """TailReader path without decoding, i.e. lines nobody needs as text."""
+    count = 0
+    reader = TailReader('utf-8', chunk_size)
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        for raw in reader.read(fd, 0):
+            count += 1
+    finally:
+        os.close(fd)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=1_000_000)
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[4096, 65536])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.log')
+        generate_log(path, args.lines)
+        size_mb = os.path.getsize(path) / 1e6
+
+        for chunk_size in args.chunk_sizes:
+            for name, func in (
+                ('text-mode', read_text_mode),
+                ('tail-text', read_tail_reader),
+                ('tail-raw', read_tail_reader_raw),
+            ):
+                start = time.perf_counter()
+                count = func(path, chunk_size)
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{name:12} chunk={chunk_size:<7} lines={count:<9} "
+                    f"{count / elapsed:12,.0f} lines/s {size_mb / elapsed:8.1f} MB/s"
+                )
+
+
+if __name__ == '__main__':
+    main()
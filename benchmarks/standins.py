@@ -0,0 +1,172 @@
+"""
+Local stand-ins for the webhook, SMTP and syslog endpoints.
+
+Each server records, per benchmark marker, the time between the line
+being written and the alert arriving.
+"""
+import email
+import threading
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from benchmarks.synthetic import parse_markers
+
+
+class Recorder:
+    """Arrival latencies of the markers received by one server."""
+
+    def __init__(self, prefix: Optional[bytes] = None):
+        self.prefix = prefix
+        self.latencies: Dict[int, float] = {}
+        self.messages = 0
+        self._lock = threading.Lock()
+
+    def record(self, data: bytes) -> None:
+        now = time.time()
+        markers = parse_markers(data, self.prefix)
+        with self._lock:
+            self.messages += 1
+            for seq, written in markers:
+                # Only the first delivery of a marker counts
+                self.latencies.setdefault(seq, now - written)
+
+    def seen(self, seq: int) -> bool:
+        return seq in self.latencies
+
+    def sample(self) -> List[float]:
+        """Latencies of the regular markers, without the warm-up ones."""
+        with self._lock:
+            return [latency for seq, latency in self.latencies.items() if seq >= 0]
+
+
+class _Server:
+    def __init__(self, server: socketserver.BaseServer, recorder: Recorder):
+        self.server = server
+        self.recorder = recorder
+        self.port = server.server_address[1]
+        self._thread = threading.Thread(target=server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class WebhookStandIn(_Server):
+    """HTTP server accepting Slack and Teams style webhook posts."""
+
+    def __init__(self):
+        recorder = Recorder(prefix=b'Match: ')
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                recorder.record(body)
+                self.send_response(200)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        server.daemon_threads = True
+        super().__init__(server, recorder)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}/{path}"
+
+
+class SMTPStandIn(_Server):
+    """Minimal plain-text SMTP server that accepts any login."""
+
+    def __init__(self):
+        recorder = Recorder(prefix=b'Match: ')
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: bytes) -> None:
+                self.wfile.write(line + b'\r\n')
+
+            def handle(self):
+                self.reply(b'220 standin ESMTP')
+                data: Optional[List[bytes]] = None
+                for line in self.rfile:
+                    if data is not None:
+                        if line == b'.\r\n':
+                            msg = email.message_from_bytes(b''.join(data))
+                            for part in msg.walk():
+                                if not part.is_multipart():
+                                    recorder.record(part.get_payload(decode=True) or b'')
+                            data = None
+                            self.reply(b'250 queued')
+                        else:
+                            data.append(line[1:] if line.startswith(b'..') else line)
+                        continue
+                    command = line[:4].upper()
+                    if command == b'EHLO':
+                        self.reply(b'250-standin')
+                        self.reply(b'250 AUTH PLAIN LOGIN')
+                    elif command == b'AUTH':
+                        self.reply(b'235 accepted')
+                    elif command == b'DATA':
+                        data = []
+                        self.reply(b'354 end with .')
+                    elif command == b'QUIT':
+                        self.reply(b'221 bye')
+                        return
+                    else:
+                        self.reply(b'250 ok')
+
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        server.daemon_threads = True
+        super().__init__(server, recorder)
+
+
+class SyslogStandIn(_Server):
+    """Syslog collector; octet-counted or newline framed over TCP, or UDP."""
+
+    def __init__(self, protocol: str = 'tcp'):
+        recorder = Recorder()
+        self.protocol = protocol
+
+        if protocol == 'udp':
+            class Handler(socketserver.BaseRequestHandler):
+                def handle(self):
+                    recorder.record(self.request[0])
+
+            server = socketserver.ThreadingUDPServer(('127.0.0.1', 0), Handler)
+        else:
+            class Handler(socketserver.BaseRequestHandler):
+                def handle(self):
+                    buffer = b''
+                    while True:
+                        chunk = self.request.recv(65536)
+                        if not chunk:
+                            return
+                        buffer += chunk
+                        while buffer:
+                            length, space, _ = buffer[:12].partition(b' ')
+                            if space and length.isdigit():
+                                # RFC 6587 octet counting; records may contain newlines
+                                end = len(length) + 1 + int(length)
+                                if len(buffer) < end:
+                                    break
+                                recorder.record(buffer[len(length) + 1:end])
+                                buffer = buffer[end:]
+                            else:
+                                # Non-transparent framing, as sent by SysLogHandler
+                                end = min((i for i in (buffer.find(b'\n'), buffer.find(b'\0'))
+                                           if i != -1), default=-1)
+                                if end == -1:
+                                    break
+                                recorder.record(buffer[:end])
+                                buffer = buffer[end + 1:]
+
+            server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        server.daemon_threads = True
+        super().__init__(server, recorder)
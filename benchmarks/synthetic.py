@@ -0,0 +1,163 @@
+"""
+Synthetic log generator for the benchmarks.
+
+Matching lines carry ``bench_seq=<n> bench_ts=<unix time>`` so that a
+stand-in server receiving the alert can compute write-to-alert latency.
+"""
+import os
+import re
+import time
+import random
+from typing import List, Optional
+
+MARKER = re.compile(rb'bench_seq=(-?\d+) bench_ts=(\d+\.\d+)')
+
+_SERVICES = ['api', 'auth', 'billing', 'search', 'worker', 'gateway']
+_MESSAGES = [
+    'GET /api/v1/users/{n} 200 served in {ms}ms',
+    'POST /api/v1/orders 201 created order {n}',
+    'cache hit ratio {ms}% for shard {n}',
+    'job {n} completed in {ms}ms',
+    'connection pool size={n} idle={ms}',
+]
+_MATCHES = [
+    'ERROR request {n} failed: upstream timeout after {ms}ms',
+    'ERROR unhandled exception in handler {n}',
+    'CRITICAL disk usage above threshold on volume {n}',
+]
+
+
+class SyntheticLogWriter:
+    """Appends timestamped, web-service style lines to a set of files."""
+
+    def __init__(self, paths: List[str], line_length: int = 200,
+                 match_ratio: float = 0.01, seed: int = 42):
+        """
+        Initialize the SyntheticLogWriter.
+
+        Args:
+            paths: Files to append to, round robin
+            line_length: Approximate length of each line in bytes
+            match_ratio: Fraction of lines that match the benchmark pattern
+            seed: Random seed, so runs are comparable
+        """
+        self.paths = paths
+        self.line_length = line_length
+        self.match_ratio = match_ratio
+        self.random = random.Random(seed)
+        self.lines_written = 0
+        self.bytes_written = 0
+        self.matches_written = 0
+        self._next_file = 0
+        self._fds = [
+            os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+            for path in paths
+        ]
+
+    def make_line(self) -> bytes:
+        """Build one line; a match_ratio share of them are matches."""
+        rnd = self.random
+        n = rnd.randrange(1_000_000)
+        ms = rnd.randrange(1000)
+        head = (
+            f"{time.strftime('%Y-%m-%dT%H:%M:%S')} {rnd.choice(_SERVICES)}"
+            f"[{rnd.randrange(100, 999)}]: "
+        )
+        if rnd.random() < self.match_ratio:
+            body = (rnd.choice(_MATCHES).format(n=n, ms=ms) +
+                    f" bench_seq={self.matches_written} bench_ts={time.time():.6f}")
+            self.matches_written += 1
+        else:
+            body = rnd.choice(_MESSAGES).format(n=n, ms=ms)
+        line = head + body
+        if len(line) < self.line_length - 1:
+            line += ' ' + 'x' * (self.line_length - len(line) - 2)
+        return (line + '\n').encode('utf-8')
+
+    def write(self, count: int, batch: int = 100) -> None:
+        """
+        Append count lines, spread over the files in write() calls of batch lines.
+
+        Args:
+            count: Number of lines to write
+            batch: Lines per write() call
+        """
+        for start in range(0, count, batch):
+            n = min(batch, count - start)
+            fd = self._fds[self._next_file]
+            self._next_file = (self._next_file + 1) % len(self._fds)
+            data = b''.join(self.make_line() for _ in range(n))
+            os.write(fd, data)
+            self.lines_written += n
+            self.bytes_written += len(data)
+
+    def write_marker(self, index: int, seq: int) -> None:
+        """
+        Append a matching line to one file; used to know the watcher caught up.
+
+        Args:
+            index: Index of the file in paths
+            seq: Negative sequence number, kept apart from regular matches
+        """
+        line = (f"{time.strftime('%Y-%m-%dT%H:%M:%S')} bench[0]: ERROR benchmark marker "
+                f"bench_seq={seq} bench_ts={time.time():.6f}\n").encode('utf-8')
+        os.write(self._fds[index], line)
+
+    def run(self, rate: float, duration: float, batch: int = 100) -> float:
+        """
+        Write at a fixed line rate for a duration.
+
+        Args:
+            rate: Lines per second, 0 for as fast as possible
+            duration: Seconds to write for
+            batch: Lines per write() call
+
+        Returns:
+            Elapsed seconds
+        """
+        start = time.monotonic()
+        deadline = start + duration
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if rate:
+                due = int((now - start) * rate) - self.lines_written
+                if due <= 0:
+                    time.sleep(min(batch / rate, deadline - now))
+                    continue
+                self.write(min(due, batch * len(self._fds)), batch)
+            else:
+                self.write(batch * len(self._fds), batch)
+        return time.monotonic() - start
+
+    def close(self) -> None:
+        for fd in self._fds:
+            os.close(fd)
+        self._fds = []
+
+
+def parse_markers(data: bytes, prefix: Optional[bytes] = None):
+    """
+    Extract (seq, written_at) pairs from a received alert.
+
+    Args:
+        data: Received payload
+        prefix: Only count markers that directly follow this prefix, e.g.
+            b'Match: ' to skip the context lines of a message
+
+    Returns:
+        List of (seq, written_at)
+    """
+    if prefix is None:
+        return [(int(seq), float(ts)) for seq, ts in MARKER.findall(data)]
+    found = []
+    start = data.find(prefix)
+    while start != -1:
+        # JSON payloads escape newlines
+        ends = [i for i in (data.find(b'\n', start), data.find(b'\\n', start)) if i != -1]
+        match = MARKER.search(data[start:min(ends, default=len(data))])
+        if match:
+            found.append((int(match.group(1)), float(match.group(2))))
+        start = data.find(prefix, start + len(prefix))
+    return found
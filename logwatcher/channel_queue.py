@@ -0,0 +1,387 @@
+import os
+import re
+import json
+import stat
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .config_cache import _private
+from .events import render
+
+POLICIES = ('drop_oldest', 'drop_lowest_priority', 'spill')
+
+# (pattern name, message, priority)
+Item = Tuple[str, Any, int]
+
+_SEGMENT = re.compile(r'\d{20}\.log')
+
+
+def default_spill_directory() -> Optional[str]:
+    """Per-user directory for spilled notifications, e.g. ~/.local/state/logwatcher/spill."""
+    base = os.environ.get('XDG_STATE_HOME') or os.environ.get('LOCALAPPDATA')
+    if not base:
+        home = os.path.expanduser('~')
+        if home == '~':
+            return None
+        base = os.path.join(home, '.local', 'state')
+    return os.path.join(base, 'logwatcher', 'spill')
+
+
+class SpillLog:
+    """
+    Append-only on-disk log of notifications, kept in numbered segment files.
+
+    Records are JSON lines. Segments are deleted once replayed; segments left
+    over from a previous run are replayed from their start, so after a
+    restart a notification may be sent twice, but it is not lost.
+
+    As replayed records are sent as they are, the directory and its parent
+    must belong to the current user and not be writable by anyone else, and
+    segments are opened without following symlinks.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 4 * 1024 * 1024,
+                 max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the SpillLog.
+
+        Args:
+            directory: Directory holding the segments of one channel
+            segment_bytes: Size at which a new segment is started
+            max_bytes: Unreplayed bytes above which the oldest segment is dropped
+
+        Raises:
+            OSError: If the directory cannot be created or read
+            ValueError: If the directory or its parent is not private to this user
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger("SpillLog")
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        for path in (os.path.dirname(os.path.abspath(directory)), directory):
+            st = os.lstat(path)
+            if not stat.S_ISDIR(st.st_mode) or not _private(st):
+                raise ValueError(f"{path} is not a private directory of this user")
+
+        # [sequence, unreplayed bytes, unreplayed records], oldest first
+        self._segments: Deque[List[int]] = deque()
+        for name in sorted(os.listdir(directory)):
+            if not _SEGMENT.fullmatch(name):
+                continue
+            with self._open(int(name[:-4]), 'rb') as f:
+                data = f.read()
+            self._segments.append([int(name[:-4]), len(data), data.count(b'\n')])
+        self.bytes = sum(segment[1] for segment in self._segments)
+        self.records = sum(segment[2] for segment in self._segments)
+        self.dropped = 0
+        self._next_seq = self._segments[-1][0] + 1 if self._segments else 0
+        self._writer = None
+        self._writer_bytes = 0
+        self._reader = None
+        if self.records:
+            self.logger.info(f"Replaying {self.records} spilled notifications from {directory}")
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, f'{seq:020d}.log')
+
+    def _open(self, seq: int, mode: str):
+        flags = os.O_RDONLY if mode == 'rb' else os.O_WRONLY | os.O_APPEND | os.O_CREAT
+        fd = os.open(self._path(seq), flags | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+        return open(fd, mode)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Write a record at the end of the log."""
+        data = (json.dumps(record) + '\n').encode('utf-8')
+        if self._writer is None or self._writer_bytes >= self.segment_bytes:
+            if self._writer is not None:
+                self._writer.close()
+            self._segments.append([self._next_seq, 0, 0])
+            self._writer = self._open(self._next_seq, 'ab')
+            self._writer_bytes = 0
+            self._next_seq += 1
+        self._writer.write(data)
+        # Handed to the OS so a crash of the process does not lose it
+        self._writer.flush()
+        self._writer_bytes += len(data)
+        self._segments[-1][1] += len(data)
+        self._segments[-1][2] += 1
+        self.bytes += len(data)
+        self.records += 1
+        while self.bytes > self.max_bytes and len(self._segments) > 1:
+            self._drop_oldest()
+
+    def read(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Remove and return up to limit records from the start of the log.
+
+        Args:
+            limit: Maximum number of records
+
+        Returns:
+            Records in the order they were written
+        """
+        records = []
+        while len(records) < limit and self._segments:
+            head = self._segments[0]
+            if self._reader is None:
+                self._reader = self._open(head[0], 'rb')
+            line = self._reader.readline()
+            if not line.endswith(b'\n'):
+                # End of the segment, or a record cut short by a crash
+                self.bytes -= head[1]
+                self.records -= head[2]
+                self._remove_head()
+                continue
+            head[1] -= len(line)
+            head[2] -= 1
+            self.bytes -= len(line)
+            self.records -= 1
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                self.logger.warning(f"Skipping corrupt record in {self._path(head[0])}")
+            if not head[2]:
+                # Replayed segments are removed at once, so a restart does not resend them
+                self._remove_head()
+        return records
+
+    def _remove_head(self) -> None:
+        seq = self._segments.popleft()[0]
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if not self._segments and self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        try:
+            os.remove(self._path(seq))
+        except OSError as e:
+            self.logger.error(f"Failed to remove spill segment {self._path(seq)}: {e}")
+
+    def _drop_oldest(self) -> None:
+        _, nbytes, records = self._segments[0]
+        self.bytes -= nbytes
+        self.records -= records
+        self.dropped += records
+        self.logger.warning(
+            f"Spill log {self.directory} exceeds {self.max_bytes} bytes, "
+            f"dropped {records} notifications"
+        )
+        self._remove_head()
+
+    def close(self) -> None:
+        for f in (self._reader, self._writer):
+            if f is not None:
+                f.close()
+        self._reader = self._writer = None
+
+
+class ChannelQueue:
+    """
+    Bounded queue of the notifications waiting for one channel.
+
+    When the queue is full, the policy decides what is given up:
+    drop_oldest drops the oldest notification, drop_lowest_priority the
+    oldest one of the lowest priority (or the new one, if nothing queued
+    ranks below it), and spill writes new notifications to a SpillLog that
+    is replayed once the channel delivers again. While the channel is
+    unhealthy, the oldest spilled notification is handed out once every
+    probe_interval seconds to find out whether it has recovered. Higher
+    priorities are handed out first.
+    """
+
+    def __init__(self, name: str, capacity: int = 1000, policy: str = 'drop_oldest',
+                 spill: Optional[SpillLog] = None, replay_batch: int = 100,
+                 probe_interval: float = 60.0):
+        """
+        Initialize the ChannelQueue.
+
+        Args:
+            name: Channel name
+            capacity: Maximum number of notifications held in memory
+            policy: One of POLICIES
+            spill: Spill log, required by the spill policy
+            replay_batch: Maximum number of records read back from disk at once
+            probe_interval: Seconds an unhealthy channel waits before a
+                spilled notification is retried
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        if policy == 'spill' and spill is None:
+            raise ValueError("The spill policy needs a spill log")
+        self.name = name
+        self.capacity = capacity
+        self.policy = policy
+        self.spill = spill
+        self.replay_batch = replay_batch
+        self.probe_interval = probe_interval
+        self.logger = logging.getLogger("ChannelQueue")
+        # Called after every put, e.g. to wake a consumer
+        self.on_put: Optional[Callable[[], None]] = None
+        # Cleared by a failed delivery; the spill log is replayed only while
+        # set, apart from probes
+        self._healthy = True
+        self._failed_at = 0.0
+        self.dropped = 0
+        self.spilled = 0
+        # priority -> [(sequence, pattern name, message)], oldest first
+        self._buckets: Dict[int, Deque[tuple]] = {}
+        self._depth = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return self._healthy
+
+    @healthy.setter
+    def healthy(self, value: bool) -> None:
+        self._healthy = value
+        if not value:
+            self._failed_at = time.monotonic()
+
+    def put(self, pattern_name: str, message: Any, priority: int = 0) -> None:
+        """
+        Queue a notification, applying the overflow policy if the queue is full.
+
+        Args:
+            pattern_name: Name of the matched pattern
+            message: Message or match event to send
+            priority: Higher values are sent first and dropped last
+        """
+        with self._lock:
+            if self._depth < self.capacity:
+                self._push(pattern_name, message, priority)
+            elif self.policy == 'spill':
+                self._spill(pattern_name, message, priority)
+            elif self.policy == 'drop_oldest':
+                self._pop(min(self._buckets, key=lambda p: self._buckets[p][0][0]))
+                self._push(pattern_name, message, priority)
+                self._count_drop()
+            else:
+                lowest = min(self._buckets)
+                if priority >= lowest:
+                    self._pop(lowest)
+                    self._push(pattern_name, message, priority)
+                self._count_drop()
+        if self.on_put is not None:
+            self.on_put()
+
+    def get(self) -> Optional[Item]:
+        """
+        Take the next notification to send.
+
+        Returns:
+            (pattern name, message, priority), or None if nothing is queued
+        """
+        with self._lock:
+            if (self.spill is not None and self.spill.records and
+                    self._depth <= self.capacity // 2):
+                limit = 0
+                if self._healthy:
+                    limit = min(self.replay_batch, self.capacity - self._depth)
+                elif time.monotonic() - self._failed_at >= self.probe_interval:
+                    # One probe per interval; its outcome sets healthy again
+                    limit = 1
+                    self._failed_at = time.monotonic()
+                for record in self.spill.read(limit):
+                    self._push(record['pattern'], record['message'], record.get('priority', 0))
+            if not self._depth:
+                return None
+            priority = max(self._buckets)
+            _, pattern_name, message = self._pop(priority)
+            return pattern_name, message, priority
+
+    def probe_delay(self) -> Optional[float]:
+        """
+        Seconds until get() hands out a probe of an unhealthy channel.
+
+        Returns:
+            Delay, or None if there is nothing to probe
+        """
+        if self._healthy or self.spill is None or not self.spill.records:
+            return None
+        return max(0.0, self._failed_at + self.probe_interval - time.monotonic())
+
+    def requeue(self, item: Item) -> bool:
+        """
+        Keep a notification whose delivery failed, if the policy spills.
+
+        Returns:
+            True if the notification was written to the spill log
+        """
+        if self.spill is None:
+            return False
+        with self._lock:
+            self._spill(*item)
+        return True
+
+    def _push(self, pattern_name: str, message: Any, priority: int) -> None:
+        bucket = self._buckets.get(priority)
+        if bucket is None:
+            bucket = self._buckets[priority] = deque()
+        bucket.append((self._seq, pattern_name, message))
+        self._seq += 1
+        self._depth += 1
+
+    def _pop(self, priority: int) -> tuple:
+        bucket = self._buckets[priority]
+        entry = bucket.popleft()
+        if not bucket:
+            del self._buckets[priority]
+        self._depth -= 1
+        return entry
+
+    def _spill(self, pattern_name: str, message: Any, priority: int) -> None:
+        try:
+            self.spill.append({
+                'pattern': pattern_name,
+                'priority': priority,
+                'message': render(message, 'text'),
+                'time': time.time()
+            })
+            self.spilled += 1
+        except Exception as e:
+            self.logger.error(f"Failed to spill {self.name} notification: {e}")
+            self._count_drop()
+
+    def _count_drop(self) -> None:
+        self.dropped += 1
+        if self.dropped == 1 or self.dropped % 1000 == 0:
+            self.logger.warning(
+                f"{self.name} notification queue full ({self.capacity}), "
+                f"{self.dropped} notifications dropped"
+            )
+
+    def __len__(self) -> int:
+        return self._depth
+
+    def status(self) -> Dict[str, Any]:
+        """Depth, losses and spill size for health output."""
+        spill_records = self.spill.records if self.spill is not None else 0
+        status = {
+            'status': 'healthy' if self._depth < self.capacity and not spill_records else 'warning',
+            'depth': self._depth,
+            'capacity': self.capacity,
+            'policy': self.policy,
+            'dropped': self.dropped + (self.spill.dropped if self.spill is not None else 0),
+        }
+        if self.spill is not None:
+            status['spilled_records'] = spill_records
+            status['spill_bytes'] = self.spill.bytes
+        return status
+
+    def close(self) -> None:
+        """Spill what is still queued so a restart replays it, and close the log."""
+        if self.spill is None:
+            return
+        with self._lock:
+            while self._depth:
+                priority = max(self._buckets)
+                _, pattern_name, message = self._pop(priority)
+                self._spill(pattern_name, message, priority)
+            self.spill.close()
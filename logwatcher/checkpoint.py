@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from typing import Any, Dict, Optional
+
+
+def partial_hash(data: bytes) -> str:
+    """Hash the held back bytes of an incomplete line."""
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+class CheckpointRegistry:
+    """On-disk registry of per-file read offsets, written in batches."""
+
+    def __init__(self, path: str, interval: float = 5.0, flush_bytes: int = 1_048_576):
+        """
+        Initialize the CheckpointRegistry.
+
+        Args:
+            path: Location of the registry file
+            interval: Seconds after which pending updates are written
+            flush_bytes: Bytes consumed after which pending updates are written
+        """
+        self.path = path
+        self.interval = interval
+        self.flush_bytes = flush_bytes
+        self.logger = logging.getLogger("CheckpointRegistry")
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._pending_bytes = 0
+        self._last_flush = time.monotonic()
+        self.load()
+
+    def load(self) -> None:
+        """Load the registry from disk, starting empty if it is missing or corrupt."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._entries = data.get('files', {})
+        except FileNotFoundError:
+            self._entries = {}
+        except Exception as e:
+            self.logger.error(f"Ignoring unreadable checkpoint registry {self.path}: {e}")
+            self._entries = {}
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Get the stored checkpoint for a file."""
+        return self._entries.get(filename)
+
+    def update(self, filename: str, dev: int, inode: int, offset: int,
+               partial: bytes, consumed: int) -> None:
+        """
+        Record the position of a file; written to disk in batches.
+
+        Args:
+            filename: Watched file
+            dev: Device of the file
+            inode: Inode of the file
+            offset: Offset of the first byte not yet processed as a complete line
+            partial: Bytes read past offset and held back as an incomplete line
+            consumed: Number of bytes read since the previous update
+        """
+        self._entries[filename] = {
+            'dev': dev,
+            'inode': inode,
+            'offset': offset,
+            'partial_len': len(partial),
+            'partial_hash': partial_hash(partial),
+        }
+        self._dirty = True
+        self._pending_bytes += consumed
+        self.maybe_flush()
+
+    def forget(self, filename: str) -> None:
+        """Remove a file from the registry."""
+        if self._entries.pop(filename, None) is not None:
+            self._dirty = True
+
+    def maybe_flush(self) -> None:
+        """Write pending updates if the time or byte threshold was reached."""
+        if not self._dirty:
+            return
+        if (self._pending_bytes >= self.flush_bytes or
+                time.monotonic() - self._last_flush >= self.interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Atomically replace the registry file with the current state."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.checkpoint-', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'files': self._entries}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._dirty = False
+        self._pending_bytes = 0
+        self._last_flush = time.monotonic()
+
+    def resume_offset(self, filename: str) -> Optional[int]:
+        """
+        Work out where to resume reading a file after a restart.
+
+        Args:
+            filename: Watched file
+
+        Returns:
+            Offset to resume at, 0 if the file was replaced or truncated while
+            we were down, or None if there is no usable checkpoint
+        """
+        checkpoint = self._entries.get(filename)
+        if checkpoint is None:
+            return None
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+
+        if (stat.st_dev, stat.st_ino) != (checkpoint['dev'], checkpoint['inode']):
+            self.logger.info(f"{filename} was replaced since the last checkpoint, reading from start")
+            return 0
+
+        offset = checkpoint['offset']
+        end = offset + checkpoint['partial_len']
+        if stat.st_size < end:
+            self.logger.info(f"{filename} was truncated since the last checkpoint, reading from start")
+            return 0
+        if checkpoint['partial_len']:
+            with open(filename, 'rb') as f:
+                f.seek(offset)
+                if partial_hash(f.read(checkpoint['partial_len'])) != checkpoint['partial_hash']:
+                    self.logger.info(f"{filename} was rewritten since the last checkpoint, reading from start")
+                    return 0
+        return offset
@@ -0,0 +1,123 @@
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class Digest:
+    """Summary of the matches of one file and pattern during a window."""
+
+    __slots__ = ('filename', 'pattern_name', 'started', 'count', 'first', 'last', 'duration')
+
+    def __init__(self, filename: str, pattern_name: str, started: float, samples: int):
+        self.filename = filename
+        self.pattern_name = pattern_name
+        self.started = started
+        self.count = 0
+        self.first: List[str] = []
+        self.last = deque(maxlen=samples)
+        self.duration = 0.0
+
+    def add(self, line: str) -> None:
+        """Count a match and keep it if it is among the first or last samples."""
+        self.count += 1
+        if len(self.first) < self.last.maxlen:
+            self.first.append(line)
+        else:
+            self.last.append(line)
+
+    def render(self) -> str:
+        """Format the digest as a notification message."""
+        lines = [
+            "=== LogWatcher Digest ===",
+            f"{self.count} matches of `{self.pattern_name}` in {self.filename} "
+            f"over {self.duration:.0f}s, first/last {self.last.maxlen} shown",
+            "First:",
+        ]
+        lines.extend(f"  {line}" for line in self.first)
+        if self.last:
+            lines.append("Last:")
+            lines.extend(f"  {line}" for line in self.last)
+        lines.append("=======================")
+        return '\n'.join(lines)
+
+
+class AlertCoalescer:
+    """Collects rate-limited matches per file and pattern into digests."""
+
+    def __init__(self, window: float, samples: int = 3,
+                 windows: Optional[Dict[str, float]] = None):
+        """
+        Initialize the AlertCoalescer.
+
+        Args:
+            window: Length of a coalescing window in seconds
+            samples: Number of first and last matching lines kept per digest
+            windows: Window lengths of patterns that do not use the default one
+        """
+        self.window = window
+        self.windows = windows or {}
+        self.samples = samples
+        self._digests: Dict[str, Digest] = {}
+        # Earliest time any open window closes, so due() is cheap when called often
+        self._next_close = float('inf')
+
+    def add(self, filename: str, pattern_name: str, line: str,
+            now: Optional[float] = None) -> None:
+        """
+        Record a match whose notification was suppressed.
+
+        Args:
+            filename: File the match was found in
+            pattern_name: Name of the matched pattern
+            line: Matching line
+            now: Current monotonic time, for testing
+        """
+        key = f"{filename}:{pattern_name}"
+        digest = self._digests.get(key)
+        if digest is None:
+            started = time.monotonic() if now is None else now
+            digest = self._digests[key] = Digest(filename, pattern_name, started, self.samples)
+            self._next_close = min(self._next_close, self._closes(digest))
+        digest.add(line)
+
+    def set_windows(self, window: float, windows: Optional[Dict[str, float]] = None) -> None:
+        """
+        Change the window lengths, e.g. after a configuration reload.
+
+        Open digests close when their new window has passed.
+
+        Args:
+            window: Length of a coalescing window in seconds
+            windows: Window lengths of patterns that do not use the default one
+        """
+        self.window = window
+        self.windows = windows or {}
+        self._next_close = min(map(self._closes, self._digests.values()), default=float('inf'))
+
+    def _closes(self, digest: Digest) -> float:
+        return digest.started + self.windows.get(digest.pattern_name, self.window)
+
+    def due(self, now: Optional[float] = None) -> List[Digest]:
+        """
+        Remove and return the digests whose window has closed.
+
+        Args:
+            now: Current monotonic time, for testing
+
+        Returns:
+            Closed digests
+        """
+        now = time.monotonic() if now is None else now
+        if now < self._next_close:
+            return []
+        closed = [key for key, digest in self._digests.items() if self._closes(digest) <= now]
+        digests = []
+        for key in closed:
+            digest = self._digests.pop(key)
+            digest.duration = now - digest.started
+            digests.append(digest)
+        self._next_close = min(map(self._closes, self._digests.values()), default=float('inf'))
+        return digests
+
+    def __len__(self) -> int:
+        return len(self._digests)
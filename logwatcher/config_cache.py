@@ -0,0 +1,206 @@
+import os
+import re
+import sys
+import stat
+import json
+import hashlib
+import logging
+import tempfile
+from typing import Any, Dict, Optional
+
+from . import __version__
+from .config_validator import CONFIG_SCHEMA
+from .matcher import _combinable_cache, combinable_source
+from .prefilter import _literals_cache, required_literals
+
+# Bumped whenever the layout of an entry changes
+CACHE_VERSION = 1
+
+_schema_digest: Optional[bytes] = None
+
+
+def _default_directory() -> Optional[str]:
+    """Per-user cache directory, e.g. ~/.cache/logwatcher/config."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA')
+    if not base:
+        home = os.path.expanduser('~')
+        if home == '~':
+            return None
+        base = os.path.join(home, '.cache')
+    return os.path.join(base, 'logwatcher', 'config')
+
+
+def _private(st: os.stat_result) -> bool:
+    """Whether a file or directory is ours and cannot be written by others."""
+    if not hasattr(os, 'getuid'):
+        return True
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _digest_schema() -> bytes:
+    global _schema_digest
+    if _schema_digest is None:
+        _schema_digest = hashlib.sha256(
+            json.dumps(CONFIG_SCHEMA, sort_keys=True).encode('utf-8')
+        ).digest()
+    return _schema_digest
+
+
+class ConfigCache:
+    """
+    On-disk cache of startup work, keyed by a hash of the config content.
+
+    An entry records that the content passed schema validation, together
+    with the analysis matchers and the prefilter need for each pattern, so
+    a start with an unchanged config skips jsonschema and regex parsing.
+    The key also covers the schema, the LogWatcher version and the Python
+    version, whose regex parser the analysis depends on.
+
+    As an entry lets validation be skipped, the directory and every entry
+    must belong to the current user and not be writable by anyone else;
+    the default directory is per user and created with mode 0700.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 32):
+        """
+        Initialize the ConfigCache.
+
+        Args:
+            directory: Directory holding one file per cached config
+            max_entries: Entries kept, the least recently written are removed
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.logger = logging.getLogger("ConfigCache")
+
+    @classmethod
+    def for_config(cls, config: Any, create: bool = True) -> Optional['ConfigCache']:
+        """
+        Get the cache a config asks for in its settings.
+
+        Args:
+            config: Configuration, not validated yet
+            create: Create the cache directory if it does not exist
+
+        Returns:
+            ConfigCache, or None if disabled or the directory is not safe to use
+        """
+        settings = config.get('settings') if isinstance(config, dict) else None
+        if not isinstance(settings, dict) or settings.get('config_cache', True) is False:
+            return None
+        directory = settings.get('config_cache_dir') or _default_directory()
+        if not isinstance(directory, str):
+            return None
+        try:
+            if create:
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+            st = os.lstat(directory)
+        except OSError:
+            return None
+        if not stat.S_ISDIR(st.st_mode) or not _private(st):
+            logging.getLogger("ConfigCache").warning(
+                f"Not using config cache {directory}: not a private directory of this user"
+            )
+            return None
+        return cls(directory)
+
+    def key(self, config: Dict[str, Any]) -> str:
+        """Hash of the config content and of everything the entry depends on."""
+        digest = hashlib.sha256()
+        digest.update(f'{CACHE_VERSION}:{__version__}:{sys.version}:'.encode('utf-8'))
+        digest.update(_digest_schema())
+        digest.update(json.dumps(config, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def restore(self, key: str) -> bool:
+        """
+        Load the pattern analysis of a cached config.
+
+        Args:
+            key: Result of key()
+
+        Returns:
+            True if the config was validated before
+        """
+        try:
+            fd = os.open(self._path(key), os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+            with open(fd, 'r', encoding='utf-8') as f:
+                if not _private(os.fstat(fd)):
+                    self.logger.warning(f"Ignoring config cache entry {self._path(key)}: not private to this user")
+                    return False
+                entry = json.load(f)
+            if entry.get('version') != CACHE_VERSION:
+                return False
+            for pattern, flags, combinable, literals in entry['patterns']:
+                _combinable_cache[(pattern, flags)] = (
+                    tuple(combinable) if combinable is not None else None
+                )
+                _literals_cache[(pattern, flags)] = (
+                    frozenset((text, folded) for text, folded in literals)
+                    if literals is not None else None
+                )
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable config cache entry {self._path(key)}: {e}")
+            return False
+        return True
+
+    def save(self, key: str, config: Dict[str, Any]) -> None:
+        """
+        Analyze the patterns of a validated config and store the entry.
+
+        The analysis is kept in memory as well, so the matchers built next
+        do not repeat it.
+
+        Args:
+            key: Result of key()
+            config: Configuration that passed validation
+        """
+        patterns = []
+        for source in config.get('patterns', {}).values():
+            try:
+                compiled = re.compile(source)
+            except re.error:
+                # Reported when the patterns are compiled for use
+                continue
+            combinable = combinable_source(compiled)
+            literals = required_literals(compiled)
+            patterns.append([
+                compiled.pattern, compiled.flags,
+                list(combinable) if combinable is not None else None,
+                sorted(literals) if literals is not None else None
+            ])
+
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix='.entry-', dir=self.directory)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'patterns': patterns}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            # Startup goes on, it is just not faster next time
+            self.logger.warning(f"Could not write config cache entry: {e}")
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return
+        self._prune()
+
+    def _prune(self) -> None:
+        """Remove the oldest entries, e.g. of configs edited since."""
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.name.endswith('.json')]
+            if len(entries) <= self.max_entries:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:len(entries) - self.max_entries]:
+                os.unlink(entry.path)
+        except OSError as e:
+            self.logger.debug(f"Could not prune the config cache: {e}")
@@ -1,5 +1,4 @@
 from typing import Dict, Any
-import jsonschema
 
 CONFIG_SCHEMA = {
     "type": "object",
@@ -25,7 +24,39 @@ CONFIG_SCHEMA = {
                 "notification_rate_limit": {"type": "integer", "minimum": 0},
                 "max_file_size": {"type": "integer", "minimum": 0},
                 "buffer_size": {"type": "integer", "minimum": 1},
-                "max_retries": {"type": "integer", "minimum": 1}
+                "context_max_bytes": {"type": "integer", "minimum": 0},
+                "max_retries": {"type": "integer", "minimum": 1},
+                "max_open_files": {"type": "integer", "minimum": 0},
+                "checkpoint_file": {"type": "string"},
+                "checkpoint_interval": {"type": "number", "minimum": 0},
+                "checkpoint_bytes": {"type": "integer", "minimum": 0},
+                "parallel_workers": {"type": "integer", "minimum": 0},
+                "parallel_batch_size": {"type": "integer", "minimum": 1},
+                "async_notifications": {"type": "boolean"},
+                "retry_backoff": {"type": "number", "minimum": 0},
+                "retry_backoff_max": {"type": "number", "minimum": 0},
+                "digest_samples": {"type": "integer", "minimum": 0},
+                "suppress_repeats": {"type": "boolean"},
+                "repeat_summary_interval": {"type": "number", "minimum": 0},
+                "repeat_max_fingerprints": {"type": "integer", "minimum": 1},
+                "metrics_port": {"type": "integer", "minimum": 0, "maximum": 65535},
+                "metrics_host": {"type": "string"},
+                "housekeeping_interval": {"type": "number", "exclusiveMinimum": 0},
+                "health_probe_timeout": {"type": "number", "exclusiveMinimum": 0},
+                "health_cache_ttl": {"type": "number", "minimum": 0},
+                "profile_patterns": {"type": "boolean"},
+                "profile_sample_rate": {"type": "integer", "minimum": 1},
+                "profile_slow_threshold": {"type": "number", "minimum": 0},
+                "profile_report_interval": {"type": "number", "minimum": 0},
+                "pattern_priorities": {
+                    "type": "object",
+                    "additionalProperties": {"type": "integer"}
+                },
+                "notification_spill_dir": {"type": "string"},
+                "spill_segment_bytes": {"type": "integer", "minimum": 1},
+                "spill_max_bytes": {"type": "integer", "minimum": 1},
+                "config_cache": {"type": "boolean"},
+                "config_cache_dir": {"type": "string"}
             }
         },
         "notifications": {
@@ -37,12 +68,18 @@ CONFIG_SCHEMA = {
                         "enabled": {"type": "boolean"},
                         "smtp_server": {"type": "string"},
                         "smtp_port": {"type": "integer"},
+                        "starttls": {"type": "boolean"},
                         "username": {"type": "string"},
                         "password": {"type": "string"},
                         "to_address": {
                             "type": "array",
                             "items": {"type": "string"}
-                        }
+                        },
+                        "concurrency": {"type": "integer", "minimum": 1},
+                        "queue_size": {"type": "integer", "minimum": 1},
+                        "overflow_policy": {"$ref": "#/definitions/overflow_policy"},
+                        "batch_window": {"type": "number", "minimum": 0},
+                        "max_batch": {"type": "integer", "minimum": 1}
                     },
                     "required": ["enabled"]
                 },
@@ -50,7 +87,11 @@ CONFIG_SCHEMA = {
                     "type": "object",
                     "properties": {
                         "enabled": {"type": "boolean"},
-                        "webhook_url": {"type": "string"}
+                        "webhook_url": {"type": "string"},
+                        "concurrency": {"type": "integer", "minimum": 1},
+                        "queue_size": {"type": "integer", "minimum": 1},
+                        "overflow_policy": {"$ref": "#/definitions/overflow_policy"},
+                        "timeout": {"type": "number", "minimum": 0}
                     },
                     "required": ["enabled"]
                 },
@@ -58,7 +99,11 @@ CONFIG_SCHEMA = {
                     "type": "object",
                     "properties": {
                         "enabled": {"type": "boolean"},
-                        "webhook_url": {"type": "string"}
+                        "webhook_url": {"type": "string"},
+                        "concurrency": {"type": "integer", "minimum": 1},
+                        "queue_size": {"type": "integer", "minimum": 1},
+                        "overflow_policy": {"$ref": "#/definitions/overflow_policy"},
+                        "timeout": {"type": "number", "minimum": 0}
                     },
                     "required": ["enabled"]
                 },
@@ -67,7 +112,11 @@ CONFIG_SCHEMA = {
                     "properties": {
                         "enabled": {"type": "boolean"},
                         "bot_token": {"type": "string"},
-                        "chat_id": {"type": "string"}
+                        "chat_id": {"type": "string"},
+                        "concurrency": {"type": "integer", "minimum": 1},
+                        "queue_size": {"type": "integer", "minimum": 1},
+                        "overflow_policy": {"$ref": "#/definitions/overflow_policy"},
+                        "timeout": {"type": "number", "minimum": 0}
                     },
                     "required": ["enabled"]
                 },
@@ -79,7 +128,13 @@ CONFIG_SCHEMA = {
                         "port": {"type": "integer"},
                         "facility": {"type": "string"},
                         "protocol": {"type": "string"},
-                        "tag": {"type": "string"}
+                        "tag": {"type": "string"},
+                        "mode": {"enum": ["handler", "forwarder"]},
+                        "queue_size": {"type": "integer", "minimum": 1},
+                        "batch_size": {"type": "integer", "minimum": 1},
+                        "reconnect_backoff_max": {"type": "number", "minimum": 0},
+                        "max_message_size": {"type": "integer", "minimum": 64},
+                        "max_retries": {"type": "integer", "minimum": 0}
                     },
                     "required": ["enabled"]
                 }
@@ -91,21 +146,102 @@ CONFIG_SCHEMA = {
                 "type": "array",
                 "items": {"type": "string"}
             }
+        },
+        "rate_limits": {
+            "type": "object",
+            "properties": {
+                "max_keys": {"type": "integer", "minimum": 1},
+                "default": {"$ref": "#/definitions/rate_limit"},
+                "patterns": {
+                    "type": "object",
+                    "additionalProperties": {"$ref": "#/definitions/rate_limit"}
+                },
+                "channels": {
+                    "type": "object",
+                    "additionalProperties": {"$ref": "#/definitions/rate_limit"}
+                }
+            }
+        },
+        "field_rules": {
+            "type": "object",
+            "additionalProperties": {
+                "type": "object",
+                "minProperties": 1,
+                "additionalProperties": {"$ref": "#/definitions/field_condition"}
+            }
+        }
+    },
+    "definitions": {
+        "overflow_policy": {"enum": ["drop_oldest", "drop_lowest_priority", "spill"]},
+        "field_condition": {
+            "type": "object",
+            "minProperties": 1,
+            "additionalProperties": False,
+            "properties": {
+                "==": {},
+                "!=": {},
+                "<": {"type": ["number", "string"]},
+                "<=": {"type": ["number", "string"]},
+                ">": {"type": ["number", "string"]},
+                ">=": {"type": ["number", "string"]},
+                "in": {"type": "array", "items": {"type": ["string", "number", "boolean", "null"]}},
+                "not_in": {"type": "array", "items": {"type": ["string", "number", "boolean", "null"]}},
+                "regex": {"type": "string"},
+                "exists": {"type": "boolean"}
+            }
+        },
+        "rate_limit": {
+            "type": "object",
+            "properties": {
+                "burst": {"type": "integer", "minimum": 1},
+                "refill_interval": {"type": "number", "minimum": 0}
+            }
         }
     }
 }
 
-def validate_config(config: Dict[str, Any]) -> None:
+_validator = None
+
+def validate_config(config: Dict[str, Any], update_cache: bool = True) -> None:
     """
     Validate the configuration against the schema.
+
+    Configs that passed before are recognized by a content hash in the
+    config cache, and neither jsonschema nor the patterns are analyzed again.
     
     Args:
         config: Configuration dictionary to validate
+        update_cache: Record a config that passes in the cache; checks that
+            only validate and do not start the watcher pass False
         
     Raises:
         jsonschema.exceptions.ValidationError: If configuration is invalid
     """
-    jsonschema.validate(instance=config, schema=CONFIG_SCHEMA)
+    from .config_cache import ConfigCache
+
+    cache = ConfigCache.for_config(config, create=update_cache)
+    if cache is not None:
+        key = cache.key(config)
+        if cache.restore(key):
+            return
+    _validate_schema(config)
+    if cache is not None and update_cache:
+        cache.save(key, config)
+
+
+def _validate_schema(config: Dict[str, Any]) -> None:
+    # Imported here as it takes longer than the rest of startup
+    import jsonschema
+
+    global _validator
+    if _validator is None:
+        # Checking the schema itself is most of the cost of jsonschema.validate()
+        cls = jsonschema.validators.validator_for(CONFIG_SCHEMA)
+        cls.check_schema(CONFIG_SCHEMA)
+        _validator = cls(CONFIG_SCHEMA)
+    error = jsonschema.exceptions.best_match(_validator.iter_errors(config))
+    if error is not None:
+        raise error
 
 # Default configuration template
 DEFAULT_CONFIG = {
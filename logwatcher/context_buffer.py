@@ -0,0 +1,172 @@
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
+# Approximate per-line cost on top of the line length: the str header
+# and the slot reference
+_LINE_OVERHEAD = 56
+
+
+class ContextSnapshot:
+    """
+    Immutable view of a file's context at the time of a match.
+
+    Shares the ring's slot list; the ring copies the list before its next
+    write instead of every snapshot copying the lines.
+    """
+
+    __slots__ = ('_slots', '_start', '_count')
+
+    def __init__(self, slots: List[Optional[str]], start: int, count: int):
+        self._slots = slots
+        self._start = start
+        self._count = count
+
+    def __iter__(self) -> Iterator[str]:
+        slots = self._slots
+        capacity = len(slots)
+        for i in range(self._start, self._start + self._count):
+            yield slots[i % capacity]
+
+    def __len__(self) -> int:
+        return self._count
+
+
+_EMPTY = ContextSnapshot([], 0, 0)
+
+
+class _Ring:
+    """Fixed number of preallocated line slots for one file."""
+
+    __slots__ = ('slots', 'start', 'count', 'size', 'shared')
+
+    def __init__(self, capacity: int):
+        self.slots: List[Optional[str]] = [None] * capacity
+        self.start = 0
+        self.count = 0
+        self.size = 0
+        # True while a snapshot references self.slots
+        self.shared = False
+
+    def append(self, line: str) -> int:
+        """Store a line, overwriting the oldest one if full. Returns the size change."""
+        if self.shared:
+            self.slots = self.slots[:]
+            self.shared = False
+        slots = self.slots
+        capacity = len(slots)
+        delta = len(line) + _LINE_OVERHEAD
+        if self.count < capacity:
+            slots[(self.start + self.count) % capacity] = line
+            self.count += 1
+        else:
+            delta -= len(slots[self.start]) + _LINE_OVERHEAD
+            slots[self.start] = line
+            self.start = (self.start + 1) % capacity
+        self.size += delta
+        return delta
+
+    def drop_oldest(self) -> int:
+        """Drop the oldest line. Returns the number of bytes freed."""
+        if self.shared:
+            self.slots = self.slots[:]
+            self.shared = False
+        freed = len(self.slots[self.start]) + _LINE_OVERHEAD
+        self.slots[self.start] = None
+        self.start = (self.start + 1) % len(self.slots)
+        self.count -= 1
+        self.size -= freed
+        return freed
+
+    def snapshot(self) -> ContextSnapshot:
+        self.shared = True
+        return ContextSnapshot(self.slots, self.start, self.count)
+
+
+class ContextBuffer:
+    """
+    Recent lines of each watched file, kept as context for matches.
+
+    Each file keeps up to ``lines_per_file`` lines in a ring of fixed slots.
+    When the lines of all files exceed ``max_bytes``, the oldest lines of
+    the files that have been idle longest are dropped first.
+    """
+
+    def __init__(self, lines_per_file: int = 20, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize the ContextBuffer.
+
+        Args:
+            lines_per_file: Number of context lines kept per file
+            max_bytes: Approximate memory budget for all context lines
+        """
+        self.lines_per_file = lines_per_file
+        self.max_bytes = max_bytes
+        self.size = 0
+        # Least recently written file first
+        self._rings: 'OrderedDict[str, _Ring]' = OrderedDict()
+        self._last_file: Optional[str] = None
+        self._last_ring: Optional[_Ring] = None
+
+    def add_line(self, filename: str, line: str) -> None:
+        """
+        Append a line to the context of a file.
+
+        Args:
+            filename: File the line was read from
+            line: Decoded line
+        """
+        # Lines arrive in runs per file; only reorder on a change of file
+        if filename == self._last_file:
+            ring = self._last_ring
+        else:
+            ring = self._rings.get(filename)
+            if ring is None:
+                ring = self._rings[filename] = _Ring(self.lines_per_file)
+            else:
+                self._rings.move_to_end(filename)
+            self._last_file = filename
+            self._last_ring = ring
+
+        self.size += ring.append(line)
+        if self.size > self.max_bytes:
+            self._evict(ring)
+
+    def _evict(self, current: _Ring) -> None:
+        """Drop lines from the idlest files until within the budget."""
+        rings = self._rings
+        while self.size > self.max_bytes:
+            filename, ring = next(iter(rings.items()))
+            if ring is current:
+                # Every other file is empty; keep the newest line of this one
+                while self.size > self.max_bytes and ring.count > 1:
+                    self.size -= ring.drop_oldest()
+                return
+            self.size -= ring.drop_oldest()
+            if not ring.count:
+                del rings[filename]
+
+    def get_context(self, filename: str) -> ContextSnapshot:
+        """
+        Snapshot the current context of a file without copying its lines.
+
+        Args:
+            filename: File to get the context of
+
+        Returns:
+            Lines from oldest to newest
+        """
+        ring = self._rings.get(filename)
+        if ring is None:
+            return _EMPTY
+        return ring.snapshot()
+
+    def forget(self, filename: str) -> None:
+        """Drop the context of a file, e.g. when it is no longer watched."""
+        ring = self._rings.pop(filename, None)
+        if ring is not None:
+            self.size -= ring.size
+            if ring is self._last_ring:
+                self._last_file = self._last_ring = None
+
+    def __len__(self) -> int:
+        return len(self._rings)
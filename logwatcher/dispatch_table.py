@@ -0,0 +1,111 @@
+import os
+import glob
+import fnmatch
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+PatternSet = Tuple[str, ...]
+
+
+def _normalize(path: str) -> str:
+    return os.path.normpath(path)
+
+
+class FileDispatchTable:
+    """
+    Resolves file paths to the patterns that apply to them.
+
+    ``file_patterns`` keys are either exact paths or globs such as
+    ``/var/log/app/*.log``. Wildcards in the file name are matched as files
+    appear; wildcards in the directory part are expanded once, at startup.
+    Every resolved path is cached, so repeated events cost one dict lookup.
+    """
+
+    def __init__(self, file_patterns: Dict[str, List[str]], max_cached: int = 1_000_000):
+        """
+        Initialize the FileDispatchTable.
+
+        Args:
+            file_patterns: Mapping of path or glob to pattern names
+            max_cached: Maximum number of cached non-matching paths
+        """
+        self.max_cached = max_cached
+        self.exact: Dict[str, PatternSet] = {}
+        self.globs: List[str] = []
+        # directory -> [(file name glob, pattern names)]
+        self._dir_globs: Dict[str, List[Tuple[str, PatternSet]]] = {}
+        self._table: Dict[str, PatternSet] = {}
+        # Paths that matched nothing, bounded so churn cannot grow it forever
+        self._misses: 'OrderedDict[str, None]' = OrderedDict()
+
+        for key, names in file_patterns.items():
+            if glob.has_magic(key):
+                self.globs.append(key)
+                directory, name = os.path.split(_normalize(key))
+                directories = glob.glob(directory) if glob.has_magic(directory) else [directory]
+                for concrete in directories:
+                    self._dir_globs.setdefault(_normalize(concrete or '.'), []).append(
+                        (name, tuple(names))
+                    )
+            else:
+                self.exact[key] = self._merge(self.exact.get(key, ()), names)
+        self._table.update(self.exact)
+
+    @staticmethod
+    def _merge(current: PatternSet, names: List[str]) -> PatternSet:
+        return current + tuple(name for name in names if name not in current)
+
+    def directories(self) -> Set[str]:
+        """Directories to watch: those of exact paths and of globs."""
+        directories = set(self._dir_globs)
+        for path in self.exact:
+            directories.add(os.path.dirname(_normalize(path)) or '.')
+        return directories
+
+    def resolve(self, path: str) -> Optional[PatternSet]:
+        """
+        Get the pattern names that apply to a path.
+
+        Args:
+            path: File path as reported by a watch event
+
+        Returns:
+            Pattern names, or None if the path is not watched
+        """
+        names = self._table.get(path)
+        if names is not None or path in self._misses:
+            return names
+
+        directory, filename = os.path.split(_normalize(path))
+        names = ()
+        for name_glob, glob_names in self._dir_globs.get(directory or '.', ()):
+            if fnmatch.fnmatchcase(filename, name_glob):
+                names = self._merge(names, list(glob_names))
+        if names:
+            self._table[path] = names
+            return names
+
+        self._misses[path] = None
+        if len(self._misses) > self.max_cached:
+            self._misses.popitem(last=False)
+        return None
+
+    def forget(self, path: str) -> None:
+        """Drop a cached glob match, e.g. after the file was deleted."""
+        if path not in self.exact:
+            self._table.pop(path, None)
+
+    def existing_files(self) -> Dict[str, PatternSet]:
+        """Files currently matching a glob, with their pattern names."""
+        found: Dict[str, PatternSet] = {}
+        for directory, entries in self._dir_globs.items():
+            try:
+                names_in_dir = os.listdir(directory)
+            except OSError:
+                continue
+            for filename in names_in_dir:
+                path = filename if directory == '.' else os.path.join(directory, filename)
+                if any(fnmatch.fnmatchcase(filename, name_glob) for name_glob, _ in entries):
+                    if os.path.isfile(path):
+                        found[path] = self.resolve(path)
+        return found
@@ -0,0 +1,245 @@
+import os
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .channel_queue import ChannelQueue, Item, SpillLog, default_spill_directory
+
+
+class AsyncNotificationDispatcher:
+    """
+    Sends notifications concurrently from an asyncio event loop thread.
+
+    Every enabled channel has a bounded ChannelQueue drained by as many
+    workers as its concurrency, so an unreachable channel fills only its
+    own queue, whose overflow policy then applies.
+    """
+
+    def __init__(self, notification_manager, config: Dict[str, Any]):
+        """
+        Initialize the AsyncNotificationDispatcher.
+
+        Args:
+            notification_manager: NotificationManager performing the sends
+            config: Full LogWatcher configuration
+        """
+        self.notification_manager = notification_manager
+        self.config = config
+        self.logger = logging.getLogger("AsyncNotificationDispatcher")
+        settings = config.get('settings', {})
+        self.max_retries = settings.get('max_retries', 3)
+        self.backoff_base = settings.get('retry_backoff', 1.0)
+        self.backoff_max = settings.get('retry_backoff_max', 60.0)
+
+        self.concurrency = {
+            channel: channel_config.get('concurrency', 4)
+            for channel, channel_config in config.get('notifications', {}).items()
+            if channel in notification_manager.notifiers
+        }
+        # Blocking sends run in a shared thread pool sized so that every
+        # channel can use its full concurrency at once; a slow webhook
+        # can only tie up its own share of the threads
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, sum(self.concurrency.values())),
+            thread_name_prefix='notify'
+        )
+        notification_manager.pool_size = max(self.concurrency.values(), default=1)
+
+        self.priorities: Dict[str, int] = settings.get('pattern_priorities', {})
+        spill_dir = settings.get('notification_spill_dir') or default_spill_directory()
+        self.queues: Dict[str, ChannelQueue] = {}
+        for channel in self.concurrency:
+            channel_config = config['notifications'][channel]
+            if not channel_config.get('enabled', False):
+                continue
+            policy = channel_config.get('overflow_policy', 'drop_oldest')
+            spill = None
+            if policy == 'spill':
+                try:
+                    if spill_dir is None:
+                        raise ValueError("no home directory, set notification_spill_dir")
+                    spill = SpillLog(
+                        os.path.join(spill_dir, channel),
+                        segment_bytes=settings.get('spill_segment_bytes', 4 * 1024 * 1024),
+                        max_bytes=settings.get('spill_max_bytes', 256 * 1024 * 1024)
+                    )
+                except (OSError, ValueError) as e:
+                    self.logger.error(f"Not spilling {channel} notifications, dropping the oldest instead: {e}")
+                    policy = 'drop_oldest'
+            self.queues[channel] = ChannelQueue(
+                channel, channel_config.get('queue_size', 1000), policy, spill,
+                probe_interval=self.backoff_max
+            )
+
+        self._loop = asyncio.new_event_loop()
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._workers: List[asyncio.Task] = []
+        self._in_flight = 0
+        self._thread: Optional[threading.Thread] = None
+
+        # A batched email only succeeds or fails once its batch is sent, so
+        # its outcome comes from _email_result rather than from deliver()
+        self._batched = set()
+        batcher = getattr(notification_manager, 'email_batcher', None)
+        if batcher is not None and 'email' in self.queues:
+            batcher.on_result = self._email_result
+            self._batched.add('email')
+
+    def start(self) -> None:
+        """Start the event loop thread and the channel workers."""
+        self._thread = threading.Thread(
+            target=self._run_loop, name='notification-dispatcher', daemon=True
+        )
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_workers(), self._loop).result()
+
+    async def _start_workers(self) -> None:
+        for method, queue in self.queues.items():
+            wakeup = self._wakeups[method] = asyncio.Event()
+            queue.on_put = lambda wakeup=wakeup: self._loop.call_soon_threadsafe(wakeup.set)
+            for _ in range(self.concurrency[method]):
+                self._workers.append(self._loop.create_task(self._consume(method)))
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, pattern_name: str, message: str) -> None:
+        """
+        Queue notifications for a pattern match without blocking.
+
+        Args:
+            pattern_name: Name of the matched pattern
+            message: Message to send
+        """
+        rules = self.config.get('notification_rules', {})
+        if pattern_name not in rules:
+            self.logger.debug(f"No notification rules for pattern: {pattern_name}")
+            return
+
+        priority = self.priorities.get(pattern_name, 0)
+        for method in rules[pattern_name]:
+            queue = self.queues.get(method)
+            if queue is not None and self.notification_manager.channel_allowed(method):
+                queue.put(pattern_name, message, priority)
+
+    async def _consume(self, method: str) -> None:
+        """Send the notifications of one channel queue, one at a time."""
+        queue = self.queues[method]
+        wakeup = self._wakeups[method]
+        while True:
+            item = queue.get()
+            if item is None:
+                wakeup.clear()
+                # A put between the first get() and clear() must not be missed
+                item = queue.get()
+                if item is None:
+                    # An unhealthy channel is probed even if no alert arrives
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), queue.probe_delay())
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+            self._in_flight += 1
+            try:
+                await self._send(method, queue, item)
+            except asyncio.CancelledError:
+                # Stopped mid-send: keep it for the next run if the channel spills
+                queue.requeue(item)
+                raise
+            finally:
+                self._in_flight -= 1
+
+    async def _send(self, method: str, queue: ChannelQueue, item: Item) -> None:
+        """Send through one channel, retrying with jittered exponential backoff."""
+        pattern_name, message, _ = item
+        for attempt in range(self.max_retries):
+            try:
+                await self._loop.run_in_executor(
+                    self._executor, self.notification_manager.deliver, method, message, item
+                )
+                if method not in self._batched:
+                    queue.healthy = True
+                self.logger.debug(f"Successfully sent {method} notification for {pattern_name}")
+                return
+            except asyncio.CancelledError:
+                # An Exception before Python 3.8; stopping must not retry
+                raise
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    queue.healthy = False
+                    if queue.requeue(item):
+                        self.logger.warning(
+                            f"Failed to send {method} notification, spilled for replay: {str(e)}"
+                        )
+                    else:
+                        self.logger.error(f"Failed to send {method} notification: {str(e)}")
+                    return
+                # Full jitter keeps retries of many alerts from arriving in waves
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                self.logger.debug(
+                    f"{method} notification failed (attempt {attempt + 1}/{self.max_retries}), "
+                    f"retrying in {delay:.1f}s: {e}"
+                )
+                await asyncio.sleep(delay)
+
+    def _email_result(self, items: List[Item], error: Optional[Exception]) -> None:
+        """Apply the outcome of a batched email to the email queue, like _send does."""
+        queue = self.queues['email']
+        if error is None:
+            queue.healthy = True
+            if queue.spill is not None and queue.spill.records:
+                # Replay what earlier batches spilled without waiting for an alert
+                self._loop.call_soon_threadsafe(self._wakeups['email'].set)
+            return
+        queue.healthy = False
+        spilled = sum(1 for item in items if item is not None and queue.requeue(item))
+        if spilled:
+            self.logger.warning(
+                f"Failed to send email with {len(items)} notifications, "
+                f"{spilled} spilled for replay: {error}"
+            )
+        else:
+            self.logger.error(f"Failed to send email with {len(items)} notifications: {error}")
+
+    @property
+    def pending(self) -> int:
+        """Number of notifications queued in memory or being sent."""
+        return sum(len(queue) for queue in self.queues.values()) + self._in_flight
+
+    def queue_status(self) -> Dict[str, Dict[str, Any]]:
+        """Depth, drops and spill size of every channel queue."""
+        return {method: queue.status() for method, queue in self.queues.items()}
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Wait for queued notifications and stop the event loop.
+
+        Whatever is still queued after the timeout is spilled to disk by
+        channels with the spill policy and dropped by the others.
+
+        Args:
+            timeout: Maximum number of seconds to wait for pending sends
+        """
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+        try:
+            asyncio.run_coroutine_threadsafe(self._stop_workers(), self._loop).result(timeout=5)
+        except Exception as e:
+            self.logger.error(f"Failed to stop notification workers: {e}")
+        for queue in self.queues.values():
+            queue.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=max(0, deadline - time.monotonic()))
+        self._executor.shutdown(wait=False)
+
+    async def _stop_workers(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
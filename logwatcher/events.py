@@ -0,0 +1,97 @@
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Sequence, Union
+
+
+class MatchEvent:
+    """
+    A pattern match, rendered into text only when a sink needs it.
+
+    Rendered text is cached per format, so several notifiers sharing a
+    format render it once, and a match that is only counted never does.
+    """
+
+    __slots__ = ('filename', 'pattern_name', 'offset', 'line', 'context', 'timestamp', '_rendered')
+
+    def __init__(self, filename: str, pattern_name: str, line: str,
+                 context: Sequence[str], offset: Optional[int] = None,
+                 timestamp: Optional[float] = None):
+        """
+        Initialize the MatchEvent.
+
+        Args:
+            filename: File the match was found in
+            pattern_name: Name of the matched pattern
+            line: Matching line
+            context: Snapshot of the recent lines of the file
+            offset: Read position in the file when the line was matched
+            timestamp: Time of the match, defaults to now
+        """
+        self.filename = filename
+        self.pattern_name = pattern_name
+        self.offset = offset
+        self.line = line
+        self.context = context
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self._rendered: Optional[Dict[str, str]] = None
+
+    def render(self, fmt: str = 'text') -> str:
+        """
+        Render the event in a sink format.
+
+        Args:
+            fmt: Name of a format registered in FORMATS
+
+        Returns:
+            Rendered text
+        """
+        if self._rendered is None:
+            self._rendered = {}
+        text = self._rendered.get(fmt)
+        if text is None:
+            text = self._rendered[fmt] = FORMATS[fmt](self)
+        return text
+
+    def __str__(self) -> str:
+        return self.render('text')
+
+
+def _render_text(event: MatchEvent) -> str:
+    """Multi-line message used for logs and notifications."""
+    timestamp = datetime.fromtimestamp(event.timestamp).strftime('%Y-%m-%d %H:%M:%S')
+    return (
+        f"=== LogWatcher Match ===\n"
+        f"Time: {timestamp}\n"
+        f"File: {event.filename}\n"
+        f"Pattern: {event.pattern_name}\n"
+        f"Match: {event.line}\n"
+        f"Recent context:\n{chr(10).join(event.context)}\n"
+        f"======================="
+    )
+
+
+def _render_syslog(event: MatchEvent) -> str:
+    """Single-line message; syslog collectors split records on newlines."""
+    return f"LogWatcher match pattern={event.pattern_name} file={event.filename}: {event.line}"
+
+
+FORMATS: Dict[str, Callable[[MatchEvent], str]] = {
+    'text': _render_text,
+    'syslog': _render_syslog,
+}
+
+
+def render(message: Union[str, MatchEvent], fmt: str = 'text') -> str:
+    """
+    Render a message that may be either plain text or a MatchEvent.
+
+    Args:
+        message: Text or event
+        fmt: Format to render events in
+
+    Returns:
+        Message text
+    """
+    if isinstance(message, str):
+        return message
+    return message.render(fmt)
@@ -0,0 +1,298 @@
+import re
+import json
+import operator
+from typing import Any, Callable, Dict, List, Optional, Pattern, Sequence, Tuple
+
+from .matcher import PatternMatcher
+
+OPERATORS = ('==', '!=', '<', '<=', '>', '>=', 'in', 'not_in', 'regex', 'exists')
+
+_ORDERING = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+# Keys and values made of these characters are never escaped by JSON
+# encoders, so they appear verbatim in the raw line
+_VERBATIM = re.compile(r'[A-Za-z0-9_ .:@-]+')
+
+_SCALARS = (str, int, float, bool, type(None))
+
+_CONSTANTS = {'true': True, 'false': False, 'null': None}
+
+# Value of a top-level key: a string, or everything up to the next delimiter
+_VALUE = r'\s*:\s*("[^"\\]*(?:\\.[^"\\]*)*"|[^\s,}\]]*)'
+
+# Escape sequence in a JSON string, removed before quotes are counted
+_ESCAPE = re.compile(r'\\.')
+
+_MISSING = object()
+
+Test = Callable[[Any], bool]
+
+
+def _number(value: Any) -> Optional[float]:
+    """Value of a JSON number or numeric string, None for anything else."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _scalar(token: str) -> Any:
+    """
+    Decode the raw JSON value of a field.
+
+    Raises:
+        ValueError: If the token is not a complete scalar, e.g. an array
+    """
+    if token[:1] == '"':
+        return token[1:-1] if '\\' not in token else json.loads(token)
+    if token in _CONSTANTS:
+        return _CONSTANTS[token]
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def _test(op: str, operand: Any) -> Test:
+    """Build the check of one operator against a field value."""
+    if op == '==':
+        return lambda value: value == operand
+    if op == '!=':
+        return lambda value: value != operand
+    if op in _ORDERING:
+        compare = _ORDERING[op]
+        if isinstance(operand, str):
+            return lambda value: isinstance(value, str) and compare(value, operand)
+
+        def ordered(value: Any) -> bool:
+            if value.__class__ is int or value.__class__ is float:
+                return compare(value, operand)
+            number = _number(value)
+            return number is not None and compare(number, operand)
+        return ordered
+    if op in ('in', 'not_in'):
+        members = frozenset(operand)
+        if op == 'in':
+            return lambda value: isinstance(value, _SCALARS) and value in members
+        return lambda value: isinstance(value, _SCALARS) and value not in members
+    if op == 'regex':
+        search = re.compile(operand).search
+        return lambda value: isinstance(value, str) and search(value) is not None
+    raise ValueError(f"Unknown field rule operator: {op}")
+
+
+def _is_flat(line: str) -> bool:
+    """
+    Cheap check that a line is one complete JSON object without nesting.
+
+    The line must hold a single "{" and a single "}" ending it, outside of
+    strings: with an odd number of unescaped quotes, a string was cut short
+    and the "}" may be inside it.
+    """
+    if line.count('{') != 1 or line.count('}') != 1 or not line.rstrip().endswith('}'):
+        return False
+    if '\\' in line:
+        line = _ESCAPE.sub('', line)
+    return line.count('"') % 2 == 0
+
+
+class FieldRule:
+    """
+    Conditions on the fields of a JSON log record, all of which must hold.
+
+    Fields are named by dotted paths into nested objects, e.g. "http.status".
+    A condition on a missing field is false, except {"exists": false}.
+    """
+
+    def __init__(self, name: str, conditions: Dict[str, Dict[str, Any]]):
+        """
+        Initialize the FieldRule.
+
+        Args:
+            name: Rule name, reported like a pattern name
+            conditions: Mapping of field path to {operator: operand}
+        """
+        self.name = name
+        # (top-level key, rest of the path, must exist, checks); a false
+        # "must exist" means it must not
+        self.fields: List[Tuple[str, Tuple[str, ...], bool, List[Test]]] = []
+        # The raw line contains one string of every group, or cannot match
+        self.needles: List[Tuple[str, ...]] = []
+
+        for field, ops in conditions.items():
+            path = tuple(field.split('.'))
+            present = ops.get('exists', True)
+            tests = [_test(op, operand) for op, operand in ops.items() if op != 'exists']
+            self.fields.append((path[0], path[1:], present, tests))
+            if not present:
+                continue
+            if _VERBATIM.fullmatch(path[-1]):
+                self.needles.append((f'"{path[-1]}"',))
+            values = [ops['==']] if '==' in ops else ops.get('in')
+            if values and all(isinstance(v, str) and _VERBATIM.fullmatch(v) for v in values):
+                self.needles.append(tuple(f'"{v}"' for v in values))
+
+    def may_match(self, line: str) -> bool:
+        """Cheap check of the raw line, before it is parsed."""
+        for group in self.needles:
+            for needle in group:
+                if needle in line:
+                    break
+            else:
+                return False
+        return True
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        """Check the conditions against a parsed record."""
+        for key, rest, present, tests in self.fields:
+            value = record.get(key, _MISSING)
+            for part in rest:
+                value = value.get(part, _MISSING) if isinstance(value, dict) else _MISSING
+                if value is _MISSING:
+                    break
+            if value is _MISSING:
+                if present:
+                    return False
+                continue
+            if not present:
+                return False
+            for test in tests:
+                if not test(value):
+                    return False
+        return True
+
+
+def compile_rules(field_rules: Dict[str, Dict[str, Dict[str, Any]]],
+                  patterns: Dict[str, Any]) -> Dict[str, FieldRule]:
+    """
+    Compile the field_rules section of the config.
+
+    Args:
+        field_rules: Mapping of rule name to conditions
+        patterns: Configured patterns, whose names rules may not reuse
+
+    Returns:
+        Compiled rules by name
+
+    Raises:
+        ValueError: If a rule is named like a pattern
+        re.error: If a regex operand is invalid
+    """
+    clashes = sorted(set(field_rules) & set(patterns))
+    if clashes:
+        raise ValueError(f"Field rules named like patterns: {', '.join(clashes)}")
+    return {name: FieldRule(name, conditions) for name, conditions in field_rules.items()}
+
+
+class FieldMatcher:
+    """
+    Matches JSON lines against field rules, each line parsed at most once.
+
+    Lines are only parsed when they look like an object and contain the
+    keys, and the string values of == and in, of at least one rule. Of a
+    flat object, only the top-level fields the rules reference are decoded,
+    which is enough to rule a rule out; a line that may match, or is not
+    flat, gets a full JSON parse, so that only valid JSON matches. Regex
+    patterns assigned alongside the rules are matched against the raw line.
+    """
+
+    def __init__(self, rules: Dict[str, FieldRule], patterns: Dict[str, Pattern],
+                 names: Sequence[str]):
+        """
+        Initialize the FieldMatcher.
+
+        Args:
+            rules: Compiled field rules by name
+            patterns: Mapping of pattern name to compiled pattern
+            names: Rule and pattern names assigned to the file, in firing order
+        """
+        self.names = [name for name in names if name in rules or name in patterns]
+        self._rules = [rules[name] for name in self.names if name in rules]
+        pattern_names = [name for name in self.names if name in patterns]
+        self._patterns = PatternMatcher(patterns, pattern_names) if pattern_names else None
+
+        fields = [field for rule in self._rules for field in rule.fields]
+        # Field extraction needs every path to be a top-level key
+        self._extract = None
+        if not any(rest for _, rest, _, _ in fields):
+            self._extract = {
+                key: re.compile(re.escape(json.dumps(key)) + _VALUE).findall
+                for key, _, _, _ in fields
+            }
+
+    def _fields(self, line: str, rule: FieldRule, record: Dict[str, Any]) -> None:
+        """
+        Decode the top-level fields a rule references into record.
+
+        Only valid for a line that passes _is_flat() and has no \\u escape,
+        which could spell a key differently: with no nested object, every
+        "key": in the line is a top-level key, as quotes inside strings are
+        escaped. Missing fields are recorded as missing. The line is not
+        checked to be valid JSON, so a rule that matches the fields may still
+        not match the line.
+
+        Raises:
+            ValueError: If a field is not a scalar or occurs more than once,
+                and needs a full parse
+        """
+        for key, _, _, _ in rule.fields:
+            if key not in record:
+                values = self._extract[key](line)
+                if len(values) > 1:
+                    raise ValueError(f"Duplicate key {key}")
+                record[key] = _scalar(values[0]) if values else _MISSING
+
+    def match(self, line: str) -> List[str]:
+        """
+        Find every rule and pattern that matches the line.
+
+        Args:
+            line: Line to match
+
+        Returns:
+            Names of all matching rules and patterns, in configured order
+        """
+        matched = self._patterns.match(line) if self._patterns is not None else []
+        if line[:1] != '{' and line.lstrip()[:1] != '{':
+            return matched
+        # Escaped characters could hide a needle, or a key from extraction
+        check = '\\u' not in line
+        # Anything else, e.g. a line cut short, is left to json.loads
+        flat = check and self._extract is not None and _is_flat(line)
+        record = {} if flat else None
+        hits = None
+        for rule in self._rules:
+            if check and not rule.may_match(line):
+                continue
+            if flat:
+                try:
+                    self._fields(line, rule, record)
+                except ValueError:
+                    # A field is not a scalar or occurs twice
+                    flat, record = False, None
+                else:
+                    if not rule.matches(record):
+                        continue
+                    # A hit is confirmed by a full parse, as the line may
+                    # still not be valid JSON, e.g. with a trailing comma
+                    flat, record = False, None
+            if record is None:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    return matched
+                if not isinstance(record, dict):
+                    return matched
+            if rule.matches(record):
+                if hits is None:
+                    hits = set(matched)
+                hits.add(rule.name)
+        if hits is None:
+            return matched
+        return [name for name in self.names if name in hits]
@@ -0,0 +1,94 @@
+import os
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+
+class PooledFile:
+    """An open read-only descriptor and the identity of the file behind it."""
+
+    __slots__ = ('fd', 'dev', 'inode')
+
+    def __init__(self, fd: int):
+        stat = os.fstat(fd)
+        self.fd = fd
+        self.dev = stat.st_dev
+        self.inode = stat.st_ino
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """Check whether a path stat still refers to the open file."""
+        return stat.st_ino == self.inode and stat.st_dev == self.dev
+
+
+class FilePool:
+    """LRU pool of open descriptors, keyed by path."""
+
+    def __init__(self, max_open: int = 256):
+        """
+        Initialize the FilePool.
+
+        Args:
+            max_open: Maximum number of descriptors kept open between events;
+                0 closes every descriptor once it has been read
+        """
+        self.max_open = max_open
+        self.logger = logging.getLogger("FilePool")
+        self._files: 'OrderedDict[str, PooledFile]' = OrderedDict()
+
+    def get(self, path: str) -> Optional[PooledFile]:
+        """
+        Get the pooled descriptor for a path, marking it recently used.
+
+        Args:
+            path: Path of the watched file
+
+        Returns:
+            PooledFile, or None if the path has no open descriptor
+        """
+        pooled = self._files.get(path)
+        if pooled is not None:
+            self._files.move_to_end(path)
+        return pooled
+
+    def open(self, path: str) -> PooledFile:
+        """
+        Open a descriptor for a path and add it to the pool.
+
+        Args:
+            path: Path of the watched file
+
+        Returns:
+            PooledFile for the newly opened descriptor
+        """
+        self.close(path)
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            pooled = PooledFile(fd)
+        except Exception:
+            os.close(fd)
+            raise
+        self._files[path] = pooled
+        return pooled
+
+    def close(self, path: str) -> None:
+        """Close and forget the descriptor for a path, if any."""
+        pooled = self._files.pop(path, None)
+        if pooled is not None:
+            try:
+                os.close(pooled.fd)
+            except OSError as e:
+                self.logger.error(f"Error closing descriptor for {path}: {e}")
+
+    def trim(self) -> None:
+        """Close least recently used descriptors beyond the pool limit."""
+        while len(self._files) > self.max_open:
+            path = next(iter(self._files))
+            self.close(path)
+
+    def close_all(self) -> None:
+        """Close every pooled descriptor."""
+        for path in list(self._files):
+            self.close(path)
+
+    def __len__(self) -> int:
+        return len(self._files)
@@ -0,0 +1,248 @@
+import re
+import sys
+import time
+import hashlib
+from array import array
+from collections import OrderedDict, deque
+from typing import List, Optional
+
+# Tokens that differ between repeats of the same message
+_VARIABLE = re.compile(
+    # Skips positions that cannot start a token without trying each branch
+    r'(?=[0-9a-fA-F])(?:'
+    r'\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d(?:[.,]\d+)?(?:Z|[+-]\d\d:?\d\d)?'  # ISO 8601
+    r'|\b\d{1,2}:\d\d:\d\d(?:[.,]\d+)?'                                    # times of day
+    r'|\b[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}\b'           # UUIDs
+    r'|\b0[xX][0-9a-fA-F]+\b'                                              # addresses
+    r'|\b(?=[a-fA-F]*\d)[0-9a-fA-F]{8,}\b'                                 # hashes, trace IDs
+    r'|\d+\.\d+(?:\.\d+)*|\d{4,}'                                          # IPs, decimals, IDs
+    r')'
+)
+
+
+def normalize(line: str) -> str:
+    """
+    Replace the variable tokens of a line, so its repeats compare equal.
+
+    Numbers of up to three digits are kept, as they tend to be status and
+    exit codes rather than IDs.
+    """
+    return _VARIABLE.sub('#', line)
+
+
+def fingerprint(filename: str, pattern_name: str, line: str) -> int:
+    """64-bit hash of a match with its variable tokens normalized."""
+    key = f'{filename}\0{pattern_name}\0{normalize(line)}'.encode('utf-8', 'replace')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+class CountMinSketch:
+    """
+    Fixed-size approximate counts of 64-bit hashes.
+
+    Estimates never undercount; they overcount when hashes share counters,
+    which conservative updates and a width well above the number of
+    distinct hashes per aging period keep rare. Counts are halved every
+    `sample` additions, so old hashes fade out instead of filling the table.
+    """
+
+    def __init__(self, width: int, depth: int = 4, sample: Optional[int] = None):
+        """
+        Initialize the CountMinSketch.
+
+        Args:
+            width: Counters per row, rounded up to a power of two
+            depth: Number of rows, each indexed by a different hash
+            sample: Additions between agings, a quarter of the width by default
+        """
+        self.width = 1 << max(0, width - 1).bit_length()
+        self.depth = depth
+        self.sample = sample or max(1, self.width // 4)
+        self._mask = self.width - 1
+        self._counts = array('I', bytes(4 * self.width * depth))
+        self._additions = 0
+        # Clears the bit each counter receives from its neighbour when the
+        # whole table is shifted as one integer
+        self._halve_mask = int.from_bytes(
+            array('I', [0x7fffffff]).tobytes() * len(self._counts), sys.byteorder
+        )
+
+    def _slots(self, value: int) -> List[int]:
+        # Double hashing: row i uses h1 + i * h2
+        h1 = value & 0xffffffff
+        h2 = (value >> 32) | 1
+        return [row * self.width + ((h1 + row * h2) & self._mask) for row in range(self.depth)]
+
+    def add(self, value: int) -> int:
+        """
+        Count a hash.
+
+        Args:
+            value: 64-bit hash
+
+        Returns:
+            Estimated count of the hash, including this addition
+        """
+        counts = self._counts
+        slots = self._slots(value)
+        estimate = min(counts[slot] for slot in slots) + 1
+        # Conservative update: only counters below the new estimate grow
+        for slot in slots:
+            if counts[slot] < estimate:
+                counts[slot] = estimate
+        self._additions += 1
+        if self._additions >= self.sample:
+            self._age()
+        return estimate
+
+    def estimate(self, value: int) -> int:
+        """Estimated count of a hash."""
+        return min(self._counts[slot] for slot in self._slots(value))
+
+    def _age(self) -> None:
+        counts = self._counts
+        halved = (int.from_bytes(counts.tobytes(), sys.byteorder) >> 1) & self._halve_mask
+        self._counts = array('I', halved.to_bytes(4 * len(counts), sys.byteorder))
+        self._additions = 0
+
+
+class Repeat:
+    """A fingerprint that was alerted, and its repeats since."""
+
+    __slots__ = ('filename', 'pattern_name', 'first', 'last', 'count', 'started', 'duration')
+
+    def __init__(self, filename: str, pattern_name: str, line: str):
+        self.filename = filename
+        self.pattern_name = pattern_name
+        self.first = line
+        self.last = line
+        # Repeats not summarized yet, and when the first of them was seen
+        self.count = 0
+        self.started = 0.0
+        self.duration = 0.0
+
+    def render(self) -> str:
+        """Format the pending repeats as a notification message."""
+        lines = [
+            "=== LogWatcher Repeats ===",
+            f"`{self.pattern_name}` in {self.filename} seen {self.count} more "
+            f"time{'s' if self.count != 1 else ''} over {self.duration:.0f}s",
+            f"First: {self.first}",
+            f"Last:  {self.last}",
+            "==========================",
+        ]
+        return '\n'.join(lines)
+
+
+class RepeatSuppressor:
+    """
+    Lets the first match of each fingerprint through and counts its repeats.
+
+    Fingerprints alerted recently are tracked exactly in an LRU of bounded
+    size. A count-min sketch remembers frequent fingerprints beyond it, so
+    a crash loop pushed out of the LRU by a burst of distinct messages is
+    still recognized as a repeat. Repeats are summarized once per interval,
+    starting with the first repeat. Memory is bounded by max_tracked and
+    does not grow with the number of distinct messages.
+    """
+
+    def __init__(self, interval: float, max_tracked: int = 10_000):
+        """
+        Initialize the RepeatSuppressor.
+
+        Args:
+            interval: Seconds from the first suppressed repeat to its summary
+            max_tracked: Fingerprints tracked exactly
+        """
+        self.interval = interval
+        self.max_tracked = max_tracked
+        self.sketch = CountMinSketch(4 * max_tracked)
+        self._tracked: 'OrderedDict[int, Repeat]' = OrderedDict()
+        # (due time, fingerprint) in due order, as the interval is fixed
+        self._schedule = deque()
+        # Summaries of fingerprints evicted with pending repeats; a flood
+        # that evicts more than max_tracked between two due() calls drops some
+        self._evicted = deque(maxlen=max_tracked)
+
+    def check(self, filename: str, pattern_name: str, line: str,
+              now: Optional[float] = None) -> bool:
+        """
+        Record a match and decide whether it is alerted.
+
+        Args:
+            filename: File the match was found in
+            pattern_name: Name of the matched pattern
+            line: Matching line
+            now: Current monotonic time, for testing
+
+        Returns:
+            True for the first match of a fingerprint, False for a repeat
+        """
+        key = fingerprint(filename, pattern_name, line)
+        # Seen twice before, as a single earlier sighting is too often a
+        # collision with other fingerprints
+        seen = self.sketch.add(key) > 2
+        repeat = self._tracked.get(key)
+        if repeat is None:
+            repeat = self._track(key, filename, pattern_name, line)
+            if not seen:
+                return True
+        else:
+            self._tracked.move_to_end(key)
+        repeat.last = line
+        repeat.count += 1
+        if repeat.count == 1:
+            repeat.started = time.monotonic() if now is None else now
+            self._schedule.append((repeat.started + self.interval, key))
+            if len(self._schedule) > 2 * self.max_tracked:
+                self._compact()
+        return False
+
+    def _track(self, key: int, filename: str, pattern_name: str, line: str) -> Repeat:
+        repeat = self._tracked[key] = Repeat(filename, pattern_name, line)
+        if len(self._tracked) > self.max_tracked:
+            _, evicted = self._tracked.popitem(last=False)
+            if evicted.count:
+                self._evicted.append(evicted)
+        return repeat
+
+    def _compact(self) -> None:
+        """Drop schedule entries of evicted fingerprints."""
+        self._schedule = deque(
+            (due, key) for due, key in self._schedule
+            if key in self._tracked and self._tracked[key].count
+        )
+
+    def due(self, now: Optional[float] = None) -> List[Repeat]:
+        """
+        Return the repeats whose summary is due, and reset their counts.
+
+        Args:
+            now: Current monotonic time, for testing
+
+        Returns:
+            Repeats to summarize
+        """
+        now = time.monotonic() if now is None else now
+        summaries = []
+        while self._evicted:
+            repeat = self._evicted.popleft()
+            repeat.duration = now - repeat.started
+            summaries.append(repeat)
+        schedule = self._schedule
+        while schedule and schedule[0][0] <= now:
+            due, key = schedule.popleft()
+            repeat = self._tracked.get(key)
+            # Evicted, or summarized on eviction already
+            if repeat is None or not repeat.count or repeat.started + self.interval != due:
+                continue
+            summary = Repeat(repeat.filename, repeat.pattern_name, repeat.first)
+            summary.last = repeat.last
+            summary.count = repeat.count
+            summary.duration = now - repeat.started
+            summaries.append(summary)
+            repeat.count = 0
+        return summaries
+
+    def __len__(self) -> int:
+        return len(self._tracked)
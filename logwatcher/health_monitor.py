@@ -1,10 +1,19 @@
 import time
 import threading
 import logging
-from typing import Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, Tuple
 from datetime import datetime, timedelta
 
 class HealthMonitor:
+    """
+    Periodic health checks of file monitoring and notification channels.
+
+    Channels that sent recently are judged by those sends; the others are
+    probed concurrently, each bounded by a timeout, and probe results are
+    cached. The latest snapshot is always readable without waiting.
+    """
+
     def __init__(self, log_watcher, check_interval: int = 60):
         """
         Initialize the health monitor.
@@ -18,22 +27,44 @@ class HealthMonitor:
         self.logger = logging.getLogger("HealthMonitor")
         self.running = True
         self.last_check = None
+        # Replaced as a whole after each check, so readers need no lock
         self.health_status = {}
+        # Only serializes checks; never held by readers
         self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        settings = log_watcher.config.get('settings', {})
+        self.probe_timeout = settings.get('health_probe_timeout', 5.0)
+        self.cache_ttl = settings.get('health_cache_ttl', 300.0)
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(log_watcher.notification_manager.notifiers),
+            thread_name_prefix='health-probe'
+        )
+        # service -> probe still running, possibly from an earlier check
+        self._probes: Dict[str, Future] = {}
+        # service -> (monotonic time, result) of the last finished probe
+        self._probe_results: Dict[str, Tuple[float, str]] = {}
 
     def stop(self):
         """Stop the health monitoring thread."""
         self.running = False
+        self._stop_event.set()
+        # Hung probes are abandoned rather than waited for
+        self._executor.shutdown(wait=False)
 
     def run(self):
         """Main monitoring loop."""
         while self.running:
             try:
                 self.check_health()
-                time.sleep(self.check_interval)
+                self._stop_event.wait(self.check_interval)
             except Exception as e:
                 self.logger.error(f"Error in health check: {e}")
-                time.sleep(5)  # Short delay on error
+                self._stop_event.wait(5)  # Short delay on error
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return the latest health snapshot without waiting for a check."""
+        return self.health_status
 
     def check_health(self) -> Dict[str, Any]:
         """
@@ -42,7 +73,10 @@ class HealthMonitor:
         Returns:
             Dict containing health status information
         """
-        with self._lock:
+        if not self._lock.acquire(blocking=False):
+            # A check is already running; its result is at most moments away
+            return self.health_status
+        try:
             now = datetime.now()
             status = {
                 'timestamp': now.isoformat(),
@@ -55,13 +89,14 @@ class HealthMonitor:
             status['components']['file_monitoring'] = self._check_file_monitoring()
 
             # Check notification systems
-            status['components']['notifications'] = (
-                self.log_watcher.notification_manager.check_health()
-            )
+            status['components']['notifications'] = self._check_notifications()
 
             # Check syslog connection
             status['components']['syslog'] = self._check_syslog()
 
+            # Check notification backlogs
+            status['components']['notification_queues'] = self._check_notification_queues()
+
             # Check statistics
             status['statistics'] = {
                 'matches_found': self.log_watcher.stats['matches_found'],
@@ -78,16 +113,21 @@ class HealthMonitor:
             
             self._log_health_status(status)
             return status
+        finally:
+            self._lock.release()
 
     def _check_file_monitoring(self) -> Dict[str, Any]:
         """Check the health of file monitoring."""
         file_status = {}
-        for filename, info in self.log_watcher.files.items():
+        lag = self.log_watcher.tail_lag()
+        # Files come and go as globs match them, so iterate over a copy
+        for filename, info in list(self.log_watcher.files.items()):
             file_health = {
                 'status': 'healthy',
                 'last_read': info['last_read'].isoformat(),
                 'error_count': info['error_count'],
-                'last_error': info['last_error']
+                'last_error': info['last_error'],
+                'tail_lag_bytes': lag.get(filename)
             }
 
             # Check if file hasn't been read recently
@@ -103,20 +143,61 @@ class HealthMonitor:
 
         return file_status
 
-    def _check_syslog(self) -> Dict[str, str]:
-        """Check syslog connectivity."""
-        try:
-            if not self.log_watcher.syslog_manager.enabled:
-                return {'status': 'disabled'}
-            
-            # Attempt to send test message
-            self.log_watcher.syslog_manager.send("Health check test message")
-            return {'status': 'healthy'}
-        except Exception as e:
-            return {
-                'status': 'error',
-                'message': str(e)
-            }
+    def _check_notifications(self) -> Dict[str, str]:
+        """
+        Check every notification channel.
+
+        Recent real sends are used where available. Other enabled channels
+        are probed concurrently; a probe that does not finish within the
+        timeout is reported as an error and not started again until it ends.
+        """
+        manager = self.log_watcher.notification_manager
+        status = {}
+        running = []
+        now = time.monotonic()
+        for service in manager.notifiers:
+            if not self.log_watcher.config['notifications'].get(service, {}).get('enabled', False):
+                status[service] = "DISABLED"
+                continue
+            passive = manager.passive_status(service, self.cache_ttl)
+            if passive is not None:
+                status[service] = passive
+                continue
+            cached = self._probe_results.get(service)
+            if cached is not None and now - cached[0] < self.cache_ttl:
+                status[service] = cached[1]
+                continue
+            future = self._probes.get(service)
+            if future is None:
+                future = self._probes[service] = self._executor.submit(
+                    manager.probe, service, self.probe_timeout
+                )
+            running.append((service, future))
+
+        wait([future for _, future in running], timeout=self.probe_timeout)
+        for service, future in running:
+            if not future.done():
+                status[service] = f"ERROR: no response within {self.probe_timeout:g}s"
+                continue
+            del self._probes[service]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = f"ERROR: {str(e)}"
+            self._probe_results[service] = (time.monotonic(), result)
+            status[service] = result
+        return {service: status[service] for service in manager.notifiers}
+
+    def _check_syslog(self) -> Dict[str, Any]:
+        """Report syslog health from its recent sends rather than a test message."""
+        return self.log_watcher.syslog_manager.get_status()
+
+    def _check_notification_queues(self) -> Dict[str, Any]:
+        """Report the depth and spill size of every channel queue."""
+        dispatcher = getattr(self.log_watcher, 'dispatcher', None)
+        if dispatcher is None:
+            return {}
+        return dispatcher.queue_status()
 
     def _has_critical_issues(self, status: Dict[str, Any]) -> bool:
         """
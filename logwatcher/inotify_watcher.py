@@ -0,0 +1,171 @@
+import os
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from typing import Dict, Iterator, List, Optional, Tuple
+
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+DIRECTORY_EVENTS = IN_MODIFY | IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+
+_MASK_NAMES = (
+    (IN_MODIFY, 'IN_MODIFY'),
+    (IN_MOVED_FROM, 'IN_MOVED_FROM'),
+    (IN_MOVED_TO, 'IN_MOVED_TO'),
+    (IN_CREATE, 'IN_CREATE'),
+    (IN_DELETE, 'IN_DELETE'),
+)
+
+_EVENT = struct.Struct('iIII')
+# Enough for about a thousand events with typical file names per read()
+_READ_SIZE = 64 * 1024
+
+
+def type_names(mask: int) -> List[str]:
+    """Names of the event types set in a mask, e.g. ['IN_MODIFY']."""
+    return [name for bit, name in _MASK_NAMES if mask & bit]
+
+
+class InotifyWatcher:
+    """
+    Directory watches on a non-blocking inotify descriptor.
+
+    Each wake-up drains every queued event at once. A second descriptor
+    (an eventfd, or a pipe where that is unavailable) lets another thread
+    interrupt the wait immediately, e.g. for shutdown.
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1: {os.strerror(err)}")
+        self.watches: Dict[int, str] = {}
+        self._closed = False
+
+        if hasattr(os, 'eventfd'):
+            self._wake_read = self._wake_write = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        else:
+            self._wake_read, self._wake_write = os.pipe()
+            os.set_blocking(self._wake_read, False)
+            os.set_blocking(self._wake_write, False)
+
+        self._poll = select.poll()
+        self._poll.register(self.fd, select.POLLIN)
+        self._poll.register(self._wake_read, select.POLLIN)
+
+    def add_watch(self, path: str, mask: int = DIRECTORY_EVENTS) -> int:
+        """
+        Watch a directory.
+
+        Args:
+            path: Directory to watch
+            mask: Event types to report
+
+        Returns:
+            Watch descriptor
+        """
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch {path}: {os.strerror(err)}")
+        self.watches[wd] = path
+        return wd
+
+    def remove_watch(self, path: str) -> None:
+        for wd, watched in list(self.watches.items()):
+            if watched == path:
+                self._rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        Block until events are queued, wake() is called or the timeout passes.
+
+        Args:
+            timeout: Seconds to wait at most, None to wait indefinitely
+
+        Returns:
+            True if woken by wake()
+        """
+        try:
+            ready = self._poll.poll(None if timeout is None else max(0, int(timeout * 1000)))
+        except InterruptedError:
+            return False
+        woken = False
+        for fd, _ in ready:
+            if fd == self._wake_read:
+                woken = True
+                try:
+                    os.read(self._wake_read, 8 if self._wake_read == self._wake_write else 4096)
+                except BlockingIOError:
+                    pass
+        return woken
+
+    def wake(self) -> None:
+        """Interrupt wait() from another thread."""
+        if self._closed:
+            return
+        try:
+            if self._wake_read == self._wake_write:
+                os.eventfd_write(self._wake_write, 1)
+            else:
+                os.write(self._wake_write, b'\0')
+        except (BlockingIOError, OSError):
+            # Already signalled, or closed during shutdown
+            pass
+
+    def read_events(self) -> Iterator[Tuple[int, str, str]]:
+        """
+        Read every queued event without blocking.
+
+        Yields:
+            (mask, watched directory, file name); the name is empty for
+            events about the directory itself and for queue overflows
+        """
+        while True:
+            try:
+                data = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            offset = 0
+            end = len(data)
+            while offset < end:
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & IN_IGNORED:
+                    # Watch removed, e.g. the directory was deleted
+                    self.watches.pop(wd, None)
+                    continue
+                yield mask, self.watches.get(wd, ''), os.fsdecode(name)
+
+    def close(self) -> None:
+        self._closed = True
+        self._poll.unregister(self.fd)
+        self._poll.unregister(self._wake_read)
+        os.close(self.fd)
+        os.close(self._wake_read)
+        if self._wake_write != self._wake_read:
+            os.close(self._wake_write)
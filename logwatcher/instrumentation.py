@@ -0,0 +1,196 @@
+import bisect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Seconds; spans a single short line up to a large catch-up read
+DEFAULT_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0
+)
+
+HISTOGRAMS = {
+    'read': "Time spent reading appended data per file event",
+    'decode': "Time spent decoding read data per file event",
+    'match': "Time spent matching the lines of one read, including match handling",
+    'notify': "Time per notification delivery attempt",
+}
+
+
+class Histogram:
+    """
+    Cumulative histogram in the Prometheus layout.
+
+    Updates are not locked; a count lost to a concurrent update is an
+    acceptable price for keeping observe() cheap on the hot path.
+    """
+
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + '}'
+
+
+class Instrumentation:
+    """
+    Latency histograms, per-file and per-pattern metrics, served as
+    Prometheus text.
+    """
+
+    def __init__(self, profiler=None):
+        """
+        Initialize the Instrumentation.
+
+        Args:
+            profiler: PatternProfiler providing per-pattern CPU time
+        """
+        self.profiler = profiler
+        self.logger = logging.getLogger("Instrumentation")
+        # name -> label value ('' when unlabeled) -> histogram
+        self.histograms: Dict[str, Dict[str, Histogram]] = {name: {} for name in HISTOGRAMS}
+        self.pattern_matches: Dict[str, int] = {}
+        self.read_bytes: Dict[str, int] = {}
+        self._gauges: List[tuple] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def observe(self, name: str, seconds: float, label: str = '') -> None:
+        """Record a duration in one of the HISTOGRAMS."""
+        series = self.histograms[name]
+        histogram = series.get(label)
+        if histogram is None:
+            histogram = series[label] = Histogram()
+        histogram.observe(seconds)
+
+    def count_match(self, pattern_name: str) -> None:
+        self.pattern_matches[pattern_name] = self.pattern_matches.get(pattern_name, 0) + 1
+
+    def count_read(self, filename: str, nbytes: int) -> None:
+        self.read_bytes[filename] = self.read_bytes.get(filename, 0) + nbytes
+
+    def forget(self, filename: str) -> None:
+        """Drop the series of a file that is no longer watched."""
+        # Gauges are computed from the watched files at scrape time
+        self.read_bytes.pop(filename, None)
+
+    def add_gauge(self, name: str, help_text: str, label: str,
+                  source: Callable[[], Dict[str, float]]) -> None:
+        """
+        Register a gauge whose values are computed at scrape time.
+
+        Args:
+            name: Metric name
+            help_text: HELP text
+            label: Label name of the keys returned by source
+            source: Returns a mapping of label value to gauge value
+        """
+        self._gauges.append((name, help_text, label, source))
+
+    def render(self) -> str:
+        """Format all metrics in the Prometheus text exposition format."""
+        out: List[str] = []
+        for name, help_text in HISTOGRAMS.items():
+            metric = f'logwatcher_{name}_seconds'
+            out.append(f'# HELP {metric} {help_text}')
+            out.append(f'# TYPE {metric} histogram')
+            for label, histogram in list(self.histograms[name].items()):
+                labels = {'channel': label} if label else {}
+                cumulative = 0
+                for bound, count in zip(histogram.bounds + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    out.append(f'{metric}_bucket{_labels(**labels, le=le)} {cumulative}')
+                out.append(f'{metric}_sum{_labels(**labels)} {histogram.total}')
+                out.append(f'{metric}_count{_labels(**labels)} {histogram.count}')
+
+        out.append('# HELP logwatcher_pattern_matches_total Matches per pattern')
+        out.append('# TYPE logwatcher_pattern_matches_total counter')
+        for pattern, count in list(self.pattern_matches.items()):
+            out.append(f'logwatcher_pattern_matches_total{_labels(pattern=pattern)} {count}')
+
+        if self.profiler is not None:
+            out.append('# HELP logwatcher_pattern_cpu_seconds_total Estimated CPU time per '
+                       f'pattern, sampled on 1 in {self.profiler.sample_rate} lines')
+            out.append('# TYPE logwatcher_pattern_cpu_seconds_total counter')
+            for pattern in list(self.profiler.stats):
+                seconds = self.profiler.estimated_seconds(pattern)
+                out.append(f'logwatcher_pattern_cpu_seconds_total{_labels(pattern=pattern)} {seconds}')
+
+        out.append('# HELP logwatcher_read_bytes_total Bytes read per file')
+        out.append('# TYPE logwatcher_read_bytes_total counter')
+        for filename, nbytes in list(self.read_bytes.items()):
+            out.append(f'logwatcher_read_bytes_total{_labels(file=filename)} {nbytes}')
+
+        for name, help_text, label, source in self._gauges:
+            out.append(f'# HELP {name} {help_text}')
+            out.append(f'# TYPE {name} gauge')
+            try:
+                values = source()
+            except Exception as e:
+                self.logger.error(f"Failed to collect {name}: {e}")
+                continue
+            for key, value in values.items():
+                out.append(f'{name}{_labels(**{label: key})} {value}')
+        out.append('')
+        return '\n'.join(out)
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> None:
+        """
+        Serve /metrics from a background thread.
+
+        Args:
+            port: Port to listen on, 0 for any free port
+            host: Address to bind
+        """
+        instrumentation = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = instrumentation.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name='metrics-server', daemon=True
+        ).start()
+        self.logger.info(f"Serving metrics on http://{host}:{self.port}/metrics")
+
+    @property
+    def port(self) -> Optional[int]:
+        return self._server.server_address[1] if self._server is not None else None
+
+    def close(self) -> None:
+        """Stop serving metrics."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -1,5 +1,442 @@
 # Previous content remains the same...
 
+    def setup_pipeline(self):
+        """Build the per-file processing state used by handle_file_change."""
+        from .checkpoint import CheckpointRegistry
+        from .coalescer import AlertCoalescer
+        from .context_buffer import ContextBuffer
+        from .dispatch_table import FileDispatchTable
+        from .field_rules import compile_rules
+        from .file_pool import FilePool
+        from .tail_reader import TailReader
+        from .token_bucket import DEFAULT_POLICY, TokenBucketLimiter
+
+        settings = self.config['settings']
+        self.field_rules = compile_rules(self.config.get('field_rules', {}), self.patterns)
+        self.dispatch = FileDispatchTable(self.file_patterns)
+        # Globs are not files; their matches are attached below and as they appear
+        for key in self.dispatch.globs:
+            self.files.pop(key, None)
+        # Files with the same patterns share one matcher
+        self._matcher_cache = {}
+        # (dev, inode) -> read offset of files detached after a move
+        self._detached = {}
+        # Monotonic time at which a requested config reload is due
+        self._reload_at = None
+        self.matchers = {}
+        self.readers = {}
+        for filename in self.files:
+            self.matchers[filename] = self._matcher_for(self.dispatch.resolve(filename))
+            self.readers[filename] = TailReader(settings['encoding'], settings['read_chunk_size'])
+        for filename, pattern_names in self.dispatch.existing_files().items():
+            if filename not in self.files:
+                # Like configured files, existing ones are followed from their end
+                self.attach_file(filename, pattern_names, from_start=False)
+        self.buffer_manager = ContextBuffer(
+            settings.get('buffer_size', 20),
+            settings.get('context_max_bytes', 32 * 1024 * 1024)
+        )
+        # Open descriptors would block rotation of files on Windows
+        default_max_open = 0 if platform.system() == 'Windows' else 256
+        self.file_pool = FilePool(settings.get('max_open_files', default_max_open))
+
+        self.parallel_matcher = None
+        if settings.get('parallel_workers', 0) > 0:
+            from .parallel import ParallelMatcher
+            self.parallel_matcher = ParallelMatcher(
+                self.patterns,
+                workers=settings['parallel_workers'],
+                batch_size=settings.get('parallel_batch_size', 2000)
+            )
+
+        self.rate_limiter = TokenBucketLimiter.from_config(self.config)
+        # A digest covers the matches limited until the bucket of its
+        # pattern gains the next token
+        windows = self.rate_limiter.refill_intervals()
+        self.coalescer = AlertCoalescer(
+            windows.pop(DEFAULT_POLICY), settings.get('digest_samples', 3), windows
+        )
+
+        self.repeats = None
+        if settings.get('suppress_repeats'):
+            from .fingerprint import RepeatSuppressor
+            self.repeats = RepeatSuppressor(
+                settings.get('repeat_summary_interval', 300),
+                settings.get('repeat_max_fingerprints', 10_000)
+            )
+
+        self.dispatcher = None
+        if settings.get('async_notifications', True) and not self.test_mode:
+            from .dispatcher import AsyncNotificationDispatcher
+            self.dispatcher = AsyncNotificationDispatcher(self.notification_manager, self.config)
+            self.dispatcher.start()
+
+        self.profiler = None
+        if settings.get('profile_patterns') or settings.get('metrics_port') is not None:
+            from .profiler import PatternProfiler
+            self.profiler = PatternProfiler(
+                self.patterns,
+                sample_rate=settings.get('profile_sample_rate', 1000),
+                slow_threshold=settings.get('profile_slow_threshold', 0.01),
+                # Rankings are only logged in profiling mode
+                report_interval=(settings.get('profile_report_interval', 300)
+                                 if settings.get('profile_patterns') else 0)
+            )
+
+        self.instrumentation = None
+        if settings.get('metrics_port') is not None:
+            from .instrumentation import Instrumentation
+            self.instrumentation = Instrumentation(self.profiler)
+            self.instrumentation.add_gauge(
+                'logwatcher_tail_lag_bytes', "Bytes written to a file but not read yet",
+                'file', self.tail_lag
+            )
+            if self.dispatcher is not None:
+                self.instrumentation.add_gauge(
+                    'logwatcher_notification_queue_depth',
+                    "Notifications queued in memory per channel", 'channel',
+                    lambda: {channel: status['depth']
+                             for channel, status in self.dispatcher.queue_status().items()}
+                )
+                self.instrumentation.add_gauge(
+                    'logwatcher_notification_spill_bytes',
+                    "Bytes of notifications spilled to disk per channel", 'channel',
+                    lambda: {channel: status['spill_bytes']
+                             for channel, status in self.dispatcher.queue_status().items()
+                             if 'spill_bytes' in status}
+                )
+            self.notification_manager.instrumentation = self.instrumentation
+            self.instrumentation.serve(settings['metrics_port'], settings.get('metrics_host', '127.0.0.1'))
+
+        self.checkpoints = None
+        if settings.get('checkpoint_file'):
+            self.checkpoints = CheckpointRegistry(
+                settings['checkpoint_file'],
+                interval=settings.get('checkpoint_interval', 5),
+                flush_bytes=settings.get('checkpoint_bytes', 1_048_576)
+            )
+
+    def _matcher_for(self, pattern_names):
+        """Return the shared matcher for a set of pattern names."""
+        from .field_rules import FieldMatcher
+        from .matcher import PatternMatcher
+
+        key = tuple(pattern_names)
+        matcher = self._matcher_cache.get(key)
+        if matcher is None:
+            if any(name in self.field_rules for name in key):
+                # Files with field rules are read as JSON lines
+                matcher = FieldMatcher(self.field_rules, self.patterns, key)
+            else:
+                matcher = PatternMatcher(self.patterns, key)
+            self._matcher_cache[key] = matcher
+        return matcher
+
+    def attach_file(self, filename: str, pattern_names, from_start: bool = True):
+        """
+        Start following a file that matched a glob in file_patterns.
+
+        Args:
+            filename: Path of the file
+            pattern_names: Patterns to apply to the file
+            from_start: Read the file from its beginning; otherwise only
+                data appended from now on is matched
+
+        Returns:
+            False if the file is already gone
+        """
+        from .tail_reader import TailReader
+
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return False
+        settings = self.config['settings']
+        self.files[filename] = {
+            "pos": 0 if from_start else stat.st_size,
+            "inode": stat.st_ino,
+            "size": stat.st_size,
+            "last_read": datetime.now(),
+            "error_count": 0,
+            "last_error": None
+        }
+        self.matchers[filename] = self._matcher_for(pattern_names)
+        self.readers[filename] = TailReader(settings['encoding'], settings['read_chunk_size'])
+        self.logger.info(f"Watching {filename}")
+        return True
+
+    def detach_file(self, filename: str):
+        """Stop following a file that was deleted or moved away, after reading its tail."""
+        reader = self.readers[filename]
+        handle = self.file_pool.get(filename)
+        if handle is not None:
+            # The open descriptor still reaches the data written before the move
+            try:
+                self.process_lines(filename, reader.read_text(handle.fd, self.files[filename]["pos"]))
+                self.process_lines(filename, reader.flush())
+            except OSError as e:
+                self.logger.warning(f"Could not read the tail of {filename}: {e}")
+            self._detached[(handle.dev, handle.inode)] = reader.offset
+            if len(self._detached) > 1024:
+                self._detached.pop(next(iter(self._detached)))
+            self.file_pool.close(filename)
+        # Token buckets are kept per file and pattern, as in handle_match
+        for pattern_name in self.matchers[filename].names:
+            self.rate_limiter.forget(f"{filename}:{pattern_name}")
+        del self.files[filename]
+        del self.readers[filename]
+        del self.matchers[filename]
+        self.dispatch.forget(filename)
+        self.buffer_manager.forget(filename)
+        if self.checkpoints is not None:
+            self.checkpoints.forget(filename)
+        if self.instrumentation is not None:
+            self.instrumentation.forget(filename)
+        self.logger.info(f"Stopped watching {filename}")
+
+    def setup_directory_watches(self):
+        """Watch each directory holding watched files once, instead of every file."""
+        from .inotify_watcher import InotifyWatcher
+
+        self.notifier = InotifyWatcher()
+        directories = self.dispatch.directories()
+        if self._config_file is not None:
+            directories.add(os.path.dirname(self._config_file))
+        for directory in sorted(directories):
+            try:
+                self.notifier.add_watch(directory)
+            except OSError as e:
+                self.logger.error(f"Error watching directory {directory}: {e}")
+                self.metrics.add_error("linux_setup")
+
+    def request_stop(self):
+        """Stop the watch loop from another thread without waiting for a timeout."""
+        self.running = False
+        self.stop_event.set()
+        if platform.system() == 'Linux':
+            self.notifier.wake()
+
+    # Absolute path of the config file, set by enable_reload()
+    _config_file = None
+
+    def enable_reload(self, config_path: str):
+        """
+        Reload the configuration on SIGHUP and whenever its file changes.
+
+        Args:
+            config_path: Path of the JSON config file
+        """
+        import signal
+
+        self._config_file = os.path.abspath(config_path)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.request_reload(0))
+
+    def request_reload(self, delay: float = 0.25):
+        """
+        Schedule a config reload on the watch thread.
+
+        Args:
+            delay: Seconds to wait first, so a file still being written is
+                read once it is complete
+        """
+        self._reload_at = time.monotonic() + delay
+        if platform.system() == 'Linux' and hasattr(self, 'notifier'):
+            self.notifier.wake()
+
+    def reload_config(self):
+        """
+        Apply changes of the config file without restarting.
+
+        Only changed patterns are recompiled and only matchers using them or
+        changed field rules are rebuilt; files are attached and detached as
+        file_patterns changed, and offsets, context and rate limiter state of
+        the others are kept. patterns, field_rules, file_patterns,
+        notification_rules and rate_limits apply live; other sections need a
+        restart.
+
+        Returns:
+            True if the new configuration was applied
+        """
+        from .config_validator import validate_config
+        from .field_rules import compile_rules
+        from .token_bucket import DEFAULT_POLICY, TokenBucketLimiter
+
+        start = time.perf_counter()
+        try:
+            with open(self._config_file, 'r', encoding='utf-8') as f:
+                new_config = json.load(f)
+            validate_config(new_config)
+            # Everything is compiled before anything is changed, so a bad
+            # pattern leaves the running configuration intact
+            changed = {
+                name: re.compile(source) for name, source in new_config['patterns'].items()
+                if self.config['patterns'].get(name) != source
+            }
+            field_rules = compile_rules(new_config.get('field_rules', {}), new_config['patterns'])
+        except Exception as e:
+            self.logger.error(f"Not reloading {self._config_file}, keeping the current configuration: {getattr(e, 'message', e)}")
+            self.metrics.add_error("config_reload")
+            return False
+
+        old_config = self.config
+        removed = set(old_config['patterns']) - set(new_config['patterns'])
+        old_rules = old_config.get('field_rules', {})
+        new_rules = new_config.get('field_rules', {})
+        changed_rules = {
+            name for name in set(old_rules) | set(new_rules)
+            if old_rules.get(name) != new_rules.get(name)
+        }
+        self.field_rules = field_rules
+        for section in ('settings', 'notifications'):
+            if new_config.get(section) != old_config.get(section):
+                self.logger.warning(f"Changes to '{section}' take effect after a restart")
+                new_config[section] = old_config.get(section)
+
+        stale = set(changed) | removed | changed_rules
+        for key in [key for key in self._matcher_cache if stale.intersection(key)]:
+            del self._matcher_cache[key]
+        if changed or removed:
+            for name in removed:
+                del self.patterns[name]
+            self.patterns.update(changed)
+            if self.profiler is not None:
+                self.profiler.reset_patterns(changed, removed)
+            if self.parallel_matcher is not None:
+                from .parallel import ParallelMatcher
+                # Workers hold their own compiled copies
+                self.parallel_matcher.shutdown()
+                self.parallel_matcher = ParallelMatcher(
+                    self.patterns,
+                    workers=self.parallel_matcher.workers,
+                    batch_size=self.parallel_matcher.batch_size
+                )
+
+        # Updated in place: the notifiers and dispatcher hold the same dict
+        old_rate_limits = old_config.get('rate_limits')
+        old_config.clear()
+        old_config.update(new_config)
+        if new_config.get('rate_limits') != old_rate_limits:
+            self.rate_limiter = TokenBucketLimiter.from_config(self.config)
+            windows = self.rate_limiter.refill_intervals()
+            self.coalescer.set_windows(windows.pop(DEFAULT_POLICY), windows)
+            self.notification_manager.channel_limiter = TokenBucketLimiter.for_channels(self.config)
+
+        self.apply_file_patterns(new_config['file_patterns'])
+        self.logger.info(
+            f"Reloaded {self._config_file} in {(time.perf_counter() - start) * 1000:.1f}ms: "
+            f"{len(changed)} patterns compiled, {len(removed)} removed, "
+            f"{len(changed_rules)} field rules changed"
+        )
+        return True
+
+    def apply_file_patterns(self, file_patterns):
+        """
+        Attach, detach and rematch files for a changed file_patterns.
+
+        Files that stay watched keep their state; only their matcher is
+        replaced, and that only if their patterns changed.
+
+        Args:
+            file_patterns: New mapping of path or glob to pattern names
+        """
+        from .dispatch_table import FileDispatchTable
+
+        old_directories = self.dispatch.directories()
+        self.file_patterns = file_patterns
+        self.dispatch = FileDispatchTable(file_patterns)
+
+        for filename in list(self.files):
+            pattern_names = self.dispatch.resolve(filename)
+            if pattern_names is None:
+                # Reads what is left of the file first, so no line is lost
+                self.detach_file(filename)
+            else:
+                self.matchers[filename] = self._matcher_for(pattern_names)
+
+        for filename in self.dispatch.exact:
+            if filename not in self.files and os.path.exists(filename):
+                self.attach_file(filename, self.dispatch.resolve(filename), from_start=False)
+        for filename, pattern_names in self.dispatch.existing_files().items():
+            if filename not in self.files:
+                self.attach_file(filename, pattern_names, from_start=False)
+
+        if platform.system() == 'Linux':
+            directories = self.dispatch.directories()
+            config_directory = os.path.dirname(self._config_file) if self._config_file else None
+            for directory in sorted(directories - old_directories):
+                try:
+                    self.notifier.add_watch(directory)
+                except OSError as e:
+                    self.logger.error(f"Error watching directory {directory}: {e}")
+            for directory in old_directories - directories:
+                if directory != config_directory:
+                    self.notifier.remove_watch(directory)
+        elif self.files.keys() - self.win32_handles.keys():
+            self.logger.warning("Files added to file_patterns are watched after a restart")
+
+    def handle_directory_event(self, type_names, full_path: str):
+        """Attach, detach or read a file according to a directory watch event."""
+        if 'IN_MODIFY' in type_names:
+            if full_path in self.files:
+                self.handle_file_change(full_path)
+        elif 'IN_CREATE' in type_names or 'IN_MOVED_TO' in type_names:
+            if full_path in self.files:
+                # Recreated after rotation; handle_file_change sees the new inode
+                self.handle_file_change(full_path)
+                return
+            pattern_names = self.dispatch.resolve(full_path)
+            if pattern_names and self.attach_file(full_path, pattern_names):
+                # A renamed file that was already being followed continues where it was
+                try:
+                    stat = os.stat(full_path)
+                    offset = self._detached.pop((stat.st_dev, stat.st_ino), None)
+                except OSError:
+                    offset = None
+                if offset is not None:
+                    self.files[full_path]["pos"] = offset
+                self.handle_file_change(full_path)
+        elif 'IN_DELETE' in type_names or 'IN_MOVED_FROM' in type_names:
+            # Configured paths stay watched so they are picked up when recreated
+            if full_path in self.files and full_path not in self.dispatch.exact:
+                self.detach_file(full_path)
+
+    def tail_lag(self):
+        """Bytes each file has grown beyond what has been read."""
+        lag = {}
+        # Called from the health and metrics threads while the main thread
+        # attaches and detaches files, so iterate over a snapshot
+        for filename, file_info in list(self.files.items()):
+            try:
+                lag[filename] = max(0, os.stat(filename).st_size - file_info["pos"])
+            except OSError:
+                continue
+        return lag
+
+    def run_periodic_tasks(self):
+        """Run housekeeping that must not wait for the next file event."""
+        if self._reload_at is not None and time.monotonic() >= self._reload_at:
+            self._reload_at = None
+            self.reload_config()
+        self.flush_digests()
+        if self.checkpoints is not None:
+            self.checkpoints.maybe_flush()
+        if self.profiler is not None:
+            self.profiler.maybe_report()
+
+    def resume_from_checkpoints(self):
+        """Continue each file from its checkpoint and catch up on missed data."""
+        if self.checkpoints is None:
+            return
+        for filename, file_info in self.files.items():
+            offset = self.checkpoints.resume_offset(filename)
+            if offset is None:
+                continue
+            self.logger.info(f"Resuming {filename} at offset {offset}")
+            file_info["pos"] = offset
+            file_info["inode"] = os.stat(filename).st_ino
+            self.handle_file_change(filename)
+
     def setup_win32_watches(self):
         """Setup file watches for Windows systems."""
         for filename in self.files:
@@ -23,8 +460,13 @@
 
     def watch_files(self):
         """Main file watching loop."""
-        self.setup_watchers()
+        self.setup_pipeline()
+        if platform.system() == 'Linux':
+            self.setup_directory_watches()
+        else:
+            self.setup_watchers()
         try:
+            self.resume_from_checkpoints()
             if platform.system() == 'Linux':
                 self.watch_linux_files()
             elif platform.system() == 'Windows':
@@ -33,23 +475,69 @@
             self.logger.exception("Error in watch_files:")
             self.metrics.add_error("watch_files")
             raise
+        finally:
+            self.file_pool.close_all()
+            if self.parallel_matcher is not None:
+                self.parallel_matcher.shutdown()
+            if self.dispatcher is not None:
+                self.dispatcher.stop()
+            self.notification_manager.close()
+            self.syslog_manager.close()
+            if self.instrumentation is not None:
+                self.instrumentation.close()
+            if self.checkpoints is not None:
+                self.checkpoints.flush()
+            if platform.system() == 'Linux':
+                self.notifier.close()
 
     def watch_linux_files(self):
         """Watch files using inotify on Linux."""
-        while self.running:
+        from .inotify_watcher import (
+            IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, IN_Q_OVERFLOW, type_names
+        )
+
+        structural = IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+        # Upper bound on the wait, so digests and checkpoints are flushed while idle
+        interval = self.config['settings'].get('housekeeping_interval', 1.0)
+        config_directory, config_name = (
+            os.path.split(self._config_file) if self._config_file else (None, None)
+        )
+        while self.running and not self.stop_event.is_set():
             try:
-                for event in self.notifier.event_gen(yield_nones=False, timeout_s=1):
-                    if self.stop_event.is_set():
-                        break
-                    (_, type_names, path, filename) = event
-                    if 'IN_MODIFY' in type_names:
-                        full_path = str(Path(path) / filename)
-                        if full_path in self.files:
-                            self.handle_file_change(full_path)
+                timeout = interval
+                if self._reload_at is not None:
+                    timeout = min(timeout, max(0, self._reload_at - time.monotonic()))
+                self.notifier.wait(timeout)
+                if self.stop_event.is_set():
+                    break
+                # Every queued event is read at once and modifications are
+                # coalesced, so a burst of writes costs one read per file
+                pending = {}
+                for mask, directory, name in self.notifier.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        self.logger.warning("inotify event queue overflowed, rereading all files")
+                        pending.update(dict.fromkeys(self.files))
+                        continue
+                    if not name:
+                        continue
+                    if name == config_name and os.path.abspath(directory) == config_directory:
+                        self.request_reload()
+                        continue
+                    full_path = str(Path(directory) / name)
+                    if mask & structural:
+                        # Attaching or detaching reads the file itself
+                        pending.pop(full_path, None)
+                        self.handle_directory_event(type_names(mask), full_path)
+                    elif full_path in self.files:
+                        pending[full_path] = None
+                for full_path in pending:
+                    if full_path in self.files:
+                        self.handle_file_change(full_path)
+                self.run_periodic_tasks()
             except Exception as e:
                 self.logger.exception("Error in Linux file watch:")
                 self.metrics.add_error("linux_watch")
-                time.sleep(1)
+                self.stop_event.wait(1)
 
     def watch_windows_files(self):
         """Watch files using ReadDirectoryChangesW on Windows."""
@@ -71,6 +559,7 @@
                     self.metrics.add_error("windows_watch")
                     self.files[filename]["last_error"] = str(e)
                     self.files[filename]["error_count"] += 1
+            self.run_periodic_tasks()
             if self.stop_event.wait(timeout=1):
                 break
 
@@ -79,39 +568,53 @@
         try:
             current_stat = os.stat(filename)
             file_info = self.files[filename]
+            reader = self.readers[filename]
+            handle = self.file_pool.get(filename)
             
             # Check if file was rotated
-            if current_stat.st_ino != file_info["inode"]:
+            if handle is not None and not handle.matches(current_stat):
+                self.logger.info(f"File rotation detected for {filename}")
+                # Drain the tail of the old file before switching over
+                self.process_lines(filename, reader.read_text(handle.fd, file_info["pos"]))
+                self.process_lines(filename, reader.flush())
+                self.file_pool.close(filename)
+                handle = None
+                file_info["pos"] = 0
+            elif handle is None and current_stat.st_ino != file_info["inode"]:
                 self.logger.info(f"File rotation detected for {filename}")
+                reader.reset()
                 file_info["pos"] = 0
-                file_info["inode"] = current_stat.st_ino
+            elif current_stat.st_size < file_info["pos"]:
+                self.logger.info(f"File truncation detected for {filename}")
+                reader.reset()
+                file_info["pos"] = 0
+
+            if handle is None:
+                handle = self.file_pool.open(filename)
+                file_info["inode"] = handle.inode
             
-            # Read new content
-            with open(filename, 'r', 
-                     encoding=self.config['settings']['encoding']) as f:
-                f.seek(file_info["pos"])
-                
-                while True:
-                    chunk = f.read(self.config['settings']['read_chunk_size'])
-                    if not chunk:
-                        break
-                        
-                    lines = chunk.splitlines()
-                    if not lines:
-                        continue
-                        
-                    # Process lines and update buffer
-                    for line in lines:
-                        self.buffer_manager.add_line(filename, line)
-                        # Process each line for pattern matches
-                        for pattern_name in self.file_patterns[filename]:
-                            if pattern_name in self.patterns:
-                                if self.patterns[pattern_name].search(line):
-                                    self.handle_match(pattern_name, line, filename)
-                                    
-                file_info["pos"] = f.tell()
-                file_info["last_read"] = datetime.now()
-                file_info["size"] = current_stat.st_size
+            # Read new content as complete lines; a trailing partial line is
+            # held back by the reader until the rest of it is written
+            start_pos = file_info["pos"]
+            read_time, decode_time = reader.read_time, reader.decode_time
+            try:
+                self.process_lines(filename, reader.read_text(handle.fd, start_pos))
+            finally:
+                file_info["pos"] = reader.offset
+                if self.instrumentation is not None:
+                    self.instrumentation.observe('read', reader.read_time - read_time)
+                    self.instrumentation.observe('decode', reader.decode_time - decode_time)
+                    self.instrumentation.count_read(filename, reader.offset - start_pos)
+                if self.checkpoints is not None:
+                    self.checkpoints.update(
+                        filename, handle.dev, handle.inode,
+                        reader.offset - reader.pending, reader.partial,
+                        reader.offset - start_pos
+                    )
+                self.file_pool.trim()
+
+            file_info["last_read"] = datetime.now()
+            file_info["size"] = current_stat.st_size
                 
         except Exception as e:
             self.logger.exception(f"Error processing {filename}:")
@@ -119,56 +622,130 @@
             self.files[filename]["last_error"] = str(e)
             self.files[filename]["error_count"] += 1
 
+    def process_lines(self, filename: str, lines):
+        """Update the context buffer and match each line of a file."""
+        matcher = self.matchers[filename]
+        if self.profiler is not None:
+            lines = self.profiler.sampled(lines, matcher.names)
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
+            # Time includes the reads interleaved with matching; read and
+            # decode time are reported separately and subtracted
+            reader = self.readers[filename]
+            io_before = reader.read_time + reader.decode_time
+        try:
+            self._match_lines(filename, matcher, lines)
+        finally:
+            if instrumentation is not None:
+                io_time = reader.read_time + reader.decode_time - io_before
+                instrumentation.observe('match', time.perf_counter() - start - io_time)
+
+    def _match_lines(self, filename: str, matcher, lines):
+        """Update the context buffer and hand matches to handle_match."""
+        from .field_rules import FieldMatcher
+
+        # Workers only know the regex patterns; field rules are cheap enough in-process
+        if self.parallel_matcher is not None and not isinstance(matcher, FieldMatcher):
+            # Workers only return match results; context and notifications
+            # are still handled here, in file order
+            for batch, results in self.parallel_matcher.match(matcher.names, lines, matcher):
+                hits = dict(results)
+                for index, line in enumerate(batch):
+                    self.buffer_manager.add_line(filename, line)
+                    for pattern_name in hits.get(index, ()):
+                        self.handle_match(pattern_name, line, filename)
+            return
+
+        for line in lines:
+            self.buffer_manager.add_line(filename, line)
+            # All patterns for the file are matched in one scan
+            for pattern_name in matcher.match(line):
+                self.handle_match(pattern_name, line, filename)
+
     def handle_match(self, pattern_name: str, line: str, filename: str):
         """Handle a pattern match with notifications and rate limiting."""
+        from .events import MatchEvent
+
         try:
-            # Get context and prepare message
-            context = self.buffer_manager.get_context(filename)
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            message = (
-                f"=== LogWatcher Match ===\n"
-                f"Time: {timestamp}\n"
-                f"File: {filename}\n"
-                f"Pattern: {pattern_name}\n"
-                f"Match: {line}\n"
-                f"Recent context:\n{chr(10).join(context)}\n"
-                f"======================="
-            )
-            
-            # Update metrics
+            # Update metrics; repeats are counted like any match
             self.metrics.increment('matches_found')
             self.metrics.add_pattern_match(pattern_name)
+            if self.instrumentation is not None:
+                self.instrumentation.count_match(pattern_name)
             self.metrics.update_timestamp('last_match_time')
-            
-            # Log the match
-            self.logger.info(message)
+
+            if self.repeats is not None and not self.repeats.check(filename, pattern_name, line):
+                # Only summarized once per interval
+                self.metrics.increment('repeats_suppressed')
+                self.logger.debug(f"Suppressed repeat of {pattern_name} in {filename}")
+                return
+
+            # The event renders its message only when a sink asks for it
+            reader = self.readers.get(filename)
+            event = MatchEvent(
+                filename, pattern_name, line,
+                self.buffer_manager.get_context(filename),
+                offset=reader.offset if reader is not None else None
+            )
+
+            # Log the match; the full event with its context only at DEBUG,
+            # so it is not rendered for matches that are just logged
+            self.logger.info("Match for %s in %s: %s", pattern_name, filename, line)
+            self.logger.debug("%s", event)
             
             # Handle notifications if not in test mode
             if not self.test_mode:
                 notification_key = f"{filename}:{pattern_name}"
-                if self.rate_limiter.can_send(notification_key):
-                    # Queue notifications asynchronously
-                    self.notification_queue.add_notification({
-                        'handler': self.notification_manager.notify,
-                        'message': message,
-                        'pattern': pattern_name
-                    })
-                    
-                    self.notification_queue.add_notification({
-                        'handler': self.syslog_manager.send,
-                        'message': message
-                    })
-                    
+                if self.rate_limiter.can_send(notification_key, pattern_name):
+                    self.queue_notification(pattern_name, event)
                     self.metrics.increment('notifications_sent')
                 else:
+                    # Counted and sampled for the digest sent when the window closes
+                    self.coalescer.add(filename, pattern_name, line)
                     self.logger.debug(f"Rate limited notification for {notification_key}")
                     
         except Exception as e:
             self.logger.exception("Error handling match:")
             self.metrics.add_error("match_handling")
 
+    def queue_notification(self, pattern_name: str, message):
+        """Queue a message or match event for the notifiers and syslog."""
+        # Queue notifications asynchronously; the dispatcher hands them
+        # to its event loop without blocking
+        self.notification_queue.add_notification({
+            'handler': (self.dispatcher.submit if self.dispatcher is not None
+                        else self.notification_manager.notify),
+            'message': message,
+            'pattern': pattern_name
+        })
+
+        self.notification_queue.add_notification({
+            'handler': self.syslog_manager.send,
+            'message': message
+        })
+
+    def flush_digests(self):
+        """Send a digest for every rate-limit window that has closed, and due repeat summaries."""
+        if self.test_mode:
+            return
+        for digest in self.coalescer.due():
+            self.queue_notification(digest.pattern_name, digest.render())
+            self.metrics.increment('digests_sent')
+        if self.repeats is not None:
+            for repeat in self.repeats.due():
+                self.queue_notification(repeat.pattern_name, repeat.render())
+                self.metrics.increment('repeat_summaries_sent')
+
 def main():
     """Main entry point for the LogWatcher application."""
+    if len(sys.argv) > 1 and sys.argv[1] == 'profile-patterns':
+        from .profiler import profile_main
+        sys.exit(profile_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'scan':
+        from .scan import scan_main
+        sys.exit(scan_main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(
         description="LogWatcher - Monitor log files for patterns"
     )
@@ -184,6 +761,7 @@ def main():
     try:
         # Initialize and run LogWatcher
         watcher = LogWatcher(args.config, test_mode=args.test)
+        watcher.enable_reload(args.config)
         watcher.watch_files()
     except Exception as e:
         logging.exception("Fatal error:")
@@ -0,0 +1,196 @@
+import re
+import logging
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+from .prefilter import LiteralPrefilter
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+
+# Leading global inline flags, e.g. "(?i)" in "(?i)\b(error|fail)\b"
+_LEADING_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+
+# Flags that can be expressed as a scoped group "(?flags:...)"
+_SCOPED_FLAGS = (
+    (re.IGNORECASE, 'i'),
+    (re.MULTILINE, 'm'),
+    (re.DOTALL, 's'),
+    (re.ASCII, 'a'),
+)
+_SCOPED_MASK = re.IGNORECASE | re.MULTILINE | re.DOTALL | re.ASCII
+
+
+def _uses_group_references(parsed) -> bool:
+    """Check a parsed pattern for back-references or conditional groups."""
+    for op, av in parsed:
+        if op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS):
+            return True
+        if op is sre_parse.SUBPATTERN:
+            if _uses_group_references(av[-1]):
+                return True
+        elif op is sre_parse.BRANCH:
+            if any(_uses_group_references(branch) for branch in av[1]):
+                return True
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            if _uses_group_references(av[2]):
+                return True
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            if _uses_group_references(av[1]):
+                return True
+        elif op is getattr(sre_parse, 'ATOMIC_GROUP', None):
+            if _uses_group_references(av):
+                return True
+        elif op is getattr(sre_parse, 'POSSESSIVE_REPEAT', None):
+            if _uses_group_references(av[2]):
+                return True
+    return False
+
+
+# (pattern, flags) -> combinable_source() result, also filled from the config cache
+_combinable_cache: Dict[Tuple[str, int], Optional[Tuple[int, str]]] = {}
+
+
+def combinable_source(compiled: Pattern) -> Optional[Tuple[int, str]]:
+    """
+    Split a compiled pattern into its flags and an embeddable source.
+
+    Leading global flags such as "(?i)" are stripped from the source so the
+    pattern can be placed inside a larger alternation.
+
+    Args:
+        compiled: Compiled pattern to rewrite
+
+    Returns:
+        (flags, source) tuple, or None if the pattern has to be searched on its own
+    """
+    key = (compiled.pattern, compiled.flags)
+    if key not in _combinable_cache:
+        _combinable_cache[key] = _combinable_source(compiled)
+    return _combinable_cache[key]
+
+
+def _combinable_source(compiled: Pattern) -> Optional[Tuple[int, str]]:
+    if not isinstance(compiled.pattern, str):
+        return None
+    if compiled.flags & re.VERBOSE or compiled.groupindex:
+        return None
+
+    source = compiled.pattern
+    leading = _LEADING_FLAGS.match(source)
+    if leading:
+        source = source[leading.end():]
+
+    try:
+        parsed = sre_parse.parse(source, compiled.flags & ~re.UNICODE)
+    except Exception:
+        return None
+    if _uses_group_references(parsed):
+        return None
+
+    flags = compiled.flags & _SCOPED_MASK
+    # Global flags in the middle of the pattern, stray group syntax etc.
+    try:
+        re.compile(_scoped(flags, source))
+    except re.error:
+        return None
+    return flags, source
+
+
+def _scoped(flags: int, source: str) -> str:
+    """Wrap a pattern source in a scoped flag group."""
+    letters = ''.join(letter for flag, letter in _SCOPED_FLAGS if flags & flag)
+    return f"(?{letters}:{source})" if letters else f"(?:{source})"
+
+
+class PatternMatcher:
+    """Matches a line against a fixed set of patterns in a single scan."""
+
+    def __init__(self, patterns: Dict[str, Pattern], names: Sequence[str]):
+        """
+        Initialize the PatternMatcher.
+
+        Args:
+            patterns: Mapping of pattern name to compiled pattern
+            names: Pattern names assigned to the file, in firing order
+        """
+        self.logger = logging.getLogger("PatternMatcher")
+        self.names = [name for name in names if name in patterns]
+        self._compiled = {name: patterns[name] for name in self.names}
+        # One combined alternation per distinct flag set
+        self._gates: List[Pattern] = []
+        self._gate_of: Dict[str, int] = {}
+        self._separate: List[str] = []
+        self._compile()
+
+        prefilter = LiteralPrefilter(patterns, self.names)
+        self._prefilter = prefilter if prefilter.selective else None
+
+    def _compile(self) -> None:
+        """Build one combined alternation per distinct flag set."""
+        groups: Dict[int, List[Tuple[str, str]]] = {}
+        for name in self.names:
+            embeddable = combinable_source(self._compiled[name])
+            if embeddable is not None:
+                flags, source = embeddable
+                groups.setdefault(flags, []).append((name, source))
+
+        for flags, members in groups.items():
+            if len(members) < 2:
+                continue
+            try:
+                # Flags are applied to the whole alternation rather than per
+                # branch, which keeps sre's prefix optimisations intact
+                gate = re.compile(
+                    '|'.join(f"(?:{source})" for _, source in members), flags
+                )
+            except re.error as e:
+                self.logger.warning(f"Could not combine patterns, searching separately: {e}")
+                continue
+            for name, _ in members:
+                self._gate_of[name] = len(self._gates)
+            self._gates.append(gate)
+
+        self._separate = [name for name in self.names if name not in self._gate_of]
+
+    def match(self, line: str) -> List[str]:
+        """
+        Find every pattern that matches the line.
+
+        Args:
+            line: Line to match
+
+        Returns:
+            Names of all matching patterns, in configured order
+        """
+        if self._prefilter is not None:
+            candidates = self._prefilter.candidates(line)
+            if len(candidates) < len(self.names):
+                return [name for name in candidates if self._compiled[name].search(line)]
+        return self._match_all(line)
+
+    def _match_all(self, line: str) -> List[str]:
+        """Match the line against every pattern using the combined gates."""
+        if not self._gates:
+            return [name for name in self.names if self._compiled[name].search(line)]
+
+        starts = []
+        for gate in self._gates:
+            hit = gate.search(line)
+            starts.append(None if hit is None else hit.start())
+        if starts.count(None) == len(starts):
+            return [name for name in self._separate if self._compiled[name].search(line)]
+
+        matched = []
+        for name in self.names:
+            gate_index = self._gate_of.get(name)
+            if gate_index is None:
+                if self._compiled[name].search(line):
+                    matched.append(name)
+                continue
+            # No member can match before the leftmost hit of its gate
+            start = starts[gate_index]
+            if start is not None and self._compiled[name].search(line, start):
+                matched.append(name)
+        return matched
@@ -1,11 +1,18 @@
-import smtplib
-import requests
 import logging
+import threading
 import time
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Dict, Callable, Any
+from typing import TYPE_CHECKING, Dict, Callable, Any, Optional, Tuple
 from functools import wraps
+from urllib.parse import urlsplit
+
+from .events import render
+from .token_bucket import TokenBucketLimiter
+
+if TYPE_CHECKING:
+    import requests
+
+# Channels delivered over HTTP with requests
+WEBHOOK_CHANNELS = ('slack', 'teams', 'telegram')
 
 def retry_on_exception(max_retries: int = 3, delay: float = 1.0):
     """Decorator for retrying operations that might fail temporarily."""
@@ -35,6 +42,39 @@ class NotificationManager:
             'teams': self.send_teams,
             'telegram': self.send_telegram
         }
+        # One keep-alive session per webhook host
+        self.pool_size = 10
+        self._sessions: Dict[str, 'requests.Session'] = {}
+        self._sessions_lock = threading.Lock()
+
+        self.channel_limiter = TokenBucketLimiter.for_channels(config)
+        # Set by LogWatcher when metrics are enabled
+        self.instrumentation = None
+        # Outcome of real webhook sends, used by health checks instead of probing:
+        # channel -> time of the last success / (time, error) of the last failure
+        self.last_success: Dict[str, float] = {}
+        self.last_failure: Dict[str, Tuple[float, str]] = {}
+
+        notifications = config.get('notifications', {})
+        if any(notifications.get(channel, {}).get('enabled', False) for channel in WEBHOOK_CHANNELS):
+            # Imported now rather than delaying the first alert
+            import requests.adapters  # noqa: F401
+
+        self.smtp_session = None
+        self.email_batcher = None
+        email_config = notifications.get('email', {})
+        if email_config.get('enabled', False):
+            from .smtp_session import EmailBatcher, SMTPSession
+
+            self.smtp_session = SMTPSession(email_config)
+            if email_config.get('batch_window', 2) > 0:
+                self.email_batcher = EmailBatcher(
+                    self.smtp_session,
+                    email_config,
+                    window=email_config.get('batch_window', 2),
+                    max_batch=email_config.get('max_batch', 100),
+                    max_retries=config.get('settings', {}).get('max_retries', 3)
+                )
 
     def notify(self, pattern_name: str, message: str) -> None:
         """
@@ -51,93 +91,225 @@ class NotificationManager:
         for method in self.config['notification_rules'][pattern_name]:
             if (method in self.config['notifications'] and 
                 self.config['notifications'][method].get('enabled', False)):
+                if not self.channel_allowed(method):
+                    continue
                 try:
                     self.notifiers[method](message)
                     self.logger.debug(f"Successfully sent {method} notification for {pattern_name}")
                 except Exception as e:
                     self.logger.error(f"Failed to send {method} notification: {str(e)}")
 
-    @retry_on_exception()
-    def send_email(self, message: str) -> None:
-        """Send email notification with retry logic."""
+    def channel_allowed(self, method: str) -> bool:
+        """
+        Check the per channel rate limit from rate_limits.channels.
+
+        Args:
+            method: Notification channel name
+
+        Returns:
+            True if the channel may send now
+        """
+        if self.channel_limiter is None or self.channel_limiter.can_send(method, method):
+            return True
+        self.logger.warning(f"Channel rate limit reached, not sending {method} notification")
+        return False
+
+    def deliver(self, method: str, message: str, token: Any = None) -> None:
+        """
+        Send a notification through a single channel, without retries.
+
+        Batched email is only queued here; its outcome is reported to
+        email_batcher.on_result together with the token.
+
+        Args:
+            method: Notification channel name
+            message: Message or match event to send
+            token: Identifies the notification to the batch result handler
+        """
+        # Rendered once per event however many channels send it
+        message = render(message, 'text')
+        start = time.perf_counter()
+        try:
+            if method == 'email':
+                self._deliver_email(message, token)
+                return
+            url, payload = self.build_request(method, message)
+            timeout = self.config['notifications'][method].get('timeout', 10)
+            try:
+                response = self._session_for(url).post(url, json=payload, timeout=timeout)
+                response.raise_for_status()
+            except Exception as e:
+                self.last_failure[method] = (time.time(), str(e))
+                raise
+            self.last_success[method] = time.time()
+        finally:
+            if self.instrumentation is not None:
+                self.instrumentation.observe('notify', time.perf_counter() - start, method)
+
+    def build_request(self, method: str, message: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the URL and JSON payload for a webhook based channel.
+
+        Args:
+            method: Notification channel name
+            message: Message to send
+
+        Returns:
+            Tuple of (url, payload)
+        """
+        channel_config = self.config['notifications'][method]
+        if method == 'slack':
+            return channel_config['webhook_url'], {
+                'text': message,
+                'username': 'LogWatcher',
+                'icon_emoji': ':warning:'
+            }
+        if method == 'teams':
+            return channel_config['webhook_url'], {
+                '@type': 'MessageCard',
+                '@context': 'http://schema.org/extensions',
+                'themeColor': 'FF0000',
+                'summary': 'LogWatcher Alert',
+                'sections': [{
+                    'activityTitle': 'LogWatcher Alert',
+                    'activitySubtitle': 'Pattern match detected',
+                    'text': message
+                }]
+            }
+        if method == 'telegram':
+            url = f"https://api.telegram.org/bot{channel_config['bot_token']}/sendMessage"
+            return url, {
+                'chat_id': channel_config['chat_id'],
+                'text': f"🚨 *LogWatcher Alert*\n\n{message}",
+                'parse_mode': 'Markdown'
+            }
+        raise ValueError(f"Unknown webhook channel: {method}")
+
+    def _session_for(self, url: str) -> 'requests.Session':
+        """Get the keep-alive session for the host of a URL."""
+        import requests.adapters
+
+        host = urlsplit(url).netloc
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def close(self) -> None:
+        """Flush queued email and close pooled connections."""
+        if self.email_batcher is not None:
+            self.email_batcher.stop()
+        if self.smtp_session is not None:
+            self.smtp_session.close()
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def _deliver_email(self, message: str, token: Any = None) -> None:
+        """Send an email notification, batched with others if enabled."""
+        if self.email_batcher is not None:
+            self.email_batcher.add(message, token=token)
+            return
+
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
         email_config = self.config['notifications']['email']
         msg = MIMEMultipart()
         msg['From'] = email_config['username']
         msg['To'] = ', '.join(email_config['to_address'])
         msg['Subject'] = f"LogWatcher Alert"
         msg.attach(MIMEText(message, 'plain'))
+        self.smtp_session.send(msg)
 
-        with smtplib.SMTP(email_config['smtp_server'], email_config['smtp_port']) as server:
-            server.starttls()
-            server.login(email_config['username'], email_config['password'])
-            server.send_message(msg)
+    @retry_on_exception()
+    def send_email(self, message: str) -> None:
+        """Send email notification with retry logic."""
+        self.deliver('email', message)
 
     @retry_on_exception()
     def send_slack(self, message: str) -> None:
         """Send Slack notification with retry logic."""
-        slack_config = self.config['notifications']['slack']
-        payload = {
-            'text': message,
-            'username': 'LogWatcher',
-            'icon_emoji': ':warning:'
-        }
-        response = requests.post(slack_config['webhook_url'], json=payload)
-        response.raise_for_status()
+        self.deliver('slack', message)
 
     @retry_on_exception()
     def send_teams(self, message: str) -> None:
         """Send Microsoft Teams notification with retry logic."""
-        teams_config = self.config['notifications']['teams']
-        payload = {
-            '@type': 'MessageCard',
-            '@context': 'http://schema.org/extensions',
-            'themeColor': 'FF0000',
-            'summary': 'LogWatcher Alert',
-            'sections': [{
-                'activityTitle': 'LogWatcher Alert',
-                'activitySubtitle': 'Pattern match detected',
-                'text': message
-            }]
-        }
-        response = requests.post(teams_config['webhook_url'], json=payload)
-        response.raise_for_status()
+        self.deliver('teams', message)
 
     @retry_on_exception()
     def send_telegram(self, message: str) -> None:
         """Send Telegram notification with retry logic."""
-        telegram_config = self.config['notifications']['telegram']
-        url = f"https://api.telegram.org/bot{telegram_config['bot_token']}/sendMessage"
-        payload = {
-            'chat_id': telegram_config['chat_id'],
-            'text': f"🚨 *LogWatcher Alert*\n\n{message}",
-            'parse_mode': 'Markdown'
-        }
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
+        self.deliver('telegram', message)
+
+    def passive_status(self, service: str, max_age: float) -> Optional[str]:
+        """
+        Health of a channel judged from its real sends.
+
+        Args:
+            service: Notification channel name
+            max_age: Seconds after which a send says nothing anymore
+
+        Returns:
+            "OK" or "ERROR: <reason>" after the latest recent send, or None
+            if the channel has not sent within max_age
+        """
+        if service == 'email':
+            if self.smtp_session is None:
+                return None
+            success = self.smtp_session.last_success
+            failure = self.smtp_session.last_failure
+        else:
+            success = self.last_success.get(service)
+            failure = self.last_failure.get(service)
+
+        if failure is not None and (success is None or failure[0] > success):
+            if time.time() - failure[0] <= max_age:
+                return f"ERROR: {failure[1]}"
+        elif success is not None and time.time() - success <= max_age:
+            return "OK"
+        return None
+
+    def probe(self, service: str, timeout: float = 10.0) -> str:
+        """
+        Actively check that a channel is reachable.
+
+        Args:
+            service: Notification channel name
+            timeout: Seconds to wait for a webhook response
+
+        Returns:
+            "OK" or "ERROR: <reason>"
+        """
+        config = self.config['notifications'].get(service, {})
+        try:
+            # Perform a lightweight check specific to each service
+            if service == 'email':
+                # NOOP on the shared session instead of a new handshake
+                self.smtp_session.check()
+            elif service in ['slack', 'teams']:
+                url = config['webhook_url']
+                self._session_for(url).head(url, timeout=timeout).raise_for_status()
+            elif service == 'telegram':
+                url = f"https://api.telegram.org/bot{config['bot_token']}/getMe"
+                self._session_for(url).get(url, timeout=timeout).raise_for_status()
+            return "OK"
+        except Exception as e:
+            return f"ERROR: {str(e)}"
 
     def check_health(self) -> Dict[str, Any]:
         """Check the health status of all enabled notification services."""
         status = {}
-        for service, handler in self.notifiers.items():
+        for service in self.notifiers:
             config = self.config['notifications'].get(service, {})
             if config.get('enabled', False):
-                try:
-                    # Perform a lightweight check specific to each service
-                    if service == 'email':
-                        with smtplib.SMTP(config['smtp_server'], config['smtp_port']) as server:
-                            server.starttls()
-                            server.login(config['username'], config['password'])
-                        status[service] = "OK"
-                    elif service in ['slack', 'teams']:
-                        requests.head(config['webhook_url']).raise_for_status()
-                        status[service] = "OK"
-                    elif service == 'telegram':
-                        url = f"https://api.telegram.org/bot{config['bot_token']}/getMe"
-                        requests.get(url).raise_for_status()
-                        status[service] = "OK"
-                except Exception as e:
-                    status[service] = f"ERROR: {str(e)}"
+                status[service] = self.probe(service)
             else:
                 status[service] = "DISABLED"
-        
-        return status
\ No newline at end of file
+        return status
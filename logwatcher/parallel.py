@@ -0,0 +1,114 @@
+import re
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Pattern, Sequence, Tuple
+
+from .matcher import PatternMatcher
+
+# Match results for a batch: (index of the line in the batch, matching pattern names)
+BatchResult = List[Tuple[int, List[str]]]
+
+# Per-process state of pool workers
+_worker_patterns: Dict[str, Pattern] = {}
+_worker_matchers: Dict[Tuple[str, ...], PatternMatcher] = {}
+
+
+def _init_worker(pattern_sources: Dict[str, Tuple[str, int]]) -> None:
+    """Compile the configured patterns once per worker process."""
+    _worker_patterns.clear()
+    _worker_matchers.clear()
+    for name, (source, flags) in pattern_sources.items():
+        _worker_patterns[name] = re.compile(source, flags)
+
+
+def _match_batch(names: Tuple[str, ...], lines: List[str]) -> BatchResult:
+    """Match a batch of lines in a worker process."""
+    matcher = _worker_matchers.get(names)
+    if matcher is None:
+        matcher = _worker_matchers[names] = PatternMatcher(_worker_patterns, names)
+    return _match_lines(matcher, lines)
+
+
+def _match_lines(matcher: PatternMatcher, lines: List[str]) -> BatchResult:
+    """Collect the matches of a batch, skipping lines that match nothing."""
+    results = []
+    for index, line in enumerate(lines):
+        matched = matcher.match(line)
+        if matched:
+            results.append((index, matched))
+    return results
+
+
+def _batched(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Group lines into lists of at most size lines."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ParallelMatcher:
+    """Matches batches of lines in a pool of worker processes."""
+
+    def __init__(self, patterns: Dict[str, Pattern], workers: int, batch_size: int = 2000):
+        """
+        Initialize the ParallelMatcher.
+
+        Args:
+            patterns: Mapping of pattern name to compiled pattern
+            workers: Number of worker processes
+            batch_size: Number of lines sent to a worker at a time
+        """
+        self.logger = logging.getLogger("ParallelMatcher")
+        self.workers = workers
+        self.batch_size = batch_size
+        # Enough batches in flight to keep every worker busy while the
+        # parent consumes results in order
+        self.max_in_flight = workers * 2
+        sources = {name: (p.pattern, p.flags) for name, p in patterns.items()}
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(sources,)
+        )
+
+    def match(self, names: Sequence[str], lines: Iterable[str],
+              local_matcher: PatternMatcher) -> Iterator[Tuple[List[str], BatchResult]]:
+        """
+        Match lines of one file across the pool, preserving their order.
+
+        A read that fits in a single partial batch is matched in-process, as
+        shipping it to a worker would cost more than matching it.
+
+        Args:
+            names: Pattern names assigned to the file
+            lines: Lines to match
+            local_matcher: Matcher used for small reads
+
+        Yields:
+            (batch, results) tuples in the order the lines were read
+        """
+        names = tuple(names)
+        pending = deque()
+        for batch in _batched(lines, self.batch_size):
+            if not pending and len(batch) < self.batch_size:
+                # Last batch of the read and nothing queued before it
+                yield batch, _match_lines(local_matcher, batch)
+                continue
+            pending.append((batch, self._pool.submit(_match_batch, names, batch)))
+            if len(pending) >= self.max_in_flight:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+
+        while pending:
+            batch, future = pending.popleft()
+            yield batch, future.result()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        self._pool.shutdown(wait=True)
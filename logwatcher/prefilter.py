@@ -0,0 +1,250 @@
+import re
+from typing import Dict, FrozenSet, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+
+# A required literal: (text, case_insensitive). Case-insensitive text is lowercased.
+Literal = Tuple[str, bool]
+
+_REPEATS = tuple(
+    op for op in (
+        sre_parse.MAX_REPEAT,
+        sre_parse.MIN_REPEAT,
+        getattr(sre_parse, 'POSSESSIVE_REPEAT', None),
+    ) if op is not None
+)
+_ATOMIC_GROUP = getattr(sre_parse, 'ATOMIC_GROUP', None)
+# Non-ASCII characters that IGNORECASE matches to ASCII letters:
+# U+0130 and U+0131 to "i", U+017F to "s", U+212A (Kelvin sign) to "k"
+_ASCII_FOLDS = {'\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u212a': 'k'}
+
+
+def _score(literals: FrozenSet[Literal]) -> Tuple[int, int]:
+    """Rank a literal set: longer shortest literal first, then fewer alternatives."""
+    return min(len(text) for text, _ in literals), -len(literals)
+
+
+def _required(parsed, fold: bool) -> Optional[FrozenSet[Literal]]:
+    """
+    Find a set of literals of which at least one appears in every match.
+
+    Args:
+        parsed: Parsed pattern sequence
+        fold: Whether the sequence is matched case-insensitively
+
+    Returns:
+        Literal set, or None if no such set could be derived
+    """
+    best: Optional[FrozenSet[Literal]] = None
+    run: List[str] = []
+
+    def consider(candidate: Optional[FrozenSet[Literal]]) -> None:
+        nonlocal best
+        if candidate and (best is None or _score(candidate) > _score(best)):
+            best = candidate
+
+    def flush() -> None:
+        if run:
+            text = ''.join(run)
+            # Unicode case folding can map non-ASCII text onto ASCII and back,
+            # so only ASCII literals are trusted in case-insensitive mode
+            if not fold:
+                consider(frozenset([(text, False)]))
+            elif text.isascii():
+                consider(frozenset([(text.lower(), True)]))
+            run.clear()
+
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        flush()
+        if op is sre_parse.SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            sub_fold = (fold or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+            consider(_required(sub, sub_fold))
+        elif op is sre_parse.BRANCH:
+            alternatives = [_required(branch, fold) for branch in av[1]]
+            if all(alternatives):
+                consider(frozenset().union(*alternatives))
+        elif op in _REPEATS:
+            low, _, sub = av
+            if low >= 1:
+                consider(_required(sub, fold))
+        elif op is sre_parse.ASSERT:
+            consider(_required(av[1], fold))
+        elif _ATOMIC_GROUP is not None and op is _ATOMIC_GROUP:
+            consider(_required(av, fold))
+    flush()
+    return best
+
+
+# (pattern, flags) -> required_literals() result, also filled from the config cache
+_literals_cache: Dict[Tuple[str, int], Optional[FrozenSet[Literal]]] = {}
+
+
+def required_literals(compiled: Pattern) -> Optional[FrozenSet[Literal]]:
+    """
+    Extract the literals a pattern cannot match without.
+
+    Args:
+        compiled: Compiled pattern
+
+    Returns:
+        Set of (text, case_insensitive) literals, at least one of which occurs
+        in every matching line, or None if the pattern has no such literals
+    """
+    if not isinstance(compiled.pattern, str):
+        return None
+    key = (compiled.pattern, compiled.flags)
+    if key not in _literals_cache:
+        try:
+            parsed = sre_parse.parse(compiled.pattern, compiled.flags & ~re.UNICODE)
+        except Exception:
+            _literals_cache[key] = None
+        else:
+            _literals_cache[key] = _required(parsed, bool(compiled.flags & re.IGNORECASE))
+    return _literals_cache[key]
+
+
+def _alternation(literals, flags: int = 0) -> Optional[Pattern]:
+    """Compile a set of literal strings into a single alternation."""
+    if not literals:
+        return None
+    ordered = sorted(literals, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(text) for text in ordered), flags)
+
+
+class LiteralPrefilter:
+    """Index of required literals used to skip regex evaluation for a line."""
+
+    def __init__(self, patterns: Dict[str, Pattern], names: Sequence[str]):
+        """
+        Initialize the LiteralPrefilter.
+
+        Args:
+            patterns: Mapping of pattern name to compiled pattern
+            names: Pattern names to index, in firing order
+        """
+        self.names = [name for name in names if name in patterns]
+        self.literals = {name: required_literals(patterns[name]) for name in self.names}
+        # Patterns without required literals are always candidates
+        self.always = tuple(name for name in self.names if self.literals[name] is None)
+
+        exact = set()
+        folded = set()
+        for literals in self.literals.values():
+            for text, fold in literals or ():
+                (folded if fold else exact).add(text)
+
+        self._exact_literals = sorted(exact)
+        self._folded_literals = sorted(folded)
+        self._fold_chars = [char for char, letter in _ASCII_FOLDS.items()
+                            if any(letter in text for text in folded)]
+        self._exact_gate = _alternation(exact)
+        # Lowercasing an ASCII line and searching case-sensitively is
+        # equivalent to IGNORECASE and lets sre use its fast literal scan
+        self._folded_gate = _alternation(folded)
+        self._unicode_gate = _alternation(folded, re.IGNORECASE)
+
+    @property
+    def selective(self) -> bool:
+        """Whether the prefilter can rule out any pattern at all."""
+        return len(self.always) < len(self.names)
+
+    @property
+    def complete(self) -> bool:
+        """Whether line_spans() can be used: every pattern has ASCII required literals."""
+        return bool(self.names) and not self.always and all(
+            text.isascii() for literals in self.literals.values() for text, _ in literals
+        )
+
+    def line_spans(self, data: bytes, encoding: str) -> Iterator[Tuple[int, int]]:
+        """
+        Find the lines of encoded text that may contain a required literal.
+
+        Each literal is located with bytes.find over the whole block, which
+        is far faster than searching line by line; only the lines found
+        need to be decoded and matched. Requires complete.
+
+        Args:
+            data: Lines separated by b"\\n", in an ASCII-compatible encoding
+            encoding: Encoding of data
+
+        Yields:
+            (start, end) byte offsets of each such line, without its newline,
+            in order
+        """
+        spans = set()
+
+        def add(pos: int) -> int:
+            start = data.rfind(b'\n', 0, pos) + 1
+            end = data.find(b'\n', pos)
+            if end == -1:
+                end = len(data)
+            spans.add((start, end))
+            return end + 1
+
+        searches = [(data, [text.encode('ascii') for text in self._exact_literals])]
+        if self._folded_literals:
+            # bytes.lower() only folds ASCII, so offsets are unchanged
+            searches.append((data.lower(), [text.encode('ascii') for text in self._folded_literals]))
+            # IGNORECASE also equates a few non-ASCII characters with ASCII
+            # letters; lines containing them are left to the matcher
+            for char in self._fold_chars:
+                try:
+                    encoded = char.encode(encoding)
+                except UnicodeEncodeError:
+                    continue
+                pos = data.find(encoded)
+                while pos != -1:
+                    pos = data.find(encoded, add(pos))
+
+        for haystack, literals in searches:
+            for literal in literals:
+                pos = haystack.find(literal)
+                while pos != -1:
+                    pos = haystack.find(literal, add(pos))
+        yield from sorted(spans)
+
+    def candidates(self, line: str) -> Sequence[str]:
+        """
+        Get the patterns that might match the line.
+
+        Args:
+            line: Line to check
+
+        Returns:
+            Names of candidate patterns, in firing order
+        """
+        ascii_line = line.isascii()
+        lowered = line.lower() if ascii_line else None
+
+        hit = self._exact_gate is not None and self._exact_gate.search(line) is not None
+        if not hit and self._folded_gate is not None:
+            if ascii_line:
+                hit = self._folded_gate.search(lowered) is not None
+            else:
+                hit = self._unicode_gate.search(line) is not None
+        if not hit:
+            return self.always
+
+        candidates = []
+        for name in self.names:
+            literals = self.literals[name]
+            if literals is None:
+                candidates.append(name)
+                continue
+            for text, fold in literals:
+                if not fold:
+                    found = text in line
+                else:
+                    # Non-ASCII lines are left to the regex itself
+                    found = not ascii_line or text in lowered
+                if found:
+                    candidates.append(name)
+                    break
+        return candidates
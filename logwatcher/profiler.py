@@ -0,0 +1,310 @@
+import re
+import json
+import time
+import logging
+import argparse
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+
+from .config_validator import validate_config
+from .matcher import PatternMatcher
+
+_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+
+
+def _nested_repeat(parsed, inside_repeat: bool = False) -> bool:
+    """Find an unbounded repeat nested in another unbounded repeat, e.g. (a+)+."""
+    for op, av in parsed:
+        if op in _REPEATS:
+            unbounded = av[1] == sre_parse.MAXREPEAT
+            if unbounded and inside_repeat:
+                return True
+            if _nested_repeat(av[2], inside_repeat or unbounded):
+                return True
+        elif op is sre_parse.SUBPATTERN:
+            if _nested_repeat(av[-1], inside_repeat):
+                return True
+        elif op is sre_parse.BRANCH:
+            if any(_nested_repeat(branch, inside_repeat) for branch in av[1]):
+                return True
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            if _nested_repeat(av[1], inside_repeat):
+                return True
+    return False
+
+
+def backtracking_risk(compiled: Pattern) -> bool:
+    """
+    Check a pattern for nested unbounded repeats.
+
+    Such patterns, e.g. "(\\w+\\s?)+$", can take exponential time on lines
+    that almost match. A heuristic: not every flagged pattern is slow.
+    """
+    try:
+        return _nested_repeat(sre_parse.parse(compiled.pattern, compiled.flags))
+    except Exception:
+        return False
+
+
+class PatternStats:
+    """Sampled search times of one pattern."""
+
+    __slots__ = ('samples', 'total', 'worst', 'worst_line', 'flagged')
+
+    def __init__(self):
+        self.samples = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.worst_line = ''
+        self.flagged = False
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.samples if self.samples else 0.0
+
+
+class PatternProfiler:
+    """
+    Samples the search time of each pattern on its own.
+
+    The combined matcher scans all patterns of a file at once, so the cost
+    of a single pattern is only visible by running it separately on a
+    sample of the lines.
+    """
+
+    def __init__(self, patterns: Dict[str, Pattern], sample_rate: int = 1000,
+                 slow_threshold: float = 0.01, report_interval: float = 300.0):
+        """
+        Initialize the PatternProfiler.
+
+        Args:
+            patterns: Compiled patterns by name
+            sample_rate: Profile one line in this many
+            slow_threshold: Seconds for a single search that flag a pattern
+            report_interval: Seconds between logged rankings, 0 to disable
+        """
+        self.patterns = patterns
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.report_interval = report_interval
+        self.logger = logging.getLogger("PatternProfiler")
+        self.stats: Dict[str, PatternStats] = {name: PatternStats() for name in patterns}
+        self._countdown = sample_rate
+        self._next_report = time.monotonic() + report_interval
+
+        for name, compiled in patterns.items():
+            if backtracking_risk(compiled):
+                self.logger.warning(
+                    f"Pattern '{name}' nests unbounded repeats and may backtrack catastrophically"
+                )
+
+    def reset_patterns(self, changed: Dict[str, Pattern], removed: Iterable[str]) -> None:
+        """
+        Restart the stats of patterns changed by a config reload.
+
+        Args:
+            changed: Newly compiled patterns, already in self.patterns
+            removed: Names of patterns no longer configured
+        """
+        for name in removed:
+            self.stats.pop(name, None)
+        for name, compiled in changed.items():
+            self.stats[name] = PatternStats()
+            if backtracking_risk(compiled):
+                self.logger.warning(
+                    f"Pattern '{name}' nests unbounded repeats and may backtrack catastrophically"
+                )
+
+    def sampled(self, lines: Iterable[str], names: Sequence[str]) -> Iterator[str]:
+        """
+        Pass lines through, profiling the given patterns on a sample of them.
+
+        Args:
+            lines: Lines being matched
+            names: Patterns applied to the lines
+        """
+        countdown = self._countdown
+        for line in lines:
+            countdown -= 1
+            if not countdown:
+                countdown = self.sample_rate
+                self.profile_line(line, names)
+            yield line
+        self._countdown = countdown
+
+    def profile_line(self, line: str, names: Sequence[str]) -> None:
+        """Time each pattern on one line."""
+        for name in names:
+            if name not in self.patterns:
+                # Field rules are not profiled
+                continue
+            search = self.patterns[name].search
+            start = time.thread_time()
+            search(line)
+            elapsed = time.thread_time() - start
+            stats = self.stats[name]
+            stats.samples += 1
+            stats.total += elapsed
+            if elapsed > stats.worst:
+                stats.worst = elapsed
+                stats.worst_line = line[:200]
+                if elapsed >= self.slow_threshold and not stats.flagged:
+                    stats.flagged = True
+                    self.logger.warning(
+                        f"Pattern '{name}' took {elapsed * 1000:.1f}ms on one line: {line[:200]!r}"
+                    )
+
+    def estimated_seconds(self, name: str) -> float:
+        """CPU time the pattern has likely used in total, scaled from the samples."""
+        return self.stats[name].total * self.sample_rate
+
+    def ranking(self) -> List[tuple]:
+        """(name, stats) of the sampled patterns, most expensive per line first."""
+        return sorted(
+            ((name, stats) for name, stats in self.stats.items() if stats.samples),
+            key=lambda item: item[1].mean, reverse=True
+        )
+
+    def slow_patterns(self) -> List[str]:
+        """Names of patterns whose worst search exceeded the threshold."""
+        return [name for name, stats in self.stats.items() if stats.flagged]
+
+    def maybe_report(self) -> None:
+        """Log the ranking if the report interval has passed."""
+        if not self.report_interval or time.monotonic() < self._next_report:
+            return
+        self._next_report = time.monotonic() + self.report_interval
+        ranking = self.ranking()
+        if not ranking:
+            return
+        self.logger.info("Pattern cost per line: " + ", ".join(
+            f"{name}={stats.mean * 1e6:.1f}us (worst {stats.worst * 1e6:.0f}us)"
+            for name, stats in ranking[:10]
+        ))
+
+
+def profile_file(patterns: Dict[str, Pattern], lines: List[str],
+                 file_patterns: Dict[str, List[str]], threshold: float) -> Dict[str, Any]:
+    """
+    Time every pattern, and every file's combined matcher, on all lines.
+
+    Args:
+        patterns: Compiled patterns by name
+        lines: Sample lines
+        file_patterns: Pattern names per watched file
+        threshold: Seconds for a single search that flag a pattern
+
+    Returns:
+        Report with per-pattern and per-file results
+    """
+    nbytes = sum(len(line) for line in lines) + len(lines)
+    report: Dict[str, Any] = {'lines': len(lines), 'bytes': nbytes, 'patterns': [], 'files': []}
+    clock = time.perf_counter
+
+    for name, compiled in patterns.items():
+        search = compiled.search
+        matches = 0
+        start = clock()
+        for line in lines:
+            if search(line):
+                matches += 1
+        total = clock() - start
+
+        # Separate pass, so timing each line does not skew the throughput
+        worst = 0.0
+        worst_line = ''
+        for line in lines:
+            before = clock()
+            search(line)
+            elapsed = clock() - before
+            if elapsed > worst:
+                worst, worst_line = elapsed, line
+        report['patterns'].append({
+            'pattern': name,
+            'matches': matches,
+            'seconds': total,
+            'lines_per_sec': len(lines) / total if total else None,
+            'mb_per_sec': nbytes / 1e6 / total if total else None,
+            'mean_us': total / len(lines) * 1e6 if lines else 0.0,
+            'worst_us': worst * 1e6,
+            'worst_line': worst_line[:200],
+            'slow': worst >= threshold,
+            'backtracking_risk': backtracking_risk(compiled),
+        })
+    report['patterns'].sort(key=lambda entry: entry['mean_us'], reverse=True)
+
+    for filename, names in file_patterns.items():
+        names = [name for name in names if name in patterns]
+        matcher = PatternMatcher(patterns, names)
+        start = clock()
+        for line in lines:
+            matcher.match(line)
+        total = clock() - start
+        report['files'].append({
+            'file': filename,
+            'patterns': names,
+            'lines_per_sec': len(lines) / total if total else None,
+            'mb_per_sec': nbytes / 1e6 / total if total else None,
+        })
+    return report
+
+
+def _print_report(report: Dict[str, Any], threshold: float) -> None:
+    print(f"{report['lines']:,} lines, {report['bytes'] / 1e6:.1f} MB\n")
+    print(f"{'pattern':<24} {'lines/s':>12} {'MB/s':>8} {'mean us':>9} {'worst us':>10} "
+          f"{'matches':>9}  notes")
+    for entry in report['patterns']:
+        notes = []
+        if entry['slow']:
+            notes.append(f"SLOW (>= {threshold * 1000:g}ms on one line)")
+        if entry['backtracking_risk']:
+            notes.append("nested repeats")
+        print(f"{entry['pattern']:<24} {entry['lines_per_sec'] or 0:>12,.0f} "
+              f"{entry['mb_per_sec'] or 0:>8.1f} {entry['mean_us']:>9.2f} "
+              f"{entry['worst_us']:>10.0f} {entry['matches']:>9,}  {', '.join(notes)}")
+    if report['files']:
+        print(f"\n{'file (combined matcher)':<48} {'lines/s':>12} {'MB/s':>8}")
+        for entry in report['files']:
+            print(f"{entry['file']:<48} {entry['lines_per_sec'] or 0:>12,.0f} "
+                  f"{entry['mb_per_sec'] or 0:>8.1f}")
+
+
+def profile_main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of `logwatcher profile-patterns`."""
+    parser = argparse.ArgumentParser(
+        prog='logwatcher profile-patterns',
+        description="Measure the cost of each configured pattern on a sample log"
+    )
+    parser.add_argument('config', help="Path to config file")
+    parser.add_argument('sample', help="Sample log file")
+    parser.add_argument('--max-lines', type=int, default=0, help="Only use the first N lines")
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="Seconds for one search that flag a pattern as slow "
+                             "(default: settings.profile_slow_threshold or 0.01)")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    validate_config(config)
+    settings = config['settings']
+    threshold = args.threshold
+    if threshold is None:
+        threshold = settings.get('profile_slow_threshold', 0.01)
+
+    patterns = {name: re.compile(source) for name, source in config['patterns'].items()}
+    with open(args.sample, 'r', encoding=settings.get('encoding', 'utf-8'), errors='replace') as f:
+        lines = f.read().splitlines()
+    if args.max_lines:
+        lines = lines[:args.max_lines]
+
+    report = profile_file(patterns, lines, config['file_patterns'], threshold)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report, threshold)
+    return 1 if any(entry['slow'] for entry in report['patterns']) else 0
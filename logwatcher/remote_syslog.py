@@ -6,6 +6,9 @@ import time
 from typing import Dict, Optional
 from datetime import datetime
 
+from .events import render
+from .syslog_forwarder import SyslogForwarder
+
 class RemoteSyslogManager:
     """Enhanced Remote Syslog Manager with connection management and retry logic."""
     
@@ -31,12 +34,38 @@ class RemoteSyslogManager:
         self._last_error: Optional[str] = None
         self._error_count = 0
         self._last_successful_send: Optional[datetime] = None
+        self._forwarder: Optional[SyslogForwarder] = None
         
         if not self.enabled:
             return
 
+        if self.config.get('mode', 'handler') == 'forwarder':
+            self._initialize_forwarder()
+            return
+
         self._initialize_handler()
 
+    def _initialize_forwarder(self) -> None:
+        """Start the background forwarder used instead of a SysLogHandler."""
+        facility = self.config.get('facility', 'local0')
+        if facility not in self.FACILITIES:
+            self.logger.warning(f"Invalid facility {facility}, defaulting to local0")
+            facility = 'local0'
+
+        self._forwarder = SyslogForwarder(
+            self.config['host'],
+            self.config['port'],
+            protocol=self.config.get('protocol', 'udp'),
+            facility=self.FACILITIES[facility],
+            tag=self.config.get('tag', 'logwatcher'),
+            queue_size=self.config.get('queue_size', 10_000),
+            batch_size=self.config.get('batch_size', 500),
+            backoff_max=self.config.get('reconnect_backoff_max', 30),
+            max_message_size=self.config.get('max_message_size', 8192),
+            max_retries=self.config.get('max_retries', 5)
+        )
+        self._forwarder.start()
+
     def _initialize_handler(self) -> None:
         """Initialize or reinitialize the syslog handler."""
         try:
@@ -79,7 +108,7 @@ class RemoteSyslogManager:
         Send a message to the remote syslog with retry logic.
         
         Args:
-            message: Message to send
+            message: Message or match event to send
             level: Logging level
             max_retries: Maximum number of retry attempts
             
@@ -89,6 +118,11 @@ class RemoteSyslogManager:
         if not self.enabled:
             return False
 
+        message = render(message, 'syslog')
+        if self._forwarder is not None:
+            # Queued for the sender thread; never blocks on the collector
+            return self._forwarder.enqueue(message, level)
+
         retries = 0
         while retries < max_retries:
             try:
@@ -129,6 +163,20 @@ class RemoteSyslogManager:
         if not self.enabled:
             return {'status': 'disabled'}
 
+        if self._forwarder is not None:
+            forwarder = self._forwarder
+            status = {
+                'status': 'healthy' if forwarder.last_error is None else 'error',
+                'error_count': forwarder.error_count,
+                'last_error': forwarder.last_error,
+                'last_successful_send': (
+                    forwarder.last_successful_send.isoformat()
+                    if forwarder.last_successful_send else None
+                )
+            }
+            status.update(forwarder.get_status())
+            return status
+
         status = {
             'status': 'healthy' if self._last_error is None else 'error',
             'error_count': self._error_count,
@@ -141,6 +189,16 @@ class RemoteSyslogManager:
 
         return status
 
+    def close(self) -> None:
+        """Stop the forwarder, sending what is queued, and close the handler."""
+        self.enabled = False
+        if self._forwarder is not None:
+            self._forwarder.stop()
+            self._forwarder = None
+        if self._handler:
+            self._handler.close()
+            self._handler = None
+
     def __del__(self):
         """Cleanup handler on deletion."""
         if self._handler:
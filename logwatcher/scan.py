@@ -0,0 +1,407 @@
+import os
+import re
+import sys
+import glob
+import json
+import mmap
+import time
+import zlib
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .config_validator import validate_config
+from .dispatch_table import FileDispatchTable
+from .field_rules import FieldMatcher, FieldRule, compile_rules
+from .matcher import PatternMatcher
+from .parallel import _init_worker, _worker_patterns
+from .prefilter import LiteralPrefilter
+from .tail_reader import _splits_on_newline_byte
+
+# (line number within the block, byte offset within the block, pattern names, line)
+Hit = Tuple[int, Optional[int], List[str], str]
+
+# Suffixes added by log rotation: app.log.1, app.log.2.gz, app.log-20240101
+_ROTATION_SUFFIX = re.compile(r'(\.gz|\.\d+|[-.]\d{8,14})$')
+
+Scanner = Tuple[Union[PatternMatcher, FieldMatcher], Optional[LiteralPrefilter]]
+
+# Per-process field rules and matchers of scan workers
+_worker_rules: Dict[str, FieldRule] = {}
+_scanners: Dict[Tuple[str, ...], Scanner] = {}
+
+
+def _init_scan_worker(pattern_sources: Dict[str, Tuple[str, int]],
+                      field_rules: Dict[str, Any]) -> None:
+    """Compile the configured patterns and field rules once per worker process."""
+    _init_worker(pattern_sources)
+    _worker_rules.clear()
+    _worker_rules.update(compile_rules(field_rules, pattern_sources))
+    _scanners.clear()
+
+
+def _scanner(names: Tuple[str, ...]) -> Scanner:
+    scanner = _scanners.get(names)
+    if scanner is None and any(name in _worker_rules for name in names):
+        # Lines of JSON files are checked one by one
+        scanner = _scanners[names] = (FieldMatcher(_worker_rules, _worker_patterns, names), None)
+    if scanner is None:
+        prefilter = LiteralPrefilter(_worker_patterns, names)
+        scanner = _scanners[names] = (
+            PatternMatcher(_worker_patterns, names),
+            prefilter if prefilter.complete else None
+        )
+    return scanner
+
+
+def _all_spans(data: bytes) -> Iterator[Tuple[int, int]]:
+    lines = data.split(b'\n')
+    if not lines[-1]:
+        # Nothing follows the last newline
+        lines.pop()
+    start = 0
+    for line in lines:
+        yield start, start + len(line)
+        start += len(line) + 1
+
+
+def scan_block(data: bytes, names: Tuple[str, ...], encoding: str) -> Tuple[int, List[Hit]]:
+    """
+    Match a block of complete lines of an ASCII-compatible encoding.
+
+    Where every pattern has required literals, the block is searched for
+    them as a whole and only the lines containing one are decoded and
+    matched.
+
+    Args:
+        data: Lines separated by b"\\n"
+        names: Pattern names to apply
+        encoding: Encoding of the block
+
+    Returns:
+        (number of newlines in the block, hits)
+    """
+    matcher, prefilter = _scanner(names)
+    spans = prefilter.line_spans(data, encoding) if prefilter is not None else _all_spans(data)
+    hits: List[Hit] = []
+    line_no = 0
+    counted_to = 0
+    for start, end in spans:
+        line = data[start:end].decode(encoding, errors='replace')
+        if line.endswith('\r'):
+            line = line[:-1]
+        matched = matcher.match(line)
+        if matched:
+            line_no += data.count(b'\n', counted_to, start)
+            counted_to = start
+            hits.append((line_no, start, matched, line))
+    return line_no + data.count(b'\n', counted_to), hits
+
+
+def scan_text(text: str, names: Tuple[str, ...]) -> Tuple[int, List[Hit]]:
+    """
+    Match decoded text, for encodings that cannot be split on newline bytes.
+
+    Returns:
+        (number of newlines in the text, hits without byte offsets)
+    """
+    matcher, _ = _scanner(names)
+    hits: List[Hit] = []
+    lines = text.split('\n')
+    if not lines[-1]:
+        lines.pop()
+    for line_no, line in enumerate(lines):
+        if line.endswith('\r'):
+            line = line[:-1]
+        matched = matcher.match(line)
+        if matched:
+            hits.append((line_no, None, matched, line))
+    return text.count('\n'), hits
+
+
+def _scan_range(path: str, start: int, end: int, names: Tuple[str, ...],
+                encoding: str) -> Tuple[int, List[Hit]]:
+    """
+    Scan the lines of a plain file that start in [start, end).
+
+    Hit offsets are relative to the file, line numbers to the first line
+    of the range.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        size = len(mm)
+        if start:
+            # The line spanning the boundary belongs to the previous range
+            newline = mm.find(b'\n', start - 1)
+            start = size if newline == -1 else newline + 1
+        if start >= min(end, size):
+            return 0, []
+        newline = mm.find(b'\n', end - 1)
+        stop = size if newline == -1 else newline + 1
+        data = mm[start:stop]
+    newlines, hits = scan_block(data, names, encoding)
+    return newlines, [(line, start + offset, matched, text) for line, offset, matched, text in hits]
+
+
+def _scan_gzip(path: str, names: Tuple[str, ...], encoding: str,
+               block_size: int) -> Tuple[int, List[Hit]]:
+    """
+    Scan a gzip file, including files of several concatenated members.
+
+    Offsets are positions in the decompressed data.
+    """
+    if not _splits_on_newline_byte(encoding):
+        with open(path, 'rb') as f:
+            data = next(_decompress(f, None))
+        return scan_text(data.decode(encoding, errors='replace'), names)
+
+    newlines = 0
+    offset = 0
+    hits: List[Hit] = []
+    pending = b''
+    with open(path, 'rb') as f:
+        for chunk in _decompress(f, block_size):
+            pending += chunk
+            cut = pending.rfind(b'\n') + 1
+            if len(pending) < block_size or not cut:
+                continue
+            block, pending = pending[:cut], pending[cut:]
+            count, block_hits = scan_block(block, names, encoding)
+            hits.extend((newlines + line, offset + pos, matched, text)
+                        for line, pos, matched, text in block_hits)
+            newlines += count
+            offset += len(block)
+    if pending:
+        count, block_hits = scan_block(pending, names, encoding)
+        hits.extend((newlines + line, offset + pos, matched, text)
+                    for line, pos, matched, text in block_hits)
+        newlines += count
+    return newlines, hits
+
+
+def _decompress(f, block_size: Optional[int]) -> Iterator[bytes]:
+    """Yield decompressed data of every gzip member, all at once if block_size is None."""
+    # None between members
+    decompressor = None
+    out = []
+    while True:
+        chunk = f.read(1024 * 1024)
+        if not chunk:
+            break
+        while chunk:
+            if decompressor is None:
+                # Zero padding after a member, as block-padded archives have;
+                # skipped like gzip.GzipFile does
+                chunk = chunk.lstrip(b'\0')
+                if not chunk:
+                    break
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            out.append(decompressor.decompress(chunk))
+            if not decompressor.eof:
+                break
+            # Next member, if any
+            chunk = decompressor.unused_data
+            decompressor = None
+        if block_size is not None and sum(map(len, out)) >= block_size:
+            yield b''.join(out)
+            out = []
+    if decompressor is not None:
+        # As gzip.GzipFile reports it, rather than scanning a cut-off archive silently
+        raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+    yield b''.join(out)
+
+
+def _scan_whole(path: str, names: Tuple[str, ...], encoding: str) -> Tuple[int, List[Hit]]:
+    """Scan a plain file whose encoding cannot be split on newline bytes, e.g. UTF-16."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return scan_text(data.decode(encoding, errors='replace'), names)
+
+
+def pattern_names(dispatch: FileDispatchTable, path: str, all_names: Sequence[str]) -> List[str]:
+    """
+    Get the patterns for a file, looking through rotation suffixes.
+
+    app.log.2.gz gets the patterns of app.log; files not covered by
+    file_patterns get every pattern.
+    """
+    base = path
+    while True:
+        names = dispatch.resolve(base)
+        if names is not None:
+            return list(names)
+        stripped = _ROTATION_SUFFIX.sub('', base)
+        if stripped == base:
+            return list(all_names)
+        base = stripped
+
+
+def find_targets(paths: Sequence[str], file_patterns: Dict[str, List[str]]) -> List[str]:
+    """
+    Expand paths, directories and globs into files.
+
+    Without paths, the files of file_patterns and their rotated siblings
+    (app.log.1, app.log.2.gz, ...) are scanned.
+    """
+    if not paths:
+        paths = []
+        for key in file_patterns:
+            paths.extend((key, key + '.*'))
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, filenames in os.walk(path):
+                found.extend(os.path.join(root, name) for name in sorted(filenames))
+        elif glob.has_magic(path):
+            found.extend(sorted(glob.glob(path)))
+        elif os.path.exists(path):
+            found.append(path)
+        else:
+            logging.getLogger("Scan").warning(f"Skipping missing path: {path}")
+    seen = set()
+    return [path for path in found
+            if os.path.isfile(path) and not (path in seen or seen.add(path))]
+
+
+def plan(path: str, names: Tuple[str, ...], encoding: str,
+         range_size: int, block_size: int) -> List[tuple]:
+    """Split a file into work units: (function, args)."""
+    if path.endswith('.gz'):
+        return [(_scan_gzip, (path, names, encoding, block_size))]
+    size = os.path.getsize(path)
+    if not size:
+        return []
+    if not _splits_on_newline_byte(encoding):
+        return [(_scan_whole, (path, names, encoding))]
+    return [(_scan_range, (path, start, min(start + range_size, size), names, encoding))
+            for start in range(0, size, range_size)]
+
+
+def scan_main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of `logwatcher scan`."""
+    parser = argparse.ArgumentParser(
+        prog='logwatcher scan',
+        description="Match the configured patterns against log files and archives, "
+                    "writing matches as JSON lines"
+    )
+    parser.add_argument('config', help="Path to config file")
+    parser.add_argument('paths', nargs='*',
+                        help="Files, directories or globs (default: file_patterns "
+                             "and their rotated siblings)")
+    parser.add_argument('--output', '-o', help="Write matches to this file instead of stdout")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes, 1 to scan in-process")
+    parser.add_argument('--range-size', type=int, default=64,
+                        help="MiB of a plain file matched per work unit")
+    parser.add_argument('--patterns', nargs='+', help="Apply these patterns or field rules to every file")
+    args = parser.parse_args(argv)
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    validate_config(config)
+    encoding = config['settings'].get('encoding', 'utf-8')
+    patterns = {name: re.compile(source) for name, source in config['patterns'].items()}
+    field_rules = config.get('field_rules', {})
+    if args.patterns:
+        unknown = [name for name in args.patterns if name not in patterns and name not in field_rules]
+        if unknown:
+            parser.error(f"unknown patterns: {', '.join(unknown)}")
+
+    logger = logging.getLogger("Scan")
+    dispatch = FileDispatchTable(config['file_patterns'])
+    range_size = args.range_size * 1024 * 1024
+    units = []
+    # A file that cannot be read is reported and skipped, the scan goes on
+    failed = set()
+    for path in find_targets(args.paths, config['file_patterns']):
+        names = tuple(args.patterns or pattern_names(dispatch, path, list(patterns)))
+        try:
+            work = plan(path, names, encoding, range_size, range_size)
+        except OSError as e:
+            logger.error(f"Failed to scan {path}: {e}")
+            failed.add(path)
+            continue
+        for function, unit_args in work:
+            units.append((path, function, unit_args))
+
+    sources = {name: (p.pattern, p.flags) for name, p in patterns.items()}
+    pool = None
+    if args.workers > 1 and len(units) > 1:
+        pool = ProcessPoolExecutor(max_workers=args.workers, initializer=_init_scan_worker,
+                                   initargs=(sources, field_rules))
+    else:
+        _init_scan_worker(sources, field_rules)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    started = time.perf_counter()
+    matches = 0
+    # Line numbers continue across the ranges of a file
+    lines_before: Dict[str, int] = {}
+    pending = deque()
+    units_left = iter(units)
+    max_in_flight = max(1, args.workers) * 4
+
+    def results() -> Iterator[Tuple[str, Future]]:
+        # Units complete out of order but are written in submission order
+        for path, function, unit_args in units_left:
+            if pool is not None:
+                future = pool.submit(function, *unit_args)
+            else:
+                future = Future()
+                try:
+                    future.set_result(function(*unit_args))
+                except Exception as e:
+                    future.set_exception(e)
+            pending.append((path, future))
+            if pool is None or len(pending) >= max_in_flight:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+    try:
+        for path, future in results():
+            if path in failed:
+                # Line numbers of its later ranges would be wrong
+                continue
+            try:
+                newlines, hits = future.result()
+            except Exception as e:
+                # e.g. a corrupt archive, or a file deleted since it was found
+                logger.error(f"Failed to scan {path}: {e!r}")
+                failed.add(path)
+                lines_before.pop(path, None)
+                continue
+            base = lines_before.get(path, 0)
+            for line, offset, matched, text in hits:
+                out.write(json.dumps({
+                    'file': path, 'line': base + line + 1, 'offset': offset,
+                    'patterns': matched, 'text': text
+                }, ensure_ascii=False) + '\n')
+            matches += len(hits)
+            lines_before[path] = base + newlines
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+
+    elapsed = time.perf_counter() - started
+    scanned_bytes = 0
+    for path in lines_before:
+        try:
+            scanned_bytes += os.path.getsize(path)
+        except OSError:
+            # Deleted after it was scanned
+            continue
+    print(
+        f"Scanned {len(lines_before)} files, {scanned_bytes / 1e6:.1f} MB on disk in "
+        f"{elapsed:.1f}s ({scanned_bytes / 1e6 / elapsed if elapsed else 0:.1f} MB/s), "
+        f"{matches} matching lines" + (f", {len(failed)} files failed" if failed else ''),
+        file=sys.stderr
+    )
+    return 1 if failed else 0
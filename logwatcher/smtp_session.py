@@ -0,0 +1,230 @@
+import socket
+import smtplib
+import logging
+import threading
+import time
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class SMTPSession:
+    """Long-lived, lazily (re)connected SMTP session."""
+
+    def __init__(self, config: Dict[str, Any], timeout: float = 30.0):
+        """
+        Initialize the SMTPSession.
+
+        Args:
+            config: Email notification configuration
+            timeout: Socket timeout for SMTP operations
+        """
+        self.config = config
+        self.timeout = timeout
+        self.logger = logging.getLogger("SMTPSession")
+        self._server: Optional[smtplib.SMTP] = None
+        self._lock = threading.Lock()
+        # Time of the last successful send / (time, error) of the last failed one
+        self.last_success: Optional[float] = None
+        self.last_failure: Optional[Tuple[float, str]] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open a new session and authenticate."""
+        server = smtplib.SMTP(
+            self.config['smtp_server'], self.config['smtp_port'], timeout=self.timeout
+        )
+        try:
+            # Plain connections are only for relays on a trusted network
+            if self.config.get('starttls', True):
+                server.starttls()
+            server.login(self.config['username'], self.config['password'])
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _session(self) -> smtplib.SMTP:
+        """Return a live session, reconnecting if the server dropped it."""
+        if self._server is not None:
+            try:
+                code, _ = self._server.noop()
+                if code == 250:
+                    return self._server
+            except smtplib.SMTPException as e:
+                self.logger.debug(f"SMTP session no longer usable, reconnecting: {e}")
+            except OSError as e:
+                self.logger.debug(f"SMTP connection lost, reconnecting: {e}")
+            self._discard()
+        self._server = self._connect()
+        return self._server
+
+    def _discard(self) -> None:
+        """Drop the current session without raising."""
+        if self._server is not None:
+            try:
+                self._server.close()
+            except Exception:
+                pass
+            self._server = None
+
+    def send(self, msg) -> None:
+        """
+        Send a message over the shared session.
+
+        Args:
+            msg: Email message to send
+        """
+        with self._lock:
+            try:
+                try:
+                    self._session().send_message(msg)
+                except (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout):
+                    # The connection died between NOOP and send; retry once.
+                    # Other SMTPExceptions are OSErrors too, but the server
+                    # answered them, and resending could deliver twice
+                    self._discard()
+                    self._session().send_message(msg)
+            except Exception as e:
+                self.last_failure = (time.time(), str(e))
+                raise
+            self.last_success = time.time()
+
+    def check(self) -> None:
+        """Verify the session, connecting if necessary. Raises on failure."""
+        with self._lock:
+            self._session()
+
+    def close(self) -> None:
+        """End the session."""
+        with self._lock:
+            if self._server is not None:
+                try:
+                    self._server.quit()
+                except Exception:
+                    pass
+                self._server = None
+
+
+class EmailBatcher:
+    """
+    Groups alerts queued within a short window into one email per recipient list.
+
+    Alerts are sent after add() returns, so the outcome of every batch is
+    passed to on_result, with the tokens given to add() and the error of
+    the last attempt, or None.
+    """
+
+    def __init__(self, session: SMTPSession, config: Dict[str, Any],
+                 window: float = 2.0, max_batch: int = 100, max_retries: int = 3,
+                 on_result: Optional[Callable[[List[Any], Optional[Exception]], None]] = None):
+        """
+        Initialize the EmailBatcher.
+
+        Args:
+            session: SMTP session used for delivery
+            config: Email notification configuration
+            window: Seconds to collect alerts before sending them
+            max_batch: Number of alerts that triggers an immediate send
+            max_retries: Delivery attempts per batch
+            on_result: Called from the batching thread after each batch
+        """
+        self.session = session
+        self.config = config
+        self.window = window
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.on_result = on_result
+        self.logger = logging.getLogger("EmailBatcher")
+        # recipients -> (deadline, [(message, token)])
+        self._batches: Dict[Tuple[str, ...], Tuple[float, List[Tuple[str, Any]]]] = {}
+        self._cond = threading.Condition()
+        self._running = True
+        # Cuts retry delays short on shutdown
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='email-batcher', daemon=True)
+        self._thread.start()
+
+    def add(self, message: str, recipients: Optional[Sequence[str]] = None,
+            token: Any = None) -> None:
+        """
+        Queue an alert for the next email to its recipients.
+
+        Args:
+            message: Alert text
+            recipients: Recipient list, defaults to the configured to_address
+            token: Passed back to on_result with the outcome of the batch
+        """
+        key = tuple(recipients or self.config['to_address'])
+        with self._cond:
+            if key not in self._batches:
+                self._batches[key] = (time.monotonic() + self.window, [])
+                self._cond.notify()
+            deadline, messages = self._batches[key]
+            messages.append((message, token))
+            if len(messages) >= self.max_batch:
+                self._batches[key] = (0.0, messages)
+                self._cond.notify()
+
+    def _run(self) -> None:
+        """Send batches as their windows close."""
+        while True:
+            with self._cond:
+                while True:
+                    if not self._running:
+                        # Flush everything on shutdown
+                        due = list(self._batches)
+                        break
+                    now = time.monotonic()
+                    due = [key for key, (deadline, _) in self._batches.items() if deadline <= now]
+                    if due:
+                        break
+                    next_deadline = min((d for d, _ in self._batches.values()), default=None)
+                    self._cond.wait(None if next_deadline is None else next_deadline - now)
+                ready = [(key, self._batches.pop(key)[1]) for key in due]
+                running = self._running
+
+            for recipients, messages in ready:
+                self._send_batch(recipients, messages)
+            if not running:
+                return
+
+    def _send_batch(self, recipients: Tuple[str, ...],
+                    entries: List[Tuple[str, Any]]) -> None:
+        """Compose and deliver one email carrying several alerts."""
+        messages = [message for message, _ in entries]
+        msg = MIMEMultipart()
+        msg['From'] = self.config['username']
+        msg['To'] = ', '.join(recipients)
+        if len(messages) == 1:
+            msg['Subject'] = "LogWatcher Alert"
+            body = messages[0]
+        else:
+            msg['Subject'] = f"LogWatcher Alert ({len(messages)} alerts)"
+            body = '\n\n'.join(messages)
+        msg.attach(MIMEText(body, 'plain'))
+
+        error = None
+        for attempt in range(self.max_retries):
+            try:
+                self.session.send(msg)
+                error = None
+                break
+            except Exception as e:
+                error = e
+                if attempt == self.max_retries - 1 or self._stopping.wait(attempt + 1):
+                    break
+        if error is not None and self.on_result is None:
+            self.logger.error(f"Failed to send email with {len(messages)} alerts: {str(error)}")
+        if self.on_result is not None:
+            try:
+                self.on_result([token for _, token in entries], error)
+            except Exception:
+                self.logger.exception("Email batch result handler failed:")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Send everything still queued and stop the batching thread."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._stopping.set()
+        self._thread.join(timeout=timeout)
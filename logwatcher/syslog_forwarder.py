@@ -0,0 +1,253 @@
+import os
+import errno
+import socket
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# logging levels to syslog severities
+_SEVERITIES = {
+    logging.CRITICAL: 2, logging.ERROR: 3, logging.WARNING: 4,
+    logging.INFO: 6, logging.DEBUG: 7
+}
+
+
+class SyslogForwarder:
+    """
+    Sends syslog messages from a background thread.
+
+    Producers only append to a bounded queue; when it is full the oldest
+    message is dropped. The sender keeps one connection open, writes many
+    messages per send and reconnects with exponential backoff. TCP
+    messages are framed with RFC 6587 octet counting.
+
+    Records are truncated to max_message_size bytes. A batch that still
+    fails after max_retries reconnects is dropped, so one bad record cannot
+    stall the queue. UDP datagrams that went out before a failure are not
+    sent again; a TCP batch is resent whole on the new connection.
+    """
+
+    def __init__(self, host: str, port: int, protocol: str = 'udp', facility: int = 16,
+                 tag: str = 'logwatcher', queue_size: int = 10_000, batch_size: int = 500,
+                 backoff: float = 0.5, backoff_max: float = 30.0, timeout: float = 5.0,
+                 max_message_size: int = 8192, max_retries: int = 5):
+        """
+        Initialize the SyslogForwarder.
+
+        Args:
+            host: Collector host
+            port: Collector port
+            protocol: 'udp' or 'tcp'
+            facility: Syslog facility number
+            tag: APP-NAME of the messages
+            queue_size: Maximum number of queued messages
+            batch_size: Maximum number of messages written per send
+            backoff: First reconnect delay in seconds
+            backoff_max: Maximum reconnect delay in seconds
+            timeout: Socket connect and send timeout
+            max_message_size: Maximum bytes of a record, before TCP framing
+            max_retries: Failed sends of a batch before it is dropped
+        """
+        self.address = (host, port)
+        self.tcp = protocol.lower() == 'tcp'
+        self.facility = facility
+        self.tag = tag
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.max_message_size = max_message_size
+        self.max_retries = max_retries
+        self.logger = logging.getLogger("SyslogForwarder")
+
+        self._hostname = socket.gethostname() or '-'
+        self._procid = str(os.getpid())
+        self._queue: Deque[Tuple[float, int, str]] = deque()
+        self._cond = threading.Condition()
+        self._sock: Optional[socket.socket] = None
+        # Encoded records of the current batch not sent yet, retried after
+        # reconnecting
+        self._unsent: List[bytes] = []
+        self._retries = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.sent = 0
+        self.dropped = 0
+        self.truncated = 0
+        self.error_count = 0
+        self.last_error: Optional[str] = None
+        self.last_successful_send: Optional[datetime] = None
+
+    def start(self) -> None:
+        """Start the sender thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='syslog-forwarder', daemon=True)
+        self._thread.start()
+
+    def enqueue(self, message: str, level: int = logging.INFO) -> bool:
+        """
+        Queue a message without blocking on the network.
+
+        Args:
+            message: Message text
+            level: Logging level
+
+        Returns:
+            False if the oldest queued message had to be dropped
+        """
+        with self._cond:
+            kept = True
+            if len(self._queue) >= self.queue_size:
+                self._queue.popleft()
+                self.dropped += 1
+                kept = False
+            self._queue.append((time.time(), level, message))
+            if len(self._queue) == 1:
+                self._cond.notify()
+        return kept
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def format(self, timestamp: float, level: int, message: str) -> bytes:
+        """Encode a message as an RFC 5424 record, octet-counted for TCP."""
+        pri = self.facility * 8 + _SEVERITIES.get(level, 6)
+        stamp = datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec='milliseconds')
+        record = (
+            f"<{pri}>1 {stamp} {self._hostname} {self.tag} {self._procid} - - {message}"
+        ).encode('utf-8', errors='replace')
+        if len(record) > self.max_message_size:
+            # Cut at a character boundary, so the record stays valid UTF-8
+            record = record[:self.max_message_size].decode('utf-8', errors='ignore').encode('utf-8')
+            self.truncated += 1
+        if self.tcp:
+            return b'%d %s' % (len(record), record)
+        return record
+
+    def _take_batch(self) -> Optional[List[Tuple[float, int, str]]]:
+        """Wait for queued messages; None once stopped and drained."""
+        with self._cond:
+            while not self._queue:
+                if not self._running:
+                    return None
+                self._cond.wait()
+            count = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self) -> None:
+        delay = self.backoff
+        while True:
+            if not self._unsent:
+                batch = self._take_batch()
+                if batch is None:
+                    break
+                self._unsent = [self.format(*item) for item in batch]
+            try:
+                self._write(self._unsent)
+            except OSError as e:
+                self.error_count += 1
+                self.last_error = str(e)
+                self._retries += 1
+                if self._retries > self.max_retries:
+                    self.logger.warning(
+                        f"Dropping {len(self._unsent)} syslog messages after "
+                        f"{self.max_retries} retries: {e}"
+                    )
+                    self.dropped += len(self._unsent)
+                    self._unsent = []
+                    self._retries = 0
+                else:
+                    self.logger.warning(f"Syslog forwarding failed, retrying in {delay:.1f}s: {e}")
+                self._disconnect()
+                if not self._sleep(random.uniform(delay / 2, delay)):
+                    break
+                delay = min(delay * 2, self.backoff_max)
+                continue
+            self._unsent = []
+            self._retries = 0
+            self.last_error = None
+            self.last_successful_send = datetime.now()
+            delay = self.backoff
+        self._disconnect()
+
+    def _write(self, records: List[bytes]) -> None:
+        """Send encoded records over the open connection, connecting first if needed."""
+        if self._sock is None:
+            self._sock = self._connect()
+        if self.tcp:
+            self._sock.sendall(b''.join(records))
+            self.sent += len(records)
+            del records[:]
+            return
+        # One datagram per message; the collector parses each separately.
+        # Sent records are removed, so a retry does not duplicate them
+        while records:
+            try:
+                self._sock.send(records[0])
+                self.sent += 1
+            except OSError as e:
+                if e.errno != errno.EMSGSIZE:
+                    raise
+                # Too large for this path even after truncation; the
+                # connection is fine, only this record cannot be sent
+                self.dropped += 1
+                self.logger.warning(f"Dropping syslog message of {len(records[0])} bytes: {e}")
+            del records[0]
+
+    def _connect(self) -> socket.socket:
+        family, socktype, proto, _, address = socket.getaddrinfo(
+            *self.address, type=socket.SOCK_STREAM if self.tcp else socket.SOCK_DGRAM
+        )[0]
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _sleep(self, seconds: float) -> bool:
+        """Wait before reconnecting. Returns False if stopped meanwhile."""
+        with self._cond:
+            if self._running:
+                self._cond.wait(seconds)
+            return self._running
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Send what is queued, within the timeout, and stop the sender thread."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Counters for health reporting."""
+        return {
+            'connected': self.connected,
+            'queue_depth': self.queue_depth,
+            'queue_size': self.queue_size,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'truncated': self.truncated
+        }
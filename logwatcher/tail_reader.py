@@ -0,0 +1,187 @@
+import os
+import time
+import codecs
+from typing import Iterator, List, Tuple, Union
+
+
+def _splits_on_newline_byte(encoding: str) -> bool:
+    """
+    Check whether complete lines of an encoding can be split on b"\\n".
+
+    True for ASCII-compatible encodings (UTF-8, Latin-1, ...), where the
+    newline byte never occurs inside a multibyte character.
+    """
+    return '\n'.encode(encoding) == b'\n' and 'a\n'.encode(encoding) == b'a\n'
+
+
+def _newline_unit(encoding: str) -> Tuple[bytes, bytes]:
+    """
+    Get the code unit of a newline in an encoding, and its byte order mark.
+
+    For UTF-16, UTF-32 and single-byte encodings like EBCDIC the newline is
+    one code unit, which never occurs inside another character at a code
+    unit boundary.
+    """
+    single, double = '\n'.encode(encoding), '\n\n'.encode(encoding)
+    unit = double[len(single):]
+    return unit, single[:-len(unit)]
+
+
+def _pread(fd: int, size: int, offset: int) -> bytes:
+    """Positional read, emulated with lseek/read where pread is unavailable."""
+    if hasattr(os, 'pread'):
+        return os.pread(fd, size, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, size)
+
+
+class TailReader:
+    """Reads newly appended data from a file descriptor as complete lines."""
+
+    def __init__(self, encoding: str = 'utf-8', chunk_size: int = 65536):
+        """
+        Initialize the TailReader.
+
+        Args:
+            encoding: Encoding of the monitored file
+            chunk_size: Number of bytes requested per read
+        """
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.offset = 0
+        # Total seconds spent in reads and in decoding
+        self.read_time = 0.0
+        self.decode_time = 0.0
+        self._byte_lines = _splits_on_newline_byte(encoding)
+        self._newline = b'\n'
+        self._bom = b''
+        if not self._byte_lines:
+            self._newline, self._bom = _newline_unit(encoding)
+        self._decoder = None
+        self._partial = b''
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop any held back partial line, e.g. after rotation."""
+        self._partial = b''
+        if not self._byte_lines:
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+
+    @property
+    def partial(self) -> bytes:
+        """Bytes read but held back as an incomplete line, as in the file."""
+        return self._partial
+
+    def _line_end(self, data: bytes) -> int:
+        """Offset just past the last newline code unit of data, or 0."""
+        newline = self._newline
+        width = len(newline)
+        end = data.rfind(newline)
+        # A match straddling two code units is not a newline
+        while end > 0 and end % width:
+            end = data.rfind(newline, 0, end + width - 1)
+        return end + width if end >= 0 else 0
+
+    @property
+    def pending(self) -> int:
+        """Number of bytes read but held back as an incomplete line."""
+        return len(self.partial)
+
+    def _blocks(self, fd: int, pos: int) -> Iterator[Union[bytes, str]]:
+        """Yield runs of complete lines read from pos to the end of the file."""
+        self.offset = pos
+        while True:
+            start = time.perf_counter()
+            chunk = _pread(fd, self.chunk_size, self.offset)
+            self.read_time += time.perf_counter() - start
+            if not chunk:
+                break
+            if self._bom and self.offset == 0 and chunk.startswith(self._bom[::-1]):
+                # The decoder follows the byte order mark of the file
+                self._newline = self._newline[::-1]
+            self.offset += len(chunk)
+
+            # Lines are split on the raw bytes, so the held back partial line
+            # is kept exactly as it is in the file
+            data = self._partial + chunk
+            if self._byte_lines:
+                end = data.rfind(b'\n') + 1
+            else:
+                end = self._line_end(data)
+            self._partial = data[end:]
+            if not end:
+                continue
+            if self._byte_lines:
+                yield data[:end]
+            else:
+                # Complete lines end on a character boundary, leaving the
+                # decoder with nothing buffered
+                start = time.perf_counter()
+                block = self._decoder.decode(data[:end])
+                self.decode_time += time.perf_counter() - start
+                yield block
+
+    def read(self, fd: int, pos: int) -> Iterator[Union[bytes, str]]:
+        """
+        Read from pos to the end of the file and yield complete raw lines.
+
+        A trailing line without a newline is held back and completed by the
+        next call. ``self.offset`` tracks the file offset read so far.
+
+        Args:
+            fd: Open file descriptor
+            pos: Offset to start reading at
+
+        Yields:
+            Raw lines without the line terminator; pass them to decode()
+        """
+        for block in self._blocks(fd, pos):
+            yield from block.splitlines()
+
+    def read_text(self, fd: int, pos: int) -> Iterator[str]:
+        """
+        Like read(), but decode each run of complete lines in a single call.
+
+        Args:
+            fd: Open file descriptor
+            pos: Offset to start reading at
+
+        Yields:
+            Decoded lines without the line terminator
+        """
+        for block in self._blocks(fd, pos):
+            if isinstance(block, bytes):
+                start = time.perf_counter()
+                block = block.decode(self.encoding, errors='replace')
+                self.decode_time += time.perf_counter() - start
+            yield from block.splitlines()
+
+    def flush(self) -> List[str]:
+        """
+        Return the held back partial line as a final line and reset.
+
+        Used once a file will not be written to anymore, e.g. after rotation.
+
+        Returns:
+            The decoded partial line, or an empty list if there is none
+        """
+        if self._byte_lines:
+            tail = self._partial.decode(self.encoding, errors='replace')
+        else:
+            tail = self._decoder.decode(self._partial, final=True)
+        self.reset()
+        return [tail] if tail else []
+
+    def decode(self, raw: Union[bytes, str]) -> str:
+        """
+        Decode a raw line returned by read().
+
+        Args:
+            raw: Raw line
+
+        Returns:
+            Decoded line
+        """
+        if isinstance(raw, bytes):
+            return raw.decode(self.encoding, errors='replace')
+        return raw
@@ -0,0 +1,175 @@
+import time
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_POLICY = 'default'
+
+
+class TokenBucketLimiter:
+    """
+    Token-bucket rate limiter with a bounded number of tracked keys.
+
+    Bucket state lives in flat arrays indexed by slot; an ordered mapping of
+    key to slot provides LRU eviction. Only a bucket that has been idle long
+    enough to refill is evicted, as it is indistinguishable from a new one;
+    while every tracked bucket is still refilling, new keys are refused
+    rather than let through on a bucket taken from a limited key.
+    """
+
+    def __init__(self, policies: Dict[str, Tuple[float, float]], max_keys: int = 100_000):
+        """
+        Initialize the TokenBucketLimiter.
+
+        Args:
+            policies: Mapping of policy name to (burst, tokens per second);
+                must contain DEFAULT_POLICY. A rate of None means unlimited.
+            max_keys: Maximum number of keys tracked at once
+        """
+        if DEFAULT_POLICY not in policies:
+            raise ValueError(f"Missing '{DEFAULT_POLICY}' rate limit policy")
+        self.max_keys = max_keys
+        self._policy_ids: Dict[str, int] = {}
+        self._burst = array('d')
+        self._rate = array('d')
+        for name, (burst, rate) in policies.items():
+            self._policy_ids[name] = len(self._burst)
+            self._burst.append(burst)
+            self._rate.append(float('inf') if rate is None else rate)
+
+        self._slots: 'OrderedDict[str, int]' = OrderedDict()
+        self._free: List[int] = []
+        self._tokens = array('d')
+        self._stamp = array('d')
+        self._policy = array('H')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'TokenBucketLimiter':
+        """
+        Build the per file and pattern limiter from the configuration.
+
+        rate_limits.default applies to every key, rate_limits.patterns
+        overrides it per pattern. Without explicit limits, each key may send
+        one notification per settings.notification_rate_limit seconds.
+
+        Args:
+            config: Full LogWatcher configuration
+
+        Returns:
+            Configured limiter
+        """
+        rate_limits = config.get('rate_limits', {})
+        interval = config.get('settings', {}).get('notification_rate_limit', 0)
+        policies = {DEFAULT_POLICY: _policy(rate_limits.get('default', {}), interval)}
+        for name, limit in rate_limits.get('patterns', {}).items():
+            policies[name] = _policy(limit, interval)
+        return cls(policies, rate_limits.get('max_keys', 100_000))
+
+    @classmethod
+    def for_channels(cls, config: Dict[str, Any]) -> Optional['TokenBucketLimiter']:
+        """
+        Build the per notification channel limiter from rate_limits.channels.
+
+        Args:
+            config: Full LogWatcher configuration
+
+        Returns:
+            Configured limiter, or None if no channel is limited
+        """
+        channels = config.get('rate_limits', {}).get('channels', {})
+        if not channels:
+            return None
+        # Channels without an entry are not limited
+        policies = {DEFAULT_POLICY: (1.0, None)}
+        for name, limit in channels.items():
+            policies[name] = _policy(limit, 0)
+        return cls(policies, max_keys=len(policies))
+
+    def refill_intervals(self) -> Dict[str, float]:
+        """
+        Seconds for each policy's bucket to gain a token.
+
+        Returns:
+            Mapping of policy name to refill interval, 0 for unlimited policies
+        """
+        return {name: 1.0 / self._rate[policy_id] for name, policy_id in self._policy_ids.items()}
+
+    def can_send(self, key: str, policy: str = DEFAULT_POLICY) -> bool:
+        """
+        Take a token for a key if one is available.
+
+        Args:
+            key: Rate limiting key, e.g. "filename:pattern"
+            policy: Name of the policy to apply when the key is first seen;
+                unknown names fall back to the default policy
+
+        Returns:
+            True if the notification may be sent
+        """
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                policy_id = self._policy_ids.get(policy, 0)
+                if self._rate[policy_id] == float('inf'):
+                    # Unlimited policies need no state
+                    return True
+                slot = self._allocate(key, policy_id, now)
+                if slot is None:
+                    return False
+                self._stamp[slot] = now
+            else:
+                self._slots.move_to_end(key)
+                policy_id = self._policy[slot]
+                tokens = self._tokens[slot] + (now - self._stamp[slot]) * self._rate[policy_id]
+                self._tokens[slot] = min(tokens, self._burst[policy_id])
+                self._stamp[slot] = now
+
+            if self._tokens[slot] >= 1.0:
+                self._tokens[slot] -= 1.0
+                return True
+            return False
+
+    def _allocate(self, key: str, policy_id: int, now: float) -> Optional[int]:
+        """
+        Assign a slot with a full bucket to a new key, evicting the LRU key if needed.
+
+        Returns None when all keys are tracked and the LRU one has not refilled yet.
+        """
+        if len(self._slots) >= self.max_keys:
+            oldest, slot = next(iter(self._slots.items()))
+            lru_policy = self._policy[slot]
+            refilled = self._tokens[slot] + (now - self._stamp[slot]) * self._rate[lru_policy]
+            if refilled < self._burst[lru_policy]:
+                return None
+            del self._slots[oldest]
+        elif self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._tokens)
+            self._tokens.append(0.0)
+            self._stamp.append(0.0)
+            self._policy.append(0)
+        self._slots[key] = slot
+        self._policy[slot] = policy_id
+        self._tokens[slot] = self._burst[policy_id]
+        return slot
+
+    def forget(self, key: str) -> None:
+        """Stop tracking a key, e.g. when its file is no longer watched."""
+        with self._lock:
+            slot = self._slots.pop(key, None)
+            if slot is not None:
+                self._free.append(slot)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+def _policy(limit: Dict[str, Any], default_interval: float) -> Tuple[float, Optional[float]]:
+    """Convert a {burst, refill_interval} mapping to (burst, tokens per second)."""
+    burst = float(limit.get('burst', 1))
+    interval = limit.get('refill_interval', default_interval)
+    return burst, (None if interval <= 0 else 1.0 / interval)
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from logwatcher.field_rules import FieldMatcher, compile_rules
+
+FLAT_RULES = {
+    'fatal': {'level': {'in': ['ERROR', 'FATAL']}},
+    'server_error': {'status': {'>=': 500}, 'level': {'!=': 'INFO'}},
+    'slow': {'duration': {'>': 1.5}},
+    'timeout': {'msg': {'regex': 'timed? ?out'}},
+    'untraced': {'trace_id': {'exists': False}, 'level': {'==': 'WARN'}},
+}
+
+NESTED_RULES = {
+    'http_error': {'http.status': {'>=': 500}},
+    'fatal': {'level': {'==': 'FATAL'}},
+}
+
+RECORDS = [
+    {'level': 'ERROR', 'status': 503, 'msg': 'upstream timed out'},
+    {'level': 'WARN', 'status': 502, 'duration': 2.5},
+    {'level': 'INFO', 'status': 200, 'trace_id': 'abc', 'msg': 'ok'},
+    {'level': 'WARN', 'msg': 'quote " and brace } in text', 'status': 500},
+    {'level': 'FATAL', 'msg': 'path C:\\logs\\app', 'tags': ['a', 'b']},
+    {'msg': '{"level": "ERROR"}', 'level': 'INFO'},
+    {'level': 'ERROR', 'status': '500', 'duration': '3'},
+    {'level': 'WARN', 'http': {'status': 504}, 'duration': 0.5},
+    {'level': 'FATAL', 'http': {'status': 200, 'headers': {'x': '}'}}},
+]
+
+LINES = [json.dumps(record) for record in RECORDS] + [
+    json.dumps(record, separators=(',', ':')) for record in RECORDS
+]
+
+MALFORMED = [
+    '{"level": "ERROR"',
+    '{"level": "ERROR", "status": 503',
+    '{"msg": "}',
+    '{"level": "WARN", "msg": "cut }',
+    '{"level": "ERROR"}}',
+    '{"level": "ERROR"} trailing',
+    '{"level": "ERROR", "level": "INFO"}',
+    '{"status": [500]}',
+    '{"status": 5x0, "level": "ERROR"}',
+    '["level", "ERROR"]',
+    'level=ERROR status=503',
+    '{"level": "ERROR",}',
+    '{, "level": "ERROR"}',
+    '{"level": "ERROR" "status": 1}',
+    '{"status": 0500, "level": "WARN"}',
+    '{"status": +503, "level": "WARN"}',
+]
+
+# Keys and values spelled with escapes that the raw line does not contain
+ESCAPED = [
+    '{"lev\\u0065l": "ERROR"}',
+    '{"level": "\\u0046ATAL", "status": 503}',
+    '{"msg": "time\\u0064 out", "level": "INFO"}',
+]
+
+
+def reference(rules, line):
+    """Rule names matching a line, decoded with json.loads."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return []
+    if not isinstance(record, dict):
+        return []
+    return [name for name, rule in rules.items() if rule.matches(record)]
+
+
+def truncations(lines):
+    for line in lines:
+        for end in range(len(line) + 1):
+            yield line[:end]
+
+
+@pytest.mark.parametrize('definitions', [FLAT_RULES, NESTED_RULES], ids=['flat', 'nested'])
+def test_matches_agree_with_json_loads(definitions):
+    rules = compile_rules(definitions, {})
+    matcher = FieldMatcher(rules, {}, list(rules))
+    for line in [*LINES, *MALFORMED, *ESCAPED, *truncations(LINES)]:
+        assert matcher.match(line) == reference(rules, line), line
+
+
+def test_flat_rules_use_field_extraction():
+    rules = compile_rules(FLAT_RULES, {})
+    assert FieldMatcher(rules, {}, list(rules))._extract is not None
+    nested = compile_rules(NESTED_RULES, {})
+    assert FieldMatcher(nested, {}, list(nested))._extract is None
+
+
+def test_truncated_line_does_not_match():
+    rules = compile_rules({'fatal': {'level': {'==': 'ERROR'}}}, {})
+    matcher = FieldMatcher(rules, {}, ['fatal'])
+    assert matcher.match('{"level": "ERROR"}') == ['fatal']
+    assert matcher.match('{"level": "ERROR"') == []
+    assert matcher.match('{"level": "ERROR", "msg": "cut sh') == []
+
+
+def test_escaped_key_matches():
+    rules = compile_rules(FLAT_RULES, {})
+    matcher = FieldMatcher(rules, {}, list(rules))
+    assert matcher.match('{"lev\\u0065l": "ERROR"}') == ['fatal']
+
+
+def test_regex_patterns_match_the_raw_line():
+    import re
+
+    rules = compile_rules({'fatal': {'level': {'==': 'FATAL'}}}, {'oom': 'OutOfMemory'})
+    matcher = FieldMatcher(rules, {'oom': re.compile('OutOfMemory')}, ['oom', 'fatal'])
+    assert matcher.match('{"level": "FATAL", "msg": "OutOfMemory"}') == ['oom', 'fatal']
+    assert matcher.match('OutOfMemory in a plain line') == ['oom']
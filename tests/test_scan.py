@@ -0,0 +1,64 @@
+import gzip
+import json
+import os
+
+from logwatcher import scan
+
+
+def write_config(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({
+        'patterns': {'error': r'\bERROR\b'},
+        'file_patterns': {},
+        'settings': {
+            'encoding': 'utf-8', 'read_chunk_size': 65536,
+            'notification_rate_limit': 60, 'config_cache': False
+        },
+        'notifications': {},
+        'notification_rules': {},
+    }))
+    return str(path)
+
+
+def run_scan(tmp_path, *paths):
+    output = tmp_path / 'matches.jsonl'
+    status = scan.scan_main([write_config(tmp_path), *map(str, paths),
+                             '--workers', '1', '--output', str(output)])
+    matches = [json.loads(line) for line in output.read_text().splitlines()]
+    return status, [(os.path.basename(match['file']), match['line']) for match in matches]
+
+
+def test_scan_reports_matches(tmp_path):
+    (tmp_path / 'app.log').write_text('ok\nERROR one\nok\n')
+    (tmp_path / 'app.log.1.gz').write_bytes(gzip.compress(b'ERROR two\n'))
+
+    status, matches = run_scan(tmp_path, tmp_path / 'app.log', tmp_path / 'app.log.1.gz')
+
+    assert status == 0
+    assert matches == [('app.log', 2), ('app.log.1.gz', 1)]
+
+
+def test_unreadable_files_fail_the_scan_but_not_the_others(tmp_path, monkeypatch):
+    (tmp_path / 'before.log').write_text('ERROR before\n')
+    data = gzip.compress(b'ERROR cut short\n' * 1000)
+    (tmp_path / 'truncated.gz').write_bytes(data[:len(data) // 2])
+    (tmp_path / 'deleted.log').write_text('ERROR gone\n')
+    (tmp_path / 'after.log').write_text('ok\nERROR after\n')
+
+    plan = scan.plan
+
+    def plan_then_delete(path, *args):
+        # Deleted between planning and scanning, as by log rotation
+        units = plan(path, *args)
+        if path.endswith('deleted.log'):
+            os.remove(path)
+        return units
+
+    monkeypatch.setattr(scan, 'plan', plan_then_delete)
+    status, matches = run_scan(
+        tmp_path, *(tmp_path / name for name in
+                    ('before.log', 'truncated.gz', 'deleted.log', 'after.log'))
+    )
+
+    assert status == 1
+    assert matches == [('before.log', 1), ('after.log', 2)]
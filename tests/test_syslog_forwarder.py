@@ -0,0 +1,91 @@
+import errno
+import time
+
+from logwatcher.syslog_forwarder import SyslogForwarder
+
+
+class FailingSocket:
+    """Datagram socket stand-in that fails the sends listed in `failures`."""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.sent = []
+        self.calls = 0
+
+    def send(self, data):
+        self.calls += 1
+        code = self.failures.pop(self.calls, None)
+        if code is not None:
+            raise OSError(code, 'simulated failure')
+        self.sent.append(data)
+        return len(data)
+
+    def sendall(self, data):
+        self.send(data)
+
+    def close(self):
+        pass
+
+
+def make_forwarder(sock, **kwargs):
+    forwarder = SyslogForwarder('127.0.0.1', 514, backoff=0.001, backoff_max=0.001, **kwargs)
+    forwarder._connect = lambda: sock
+    return forwarder
+
+
+def run_until(forwarder, done, timeout=5.0):
+    forwarder.start()
+    deadline = time.monotonic() + timeout
+    while not done() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    forwarder.stop()
+
+
+def messages(sock):
+    return [record.rsplit(b' ', 1)[-1] for record in sock.sent]
+
+
+def test_udp_retry_does_not_resend_delivered_records():
+    sock = FailingSocket({3: errno.ECONNREFUSED})
+    forwarder = make_forwarder(sock)
+    for i in range(5):
+        forwarder.enqueue(f'm{i}')
+    run_until(forwarder, lambda: forwarder.sent == 5)
+
+    assert messages(sock) == [b'm0', b'm1', b'm2', b'm3', b'm4']
+    assert forwarder.error_count == 1
+    assert forwarder.dropped == 0
+
+
+def test_oversize_datagram_is_dropped_alone():
+    sock = FailingSocket({2: errno.EMSGSIZE})
+    forwarder = make_forwarder(sock)
+    for i in range(3):
+        forwarder.enqueue(f'm{i}')
+    run_until(forwarder, lambda: forwarder.sent + forwarder.dropped == 3)
+
+    assert messages(sock) == [b'm0', b'm2']
+    assert forwarder.dropped == 1
+    assert forwarder.error_count == 0
+
+
+def test_batch_is_dropped_after_max_retries():
+    sock = FailingSocket({n: errno.ECONNREFUSED for n in range(1, 4)})
+    forwarder = make_forwarder(sock, max_retries=2, batch_size=2)
+    for i in range(4):
+        forwarder.enqueue(f'm{i}')
+    run_until(forwarder, lambda: forwarder.sent == 2)
+
+    # The first batch failed three times and was dropped; the next one went out
+    assert messages(sock) == [b'm2', b'm3']
+    assert forwarder.dropped == 2
+    assert forwarder.error_count == 3
+
+
+def test_long_records_are_truncated():
+    forwarder = SyslogForwarder('127.0.0.1', 514, max_message_size=100)
+    record = forwarder.format(0.0, 20, 'é' * 200)
+
+    assert len(record) <= 100
+    record.decode('utf-8')
+    assert forwarder.truncated == 1